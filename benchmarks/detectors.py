@@ -0,0 +1,197 @@
+"""Offline detector benchmark.
+
+Replays frames through each detector and the full DetectionService and
+reports latency percentiles, throughput, peak RSS and allocations per frame.
+process_frame measures the detection path with motion gating off and every
+detector due on every frame; process_frame_gated uses the configured gate
+and cadences and also reports how many frames they skipped.
+
+    python -m benchmarks.detectors --synthetic 50 --json results.json
+    python -m benchmarks.detectors --frames ./frames --baseline baseline.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+import cv2
+import numpy as np
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    return float(np.percentile(samples, pct))
+
+def synthetic_frames(count: int, width: int = 640, height: int = 480) -> List[np.ndarray]:
+    """Deterministic webcam-like frames: a lit background with a moving face-sized blob"""
+    rng = np.random.default_rng(42)
+    frames = []
+    for i in range(count):
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        frame += rng.integers(0, 20, frame.shape, dtype=np.uint8)
+        center = (width // 2 + (i % 20) * 3 - 30, height // 2)
+        cv2.ellipse(frame, center, (70, 95), 0, 0, 360, (140, 170, 210), -1)
+        frames.append(frame)
+    return frames
+
+def load_frames(frames_dir: str) -> List[np.ndarray]:
+    frames = []
+    for path in sorted(glob.glob(os.path.join(frames_dir, "*"))):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def bench(run: Callable[[np.ndarray], object], frames: List[np.ndarray], warmup: int = 3) -> Dict:
+    for frame in frames[:warmup]:
+        run(frame)
+
+    timings = []
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        run(frame)
+        timings.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass, tracemalloc slows the timed one down
+    tracemalloc.start()
+    for frame in frames:
+        run(frame)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+    return {
+        "frames": len(frames),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "fps": round(len(frames) / elapsed, 2) if elapsed else 0.0,
+        "python_allocs_per_frame": round(blocks / len(frames), 1),
+        "python_peak_alloc_kb": round(peak / 1024, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+# Benchmark sessions for the full DetectionService path
+UNGATED_SESSION = 0
+GATED_SESSION = -1
+
+def gate_stats(session_stats: Dict) -> Dict:
+    """Skip counters from a session's stats, reported next to the gated timings"""
+    keys = ("received_frames", "skipped_frames", "skip_ratio", "analysed_frames")
+    return {key: session_stats[key] for key in keys if key in session_stats}
+
+def target_stats(name: str) -> Dict:
+    if name != "process_frame_gated":
+        return {}
+    from services.detection_service import DetectionService
+    return gate_stats(DetectionService.get_session(GATED_SESSION).stats())
+
+def targets() -> Dict[str, Callable[[np.ndarray], object]]:
+    from detection.frame_context import FrameContext
+    from detection.face_detection import detect_face
+    from detection.hand_detection import detect_hands
+    from detection.face_mesh_detection import detect_face_mesh
+    from detection.yolo_detection import detect_yolo, load_model
+    from services.detection_service import DetectionService
+    from services.detection_session import DetectionSession
+    from services.detection_scheduler import parse_cadences
+    from services.frame_gate import FrameChangeGate
+    from config.settings import settings
+
+    load_model()
+    loop = asyncio.new_event_loop()
+    # Every detector on every frame, so timings are not diluted by skipped frames
+    ungated = DetectionService.sessions[UNGATED_SESSION] = DetectionSession(parse_cadences({}))
+    ungated.gate = None
+    gated = DetectionService.sessions[GATED_SESSION] = DetectionSession(DetectionService.cadences)
+    gated.gate = FrameChangeGate(settings.MOTION_THRESHOLD, settings.MOTION_MAX_SKIP_SECONDS)
+
+    return {
+        # Each detector call borrows from the shared pool
+        "detect_face": lambda frame: detect_face(FrameContext(frame)),
+        "detect_hands": lambda frame: detect_hands(FrameContext(frame)),
+        "detect_face_mesh": lambda frame: detect_face_mesh(FrameContext(frame)),
+        "detect_yolo": lambda frame: detect_yolo(FrameContext(frame)),
+        "analyze_frame": DetectionService.analyze_frame,
+        # Full path: scheduling and executor dispatch for one session
+        "process_frame": lambda frame: loop.run_until_complete(
+            DetectionService.process_frame(frame, UNGATED_SESSION)
+        ),
+        # Same path with the motion gate and configured cadences
+        "process_frame_gated": lambda frame: loop.run_until_complete(
+            DetectionService.process_frame(frame, GATED_SESSION)
+        ),
+    }
+
+def compare_to_baseline(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Targets whose p95 latency grew by more than max_regression (a fraction)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        growth = current["p95_ms"] / previous["p95_ms"] - 1
+        if growth > max_regression:
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms (+{growth:.0%})"
+            )
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark proctoring detectors offline")
+    parser.add_argument("--frames", help="Directory of images to replay")
+    parser.add_argument("--synthetic", type=int, default=30, help="Synthetic frames to add")
+    parser.add_argument("--only", nargs="*", help="Subset of targets to run")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed p95 growth over the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    frames = (load_frames(args.frames) if args.frames else []) + synthetic_frames(args.synthetic)
+    if not frames:
+        parser.error("No frames to benchmark")
+
+    results = {}
+    for name, run in targets().items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = bench(run, frames)
+        results[name].update(target_stats(name))
+        print(f"{name:18} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+              f"p99 {results[name]['p99_ms']:8.2f} ms  {results[name]['fps']:7.1f} fps", file=sys.stderr)
+        if "skip_ratio" in results[name]:
+            print(f"{'':18} skipped {results[name]['skip_ratio']:.1%} of frames", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -58,8 +58,12 @@ def get_db():
             logger.error(f"Error closing database connection: {e}")
 
 def init_db():
-    import models.users  # Import models to register them
+    import models.event_types  # Import models to register them
+    import models.users
+    import models.exam_sessions
     import models.logs
+    import models.event_spans
+    import models.event_aggregates
     
     # Drop and recreate tables with new schema
     Base.metadata.drop_all(bind=engine)
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field  # Add this import
 from functools import lru_cache
+from typing import Dict, List
 import os
 from dotenv import load_dotenv
 import secrets
@@ -27,6 +28,97 @@ class Settings(BaseSettings):
     SERVER_HOST: str = "0.0.0.0"
     SERVER_PORT: int = int(os.getenv("PORT", "8080"))
 
+    # Detector pool settings
+    DETECTOR_POOL_SIZE: int = 4  # Max live instances per MediaPipe detector type, never below DETECTION_WORKERS
+    DETECTOR_POOL_TIMEOUT: float = 5.0  # Seconds to wait for a free instance
+    DETECTOR_POOL_MAX_FAILURES: int = 3  # Failures before an instance is discarded
+    DETECTOR_POOL_HEALTH_INTERVAL: int = 60  # Seconds between idle instance probes
+
+    # Per-session video-mode trackers for hands and face mesh
+    MEDIAPIPE_TRACKING: bool = True
+    MAX_LIVE_TRACKERS: int = 64  # Sessions with live trackers, least recently used are closed
+    TRACKER_IDLE_SECONDS: float = 120.0
+
+    # Detection executor settings
+    DETECTION_EXECUTOR: str = "thread"  # "thread" or "process"
+    DETECTION_WORKERS: int = 4
+    DETECTION_MAX_IN_FLIGHT: int = 32  # Frames queued or running across all sessions
+    DETECTION_TORCH_THREADS: int = 1  # Torch intra-op threads per worker process
+    FRAME_RING_SLOTS: int = 32  # Shared-memory frame slots for the process backend, 0 pickles frames
+    FRAME_RING_SLOT_BYTES: int = 1280 * 720 * 3  # Larger frames are pickled
+
+    # Write-behind log storage
+    LOG_FLUSH_BATCH: int = 500  # Rows per INSERT, a full batch triggers a flush
+    LOG_FLUSH_SECONDS: float = 1.0
+    LOG_MAX_BACKLOG: int = 50000  # Oldest rows are dropped beyond this while the DB is down
+    SPAN_MAX_GAP_SECONDS: float = 3.0  # Frames further apart than this start a new event span
+    SPAN_MAX_SECONDS: float = 60.0  # Long spans are closed and stored at least this often
+
+    # Session ownership shared across API workers: "memory" (one worker) or "sqlite"
+    SESSION_STATE_BACKEND: str = "memory"
+    SESSION_STATE_PATH: str = "session_state.db"
+    SESSION_COMMAND_POLL_SECONDS: float = 0.25
+
+    # Per-session buffer between receiving and processing frames
+    FRAME_QUEUE_SIZE: int = 1
+    FRAME_QUEUE_POLICY: str = "latest"  # "latest" drops stale frames, "block" stops reading the socket
+
+    # Adaptive client rate: targets sent over the WebSocket, from best to cheapest
+    ADAPTIVE_RATE: bool = True
+    RATE_LEVELS: List[Dict[str, int]] = [
+        {"targetFps": 10, "resolution": 640, "jpegQuality": 80},
+        {"targetFps": 6, "resolution": 640, "jpegQuality": 70},
+        {"targetFps": 4, "resolution": 480, "jpegQuality": 70},
+        {"targetFps": 2, "resolution": 480, "jpegQuality": 60},
+        {"targetFps": 1, "resolution": 320, "jpegQuality": 60},
+    ]
+    RATE_UPDATE_SECONDS: float = 2.0  # Minimum time between level changes
+
+    # Outbound results: "delta" sends coalesced event transitions, "full" every frame's events
+    RESULT_STREAM_MODE: str = "delta"  # Clients may override with ?stream=
+    RESULT_COALESCE_SECONDS: float = 0.5
+
+    # Per-detector cadence: every Nth frame ("3") or every X ms ("500ms")
+    DETECTOR_CADENCE: Dict[str, str] = {"face": "1", "hands": "2", "face_mesh": "2", "yolo": "500ms"}
+    DEGRADED_DETECTOR_CADENCE: Dict[str, str] = {"face": "2", "hands": "4", "face_mesh": "4", "yolo": "1000ms"}
+
+    # Admission control for new sessions; utilisation is projected worker use with one more session
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_SESSION_COST: float = 0.05  # Initial worker-seconds per second per session, then measured
+    ADMISSION_DEGRADE_UTILISATION: float = 0.7
+    ADMISSION_REJECT_UTILISATION: float = 0.95
+    ADMISSION_DEGRADE_CPU: float = 0.8  # Load average per core
+    ADMISSION_REJECT_CPU: float = 1.5
+    ADMISSION_DEGRADE_QUEUE: float = 1.0  # Detection calls in flight per worker
+    ADMISSION_REJECT_QUEUE: float = 3.0
+    ADMISSION_RETRY_AFTER: int = 30  # Seconds
+    ADMISSION_GRANT_SECONDS: float = 60.0  # How long a /start decision waits for the WebSocket
+    FACE_MESH_REQUIRES_FACE: bool = True  # Skip face mesh when no face was found
+
+    # Motion gating: skip frames nearly identical to the last analysed one
+    MOTION_GATING: bool = True
+    MOTION_THRESHOLD: float = 3.0  # Mean grey-level difference on a 32x24 thumbnail
+    MOTION_MAX_SKIP_SECONDS: float = 2.0  # Always analyse at least this often
+
+    # Longest side each detector analyses at (YOLO: square input, multiple of 32)
+    DETECTOR_RESOLUTIONS: Dict[str, int] = {"face": 320, "hands": 480, "face_mesh": 480, "yolo": 416}
+    INFERENCE_AUTOTUNE: bool = False  # Pick resolutions at startup to fit the budget
+    INFERENCE_AUTOTUNE_CANDIDATES: List[int] = [640, 512, 416, 320, 256]
+    FRAME_LATENCY_BUDGET_MS: float = 80.0  # Per-frame CPU budget across all detectors
+
+    # Ingest: decode JPEGs at 1/2, 1/4 or 1/8 scale when detectors don't need full size
+    REDUCED_DECODE: bool = True
+    MAX_DECODE_PIXELS: int = 1920 * 1080  # Larger images are decoded reduced or rejected
+
+    # YOLO inference backend: "torch", "onnx", "onnx-int8" or "openvino" (int8)
+    YOLO_BACKEND: str = "torch"
+    YOLO_EXPORT_DIR: str = "model_cache"  # Exported models are cached here
+
+    # YOLO micro-batching across sessions (thread executor only)
+    YOLO_BATCHING: bool = True
+    YOLO_MAX_BATCH: int = 8  # Capped at DETECTION_WORKERS
+    YOLO_MAX_WAIT_MS: float = 15.0
+
     class Config:
         env_file = ".env"
         case_sensitive = True
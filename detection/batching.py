@@ -0,0 +1,73 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+class MicroBatcher:
+    """Collects frames from concurrent sessions and runs them as one batched predict"""
+
+    def __init__(self, predict: Callable[[List], List], max_batch: int, max_wait_ms: float, max_callers: int):
+        self.predict = predict  # List of images -> list of results in the same order
+        # Callers block until their result arrives, so a batch can never hold
+        # more frames than there are threads able to submit concurrently
+        self.max_batch = max(1, min(max_batch, max_callers))
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, image) -> Future:
+        """Queue an image for the next batch; the future resolves to its Results"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            images = [image for image, _ in batch]
+            try:
+                results = self.predict(images)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,202 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict
+import mediapipe as mp
+import numpy as np
+from utils.logger import logger
+from config.settings import settings
+
+mp_face_detection = mp.solutions.face_detection
+mp_hands = mp.solutions.hands
+mp_face_mesh = mp.solutions.face_mesh
+
+def create_face_detection():
+    return mp_face_detection.FaceDetection(
+        min_detection_confidence=0.5,
+        model_selection=0  # Use short-range model
+    )
+
+def create_hands(static_image_mode: bool = True):
+    return mp_hands.Hands(
+        static_image_mode=static_image_mode,  # False tracks landmarks between frames
+        max_num_hands=2,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+def create_face_mesh(static_image_mode: bool = True):
+    return mp_face_mesh.FaceMesh(
+        static_image_mode=static_image_mode,  # False tracks landmarks between frames
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+DETECTOR_FACTORIES: Dict[str, Callable] = {
+    "face": create_face_detection,
+    "hands": create_hands,
+    "face_mesh": create_face_mesh,
+}
+
+class DetectorPoolClosed(Exception):
+    pass
+
+class _PooledDetector:
+    """Detector instance together with its health bookkeeping"""
+
+    def __init__(self, kind: str, instance):
+        self.kind = kind
+        self.instance = instance
+        self.uses = 0
+        self.failures = 0
+        self.failed = False  # Set when the current checkout raised
+
+    def close(self):
+        try:
+            self.instance.close()
+        except Exception as e:
+            logger.error(f"Error closing {self.kind} detector: {str(e)}")
+
+class DetectorPool:
+    """Bounded pool of long-lived MediaPipe graphs, one checked out per caller"""
+
+    def __init__(self, max_size: int, acquire_timeout: float, max_failures: int):
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_failures = max_failures
+        self._idle: Dict[str, queue.LifoQueue] = {kind: queue.LifoQueue() for kind in DETECTOR_FACTORIES}
+        self._created: Dict[str, int] = {kind: 0 for kind in DETECTOR_FACTORIES}
+        self._checked_out: Dict[int, _PooledDetector] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._health_stop = threading.Event()
+        self._health_thread = None
+
+    def _acquire(self, kind: str) -> _PooledDetector:
+        if self._closed:
+            raise DetectorPoolClosed("Detector pool is shut down")
+
+        idle = self._idle[kind]
+        try:
+            return idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created[kind] < self.max_size
+            if can_create:
+                self._created[kind] += 1
+
+        if can_create:
+            try:
+                logger.info(f"Creating pooled {kind} detector ({self._created[kind]}/{self.max_size})")
+                return _PooledDetector(kind, DETECTOR_FACTORIES[kind]())
+            except Exception:
+                with self._lock:
+                    self._created[kind] -= 1
+                raise
+
+        # Pool exhausted, wait for another caller to return an instance
+        try:
+            return idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Timed out waiting for a {kind} detector")
+
+    def _discard(self, pooled: _PooledDetector):
+        pooled.close()
+        with self._lock:
+            self._created[pooled.kind] -= 1
+
+    def _release(self, pooled: _PooledDetector, healthy: bool):
+        pooled.uses += 1
+        if not healthy or pooled.failed:
+            pooled.failures += 1
+        pooled.failed = False
+
+        if self._closed:
+            self._discard(pooled)
+        elif pooled.failures >= self.max_failures:
+            logger.warning(f"Discarding unhealthy {pooled.kind} detector after {pooled.failures} failures")
+            self._discard(pooled)
+        else:
+            self._idle[pooled.kind].put(pooled)
+
+    @contextmanager
+    def checkout(self, kind: str):
+        """Borrow a detector instance for the duration of the block"""
+        pooled = self._acquire(kind)
+        self._checked_out[id(pooled.instance)] = pooled
+        healthy = True
+        try:
+            yield pooled.instance
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self._checked_out.pop(id(pooled.instance), None)
+            self._release(pooled, healthy)
+
+    def mark_failed(self, instance):
+        """Record a failure on a checked-out instance whose error the caller handled"""
+        pooled = self._checked_out.get(id(instance))
+        if pooled is not None:
+            pooled.failed = True
+
+    def check_health(self) -> int:
+        """Probe idle instances with a blank frame and discard broken ones"""
+        probe = np.zeros((64, 64, 3), dtype=np.uint8)
+        discarded = 0
+        for kind, idle in self._idle.items():
+            checked = []
+            while True:
+                try:
+                    checked.append(idle.get_nowait())
+                except queue.Empty:
+                    break
+            for pooled in checked:
+                try:
+                    pooled.instance.process(probe)
+                    self._release(pooled, healthy=True)
+                except Exception as e:
+                    logger.warning(f"Pooled {kind} detector failed health check: {str(e)}")
+                    self._discard(pooled)
+                    discarded += 1
+        return discarded
+
+    def _health_loop(self, interval: float):
+        while not self._health_stop.wait(interval):
+            try:
+                discarded = self.check_health()
+                if discarded:
+                    logger.warning(f"Discarded {discarded} unhealthy pooled detectors")
+            except Exception as e:
+                logger.error(f"Detector health check failed: {str(e)}")
+
+    def start_health_checks(self, interval: float):
+        """Probe idle instances every interval seconds from a background thread"""
+        if self._health_thread is None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(interval,), name="detector-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def shutdown(self):
+        """Close all idle instances; checked-out ones are closed when returned"""
+        self._closed = True
+        self._health_stop.set()
+        for kind, idle in self._idle.items():
+            while True:
+                try:
+                    self._discard(idle.get_nowait())
+                except queue.Empty:
+                    break
+        logger.info("Detector pool shut down")
+
+detector_pool = DetectorPool(
+    # At least one instance per detection worker so workers never wait on each other
+    max_size=max(settings.DETECTOR_POOL_SIZE, settings.DETECTION_WORKERS),
+    acquire_timeout=settings.DETECTOR_POOL_TIMEOUT,
+    max_failures=settings.DETECTOR_POOL_MAX_FAILURES
+)
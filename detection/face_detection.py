@@ -1,44 +1,41 @@
-import cv2
-import mediapipe as mp
 from datetime import datetime
 from utils.logger import logger
+from detection.detector_pool import detector_pool
+from detection.frame_context import FrameContext
+from detection.resolution import resolution_for
 
-mp_face_detection = mp.solutions.face_detection
+def _run_face_detection(face_detection, ctx: FrameContext, timestamp):
+    logs = []
+    face_results = face_detection.process(ctx.rgb_at(resolution_for("face")))
+
+    if not face_results.detections:
+        event = "Face not detected"
+        logger.info(event)
+        logs.append({"time": timestamp, "event": event})
+    else:
+        for detection in face_results.detections:
+            bbox = detection.location_data.relative_bounding_box
+            event = "Unusual face movement detected" if bbox.width > 0.5 else "Face detected"
+            logger.info(f"{event} with confidence {detection.score[0]:.2f}")
+            logs.append({"time": timestamp, "event": event, "confidence": float(detection.score[0])})
+
+    return logs
 
-def detect_face(frame):
+def detect_face(ctx: FrameContext, face_detection=None):
     logger.info("Starting face detection")
-    logs = []
     timestamp = str(datetime.now())
+    ctx = FrameContext.ensure(ctx)  # Raw ndarrays are still accepted
     
     try:
-        # Initialize face detection with CPU
-        face_detection = mp_face_detection.FaceDetection(
-            min_detection_confidence=0.5,
-            model_selection=0  # Use short-range model
-        )
-        
-        # Process frame
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_results = face_detection.process(frame_rgb)
-        
-        if not face_results.detections:
-            event = "Face not detected"
-            logger.info(event)
-            logs.append({"time": timestamp, "event": event})
-        else:
-            for detection in face_results.detections:
-                bbox = detection.location_data.relative_bounding_box
-                event = "Unusual face movement detected" if bbox.width > 0.5 else "Face detected"
-                logger.info(f"{event} with confidence {detection.score[0]:.2f}")
-                logs.append({"time": timestamp, "event": event})
+        # Reuse the caller's instance, otherwise borrow one from the pool
+        if face_detection is not None:
+            return _run_face_detection(face_detection, ctx, timestamp)
+        with detector_pool.checkout("face") as pooled_detection:
+            return _run_face_detection(pooled_detection, ctx, timestamp)
 
     except Exception as e:
+        if face_detection is not None:
+            detector_pool.mark_failed(face_detection)
         logger.error(f"Face detection error: {str(e)}", exc_info=True)
         # Return empty logs on error to continue processing
         return []
-    finally:
-        # Cleanup
-        if 'face_detection' in locals():
-            face_detection.close()
-    
-    return logs
@@ -1,54 +1,51 @@
-import cv2
-import mediapipe as mp
 from datetime import datetime
 from utils.logger import logger
-
-mp_face_mesh = mp.solutions.face_mesh
+from detection.detector_pool import detector_pool
+from detection.frame_context import FrameContext
+from detection.resolution import resolution_for
 
 # Define landmark indices
 LEFT_EYE_INDICES = [33]  # Simplified to single point for example
 RIGHT_EYE_INDICES = [263]  # Simplified to single point for example
 MOUTH_INDICES = [0]  # Simplified to single point for example
 
-def detect_face_mesh(frame):
+def _run_face_mesh(face_mesh, ctx: FrameContext, timestamp):
     logs = []
+    face_mesh_results = face_mesh.process(ctx.rgb_at(resolution_for("face_mesh")))
+
+    if face_mesh_results.multi_face_landmarks:
+        for face_landmarks in face_mesh_results.multi_face_landmarks:
+            try:
+                # Get specific landmarks
+                left_eye = face_landmarks.landmark[LEFT_EYE_INDICES[0]]
+                right_eye = face_landmarks.landmark[RIGHT_EYE_INDICES[0]]
+                mouth = face_landmarks.landmark[MOUTH_INDICES[0]]
+                
+                logger.debug(f"Left eye: {left_eye}, Right eye: {right_eye}, Mouth: {mouth}")
+                
+                if left_eye.y < 0.3 or right_eye.y < 0.3:
+                    logs.append({"time": timestamp, "event": "Eye movement detected"})
+                if mouth.y > 0.7:
+                    logs.append({"time": timestamp, "event": "Mouth movement detected"})
+            except IndexError as e:
+                logger.warning(f"Error accessing landmarks: {e}")
+                continue
+
+    return logs
+
+def detect_face_mesh(ctx: FrameContext, face_mesh=None):
     timestamp = str(datetime.now())
+    ctx = FrameContext.ensure(ctx)  # Raw ndarrays are still accepted
     
     try:
-        face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=True,  # Force CPU mode
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_mesh_results = face_mesh.process(frame_rgb)
-        
-        if face_mesh_results.multi_face_landmarks:
-            for face_landmarks in face_mesh_results.multi_face_landmarks:
-                try:
-                    # Get specific landmarks
-                    left_eye = face_landmarks.landmark[LEFT_EYE_INDICES[0]]
-                    right_eye = face_landmarks.landmark[RIGHT_EYE_INDICES[0]]
-                    mouth = face_landmarks.landmark[MOUTH_INDICES[0]]
-                    
-                    print(f"Left eye: {left_eye}, Right eye: {right_eye}, Mouth: {mouth}")
-                    
-                    if left_eye.y < 0.3 or right_eye.y < 0.3:
-                        logs.append({"time": timestamp, "event": "Eye movement detected"})
-                    if mouth.y > 0.7:
-                        logs.append({"time": timestamp, "event": "Mouth movement detected"})
-                except IndexError as e:
-                    print(f"Error accessing landmarks: {e}")
-                    continue
+        # Reuse the caller's instance, otherwise borrow one from the pool
+        if face_mesh is not None:
+            return _run_face_mesh(face_mesh, ctx, timestamp)
+        with detector_pool.checkout("face_mesh") as pooled_mesh:
+            return _run_face_mesh(pooled_mesh, ctx, timestamp)
         
     except Exception as e:
+        if face_mesh is not None:
+            detector_pool.mark_failed(face_mesh)
         logger.error(f"Face mesh detection error: {str(e)}", exc_info=True)
         return []
-    finally:
-        if 'face_mesh' in locals():
-            face_mesh.close()
-            
-    return logs
@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+from typing import Dict, Optional
+
+class FrameContext:
+    """Per-frame preprocessing shared by all detectors, computed lazily"""
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self.height, self.width = frame.shape[:2]
+        self._rgb: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._pyramid: Dict[int, np.ndarray] = {0: frame}
+        self._resized: Dict[int, np.ndarray] = {}
+        self._rgb_resized: Dict[int, np.ndarray] = {}
+        self._letterboxed: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def ensure(cls, frame) -> "FrameContext":
+        """Wrap a raw ndarray, or pass an existing context through"""
+        return frame if isinstance(frame, cls) else cls(frame)
+
+    @property
+    def bgr(self) -> np.ndarray:
+        return self.frame
+
+    @property
+    def rgb(self) -> np.ndarray:
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+            # Read-only lets MediaPipe take the buffer by reference
+            self._rgb.flags.writeable = False
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def level(self, n: int) -> np.ndarray:
+        """BGR pyramid level n, each level half the size of the previous one"""
+        if n not in self._pyramid:
+            self._pyramid[n] = cv2.pyrDown(self.level(n - 1))
+        return self._pyramid[n]
+
+    def resized(self, max_side: int) -> np.ndarray:
+        """BGR frame downscaled so its longest side is at most max_side"""
+        longest = max(self.height, self.width)
+        if max_side >= longest:
+            return self.frame
+        if max_side not in self._resized:
+            # Start from the smallest pyramid level still larger than the target
+            n = 0
+            while longest >> (n + 1) >= max_side:
+                n += 1
+            source = self.level(n)
+            scale = max_side / longest
+            size = (max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+            if (source.shape[1], source.shape[0]) == size:
+                self._resized[max_side] = source
+            else:
+                self._resized[max_side] = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        return self._resized[max_side]
+
+    def rgb_at(self, max_side: int) -> np.ndarray:
+        """Read-only RGB frame downscaled so its longest side is at most max_side"""
+        if max_side >= max(self.height, self.width):
+            return self.rgb
+        if max_side not in self._rgb_resized:
+            rgb = cv2.cvtColor(self.resized(max_side), cv2.COLOR_BGR2RGB)
+            rgb.flags.writeable = False
+            self._rgb_resized[max_side] = rgb
+        return self._rgb_resized[max_side]
+
+    def letterbox(self, size: int, pad_value: int = 114) -> np.ndarray:
+        """BGR frame scaled to fit a size x size square and centred on padding"""
+        if size not in self._letterboxed:
+            scale = size / max(self.height, self.width)
+            if scale >= 1:
+                image = self.frame
+            else:
+                image = self.resized(size)
+            h, w = image.shape[:2]
+            top, left = (size - h) // 2, (size - w) // 2
+            boxed = np.full((size, size, 3), pad_value, dtype=np.uint8)
+            boxed[top:top + h, left:left + w] = image
+            self._letterboxed[size] = boxed
+        return self._letterboxed[size]
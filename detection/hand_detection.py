@@ -1,34 +1,32 @@
-import cv2
-import mediapipe as mp
 from datetime import datetime
 from utils.logger import logger
+from detection.detector_pool import detector_pool
+from detection.frame_context import FrameContext
+from detection.resolution import resolution_for
 
-mp_hands = mp.solutions.hands
-
-def detect_hands(frame):
+def _run_hand_detection(hands_detection, ctx: FrameContext, timestamp):
     logs = []
+    hand_results = hands_detection.process(ctx.rgb_at(resolution_for("hands")))
+
+    if hand_results.multi_hand_landmarks:
+        logs.append({"time": timestamp, "event": "Hand detected"})
+        logger.info("Hand detected")
+
+    return logs
+
+def detect_hands(ctx: FrameContext, hands_detection=None):
     timestamp = str(datetime.now())
+    ctx = FrameContext.ensure(ctx)  # Raw ndarrays are still accepted
     
     try:
-        hands_detection = mp_hands.Hands(
-            static_image_mode=True,  # Force CPU mode
-            max_num_hands=2,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hand_results = hands_detection.process(frame_rgb)
-        
-        if hand_results.multi_hand_landmarks:
-            logs.append({"time": timestamp, "event": "Hand detected"})
-            logger.info("Hand detected")
+        # Reuse the caller's instance, otherwise borrow one from the pool
+        if hands_detection is not None:
+            return _run_hand_detection(hands_detection, ctx, timestamp)
+        with detector_pool.checkout("hands") as pooled_detection:
+            return _run_hand_detection(pooled_detection, ctx, timestamp)
             
     except Exception as e:
+        if hands_detection is not None:
+            detector_pool.mark_failed(hands_detection)
         logger.error(f"Hand detection error: {str(e)}", exc_info=True)
         return []
-    finally:
-        if 'hands_detection' in locals():
-            hands_detection.close()
-            
-    return logs
@@ -0,0 +1,80 @@
+import time
+from typing import Dict, List
+import numpy as np
+from utils.logger import logger
+from config.settings import settings
+
+# Longest side (YOLO: square input size) each detector analyses frames at
+inference_resolutions: Dict[str, int] = dict(settings.DETECTOR_RESOLUTIONS)
+
+def resolution_for(name: str) -> int:
+    return inference_resolutions.get(name, 640)
+
+def apply_resolutions(resolutions: Dict[str, int]):
+    inference_resolutions.update(resolutions)
+
+def fit_budget(costs: Dict[str, Dict[int, float]], budget_ms: float) -> Dict[str, int]:
+    """Largest resolutions whose summed latency fits the budget.
+
+    costs maps detector -> {resolution: ms}. Starting from the largest
+    resolution everywhere, the currently most expensive detector is stepped
+    down until the total fits or nothing can shrink further.
+    """
+    options = {name: sorted(by_size, reverse=True) for name, by_size in costs.items()}
+    chosen = {name: sizes[0] for name, sizes in options.items()}
+
+    def total():
+        return sum(costs[name][size] for name, size in chosen.items())
+
+    while total() > budget_ms:
+        shrinkable = [name for name in chosen if options[name].index(chosen[name]) + 1 < len(options[name])]
+        if not shrinkable:
+            break
+        name = max(shrinkable, key=lambda n: costs[n][chosen[n]])
+        chosen[name] = options[name][options[name].index(chosen[name]) + 1]
+    return chosen
+
+def _measure(run, frames: List[np.ndarray]) -> float:
+    run(frames[0])  # Warm-up, excluded from timing
+    timings = []
+    for frame in frames[1:]:
+        start = time.perf_counter()
+        run(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def autotune(budget_ms: float, candidates: List[int], samples: int = 6) -> Dict[str, int]:
+    """Time every detector at each candidate resolution on synthetic frames and fit the budget"""
+    from detection.frame_context import FrameContext
+    from detection.detector_pool import detector_pool
+    from detection.face_detection import detect_face
+    from detection.hand_detection import detect_hands
+    from detection.face_mesh_detection import detect_face_mesh
+    from detection.yolo_detection import detect_yolo
+
+    def _with_pooled(kind, detect, ctx):
+        with detector_pool.checkout(kind) as instance:
+            return detect(ctx, instance)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(samples)]
+    detectors = {
+        "face": lambda ctx: _with_pooled("face", detect_face, ctx),
+        "hands": lambda ctx: _with_pooled("hands", detect_hands, ctx),
+        "face_mesh": lambda ctx: _with_pooled("face_mesh", detect_face_mesh, ctx),
+        "yolo": detect_yolo,
+    }
+
+    original = dict(inference_resolutions)
+    costs: Dict[str, Dict[int, float]] = {name: {} for name in detectors}
+    try:
+        for size in candidates:
+            apply_resolutions({name: size for name in detectors})
+            for name, run in detectors.items():
+                costs[name][size] = _measure(lambda frame: run(FrameContext(frame)), frames)
+    finally:
+        apply_resolutions(original)
+
+    chosen = fit_budget(costs, budget_ms)
+    logger.info(f"Autotuned inference resolutions {chosen} for a {budget_ms} ms budget (costs: {costs})")
+    return chosen
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Hashable
+from utils.logger import logger
+from config.settings import settings
+from detection.detector_pool import create_hands, create_face_mesh
+
+# Detectors that benefit from video mode, where landmarks are tracked between frames
+TRACKER_FACTORIES = {
+    "hands": lambda: create_hands(static_image_mode=False),
+    "face_mesh": lambda: create_face_mesh(static_image_mode=False),
+}
+
+class _SessionTrackers:
+    def __init__(self):
+        self.instances: Dict[str, object] = {}
+        self.in_use = 0
+        self.closed = False
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.closed = True
+        for kind, instance in self.instances.items():
+            try:
+                instance.close()
+            except Exception as e:
+                logger.error(f"Error closing {kind} tracker: {str(e)}")
+        self.instances.clear()
+
+class TrackerRegistry:
+    """Video-mode MediaPipe graphs owned by one session, bounded by an LRU limit"""
+
+    def __init__(self, max_sessions: int, idle_seconds: float):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+        self._sessions: "OrderedDict[Hashable, _SessionTrackers]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        """Close idle and least recently used sessions; callers hold the lock"""
+        for session_id in list(self._sessions):
+            trackers = self._sessions[session_id]
+            over_limit = len(self._sessions) > self.max_sessions
+            idle = now - trackers.last_used > self.idle_seconds
+            if trackers.in_use or not (over_limit or idle):
+                continue
+            self._sessions.pop(session_id)
+            trackers.close()
+            logger.debug(f"Evicted trackers for session {session_id}")
+
+    @contextmanager
+    def checkout(self, session_id: Hashable, kind: str):
+        """Borrow a session's tracker; frames of one session must not overlap"""
+        now = time.monotonic()
+        with self._lock:
+            trackers = self._sessions.get(session_id)
+            if trackers is None:
+                trackers = self._sessions[session_id] = _SessionTrackers()
+            self._sessions.move_to_end(session_id)
+            trackers.in_use += 1
+            trackers.last_used = now
+            self._evict(now)
+
+        try:
+            if kind not in trackers.instances:
+                logger.info(f"Creating {kind} tracker for session {session_id}")
+                trackers.instances[kind] = TRACKER_FACTORIES[kind]()
+            yield trackers.instances[kind]
+        finally:
+            with self._lock:
+                trackers.in_use -= 1
+                if self._sessions.get(session_id) is not trackers and not trackers.in_use and not trackers.closed:
+                    # Released while the frame was in flight
+                    trackers.close()
+
+    def release(self, session_id: Hashable):
+        """Close a session's trackers, deferred if a frame is still using them"""
+        with self._lock:
+            trackers = self._sessions.pop(session_id, None)
+            if trackers is not None and not trackers.in_use:
+                trackers.close()
+
+    def shutdown(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, OrderedDict()
+        for trackers in sessions.values():
+            if not trackers.in_use:
+                trackers.close()
+
+tracker_registry = TrackerRegistry(
+    max_sessions=settings.MAX_LIVE_TRACKERS,
+    idle_seconds=settings.TRACKER_IDLE_SECONDS
+)
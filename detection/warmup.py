@@ -0,0 +1,85 @@
+import time
+from contextlib import ExitStack
+from typing import Dict, Iterable, Tuple
+import cv2
+import numpy as np
+from utils.logger import logger
+from config.settings import settings
+from detection.detector_pool import detector_pool
+from detection.trackers import TRACKER_FACTORIES
+from detection.frame_context import FrameContext
+from detection.face_detection import detect_face
+from detection.hand_detection import detect_hands
+from detection.face_mesh_detection import detect_face_mesh
+
+DETECTORS = {"face": detect_face, "hands": detect_hands, "face_mesh": detect_face_mesh}
+
+def pooled_kinds() -> Tuple[str, ...]:
+    """Detectors served from the static-mode pool; with tracking on, landmarks use trackers"""
+    if settings.MEDIAPIPE_TRACKING:
+        return ("face",)
+    return tuple(DETECTORS)
+
+def warm_up_trackers(contexts, rounds: int) -> Dict[str, float]:
+    """Create and run one video-mode tracker per kind, then close it.
+
+    Session trackers are created on demand, so nothing is kept; this loads the
+    graphs and their model files once before the first session needs them.
+    """
+    timings = {}
+    for kind, factory in TRACKER_FACTORIES.items():
+        started = time.perf_counter()
+        tracker = factory()
+        try:
+            for _ in range(rounds):
+                for ctx in contexts:
+                    DETECTORS[kind](ctx, tracker)
+        finally:
+            tracker.close()
+        timings[f"{kind}_tracker"] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+def synthetic_frame(max_side: int) -> np.ndarray:
+    """4:3 webcam-like frame with a face-sized blob, longest side max_side"""
+    width, height = max_side, max_side * 3 // 4
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    cv2.ellipse(frame, (width // 2, height // 2), (width // 9, height // 5), 0, 0, 360, (140, 170, 210), -1)
+    return frame
+
+def warm_up(instances: int, frame_sizes: Iterable[int], rounds: int = 2) -> Dict[str, float]:
+    """Create and exercise the detectors frames will use on synthetic frames.
+
+    instances graphs of each pooled MediaPipe detector are checked out together
+    so the pool holds that many warmed instances afterwards; with tracking on,
+    hands and face mesh are warmed as trackers instead. Every detector runs
+    on a frame of each client size, hitting its configured inference
+    resolution through the same resize path as real frames. Returns the
+    warm-up time per detector in ms.
+    """
+    # Imported here so the warm-up plan can be loaded without torch
+    from detection.yolo_detection import detect_yolo, load_model
+
+    contexts = [FrameContext(synthetic_frame(size)) for size in sorted(set(frame_sizes))]
+    timings = {}
+    for kind in pooled_kinds():
+        detect = DETECTORS[kind]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            graphs = [stack.enter_context(detector_pool.checkout(kind)) for _ in range(instances)]
+            for _ in range(rounds):
+                for graph in graphs:
+                    for ctx in contexts:
+                        detect(ctx, graph)
+        timings[kind] = round((time.perf_counter() - started) * 1000, 1)
+    if settings.MEDIAPIPE_TRACKING:
+        timings.update(warm_up_trackers(contexts, rounds))
+
+    started = time.perf_counter()
+    if load_model() is not None:
+        for _ in range(rounds):
+            for ctx in contexts:
+                detect_yolo(ctx)
+    timings["yolo"] = round((time.perf_counter() - started) * 1000, 1)
+
+    logger.info(f"Detector warm-up finished ({instances} instances): {timings}")
+    return timings
@@ -0,0 +1,116 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+import cv2
+from ultralytics import YOLO
+from utils.logger import logger
+from config.settings import settings
+from detection.yolo_detection import load_torch_model, _results_to_logs, YOLO_IMGSZ
+from detection.frame_context import FrameContext
+from detection.resolution import resolution_for
+
+BACKENDS = ("onnx", "onnx-int8", "openvino")
+
+def cache_path(backend: str) -> str:
+    names = {
+        "onnx": "yolov8n.onnx",
+        "onnx-int8": "yolov8n-int8.onnx",
+        "openvino": "yolov8n_int8_openvino_model",
+    }
+    return os.path.join(settings.YOLO_EXPORT_DIR, names[backend])
+
+def _export_onnx(torch_model, target: str):
+    # Dynamic axes keep batched predicts working
+    exported = torch_model.export(format="onnx", imgsz=YOLO_IMGSZ, dynamic=True, simplify=True)
+    shutil.move(exported, target)
+
+def _quantize_onnx(source: str, target: str):
+    """Dynamic int8 weight quantization, keeping the class names ultralytics reads from metadata"""
+    import onnx
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+    quantized = onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(onnx.load(source).metadata_props)
+    onnx.save(quantized, target)
+
+def _export_openvino(torch_model, target: str):
+    exported = torch_model.export(format="openvino", imgsz=YOLO_IMGSZ, dynamic=True, int8=True)
+    shutil.move(exported, target)
+
+def ensure_exported(backend: str) -> str:
+    """Export the torch model for a backend once and return the cached artifact"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown YOLO backend: {backend}")
+
+    target = cache_path(backend)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(settings.YOLO_EXPORT_DIR, exist_ok=True)
+    logger.info(f"Exporting YOLO model for {backend} backend to {target}")
+    if backend == "onnx-int8":
+        _quantize_onnx(ensure_exported("onnx"), target)
+    elif backend == "onnx":
+        _export_onnx(load_torch_model(), target)
+    else:
+        _export_openvino(load_torch_model(), target)
+    return target
+
+def load_backend_model(backend: str):
+    """Ultralytics model running on onnxruntime or OpenVINO instead of torch"""
+    return YOLO(ensure_exported(backend), task="detect")
+
+def _decisions(yolo_model, frame) -> list:
+    imgsz = resolution_for("yolo")
+    image = FrameContext(frame).letterbox(imgsz)
+    results = yolo_model.predict(image, imgsz=imgsz, conf=0.4, verbose=False)[0]
+    return sorted(log["event"] for log in _results_to_logs(results, ""))
+
+def load_frames(frames_dir: str) -> list:
+    frames = []
+    for path in sorted(glob.glob(os.path.join(frames_dir, "*"))):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+def check_parity(backend: str, frames: list) -> dict:
+    """Compare phone/person decisions of a backend against the torch path"""
+    reference = load_torch_model()
+    candidate = load_backend_model(backend)
+    mismatches = []
+    for index, frame in enumerate(frames):
+        expected = _decisions(reference, frame)
+        actual = _decisions(candidate, frame)
+        if expected != actual:
+            mismatches.append({"frame": index, "torch": expected, backend: actual})
+    return {
+        "backend": backend,
+        "frames": len(frames),
+        "mismatches": mismatches,
+        "checked_at": str(datetime.now()),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export YOLO inference backends and check decision parity")
+    parser.add_argument("--backend", choices=BACKENDS, default=settings.YOLO_BACKEND if settings.YOLO_BACKEND in BACKENDS else "onnx")
+    # Real webcam frames with people and phones; random noise has no detections to compare
+    parser.add_argument("--frames", required=True, help="Directory of images to compare on")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames)
+    if not frames:
+        parser.error(f"No readable images in {args.frames}")
+    ensure_exported(args.backend)
+    report = check_parity(args.backend, frames)
+    print(json.dumps(report, indent=2))
+    return 1 if report["mismatches"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
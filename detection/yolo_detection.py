@@ -1,10 +1,14 @@
-import cv2
 import torch
 import os
+import threading
 from datetime import datetime
 import logging
 from ultralytics import YOLO
 from utils.logger import logger
+from detection.frame_context import FrameContext
+from detection.resolution import resolution_for
+from detection.batching import MicroBatcher
+from config.settings import settings
 
 # Setup logging with more details
 logging.basicConfig(
@@ -14,24 +18,56 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 model = None
+# Ultralytics predictors are not thread-safe, loading and predicting are serialised
+_model_lock = threading.Lock()
+_predict_lock = threading.Lock()
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "yolov8n.pt")
+YOLO_IMGSZ = 640  # Export input size; inference size comes from resolution_for("yolo")
 
 def load_model():
+    global model
+    with _model_lock:
+        return _load_model()
+
+def get_model():
+    """Loaded model, loading it once on first use"""
+    if model is None:
+        with _model_lock:
+            if model is None:
+                _load_model()
+    return model
+
+def load_torch_model():
+    """PyTorch YOLOv8n, downloaded and saved on first use"""
+    if os.path.exists(MODEL_PATH):
+        logger.info(f"Loading model from {MODEL_PATH}")
+        torch_model = YOLO(MODEL_PATH)
+    else:
+        logger.info("Downloading YOLOv8n model...")
+        torch_model = YOLO('yolov8n')
+        # Save model for future use
+        torch_model.save(MODEL_PATH)
+    
+    torch_model.to(device)
+    return torch_model
+
+def _load_model():
     global model
     try:
-        logger.info("Loading YOLOv8 model...")
-        
-        if os.path.exists(MODEL_PATH):
-            logger.info(f"Loading model from {MODEL_PATH}")
-            model = YOLO(MODEL_PATH)
-        else:
-            logger.info("Downloading YOLOv8n model...")
-            model = YOLO('yolov8n')
-            # Save model for future use
-            model.save(MODEL_PATH)
-        
-        model.to(device)
+        logger.info(f"Loading YOLOv8 model ({settings.YOLO_BACKEND} backend)...")
+
+        if settings.YOLO_BACKEND != "torch":
+            from detection.yolo_backends import load_backend_model
+            try:
+                model = load_backend_model(settings.YOLO_BACKEND)
+                logger.info(f"Model loaded successfully with {settings.YOLO_BACKEND} backend")
+                return model
+            except Exception as e:
+                logger.error(f"{settings.YOLO_BACKEND} backend unavailable, falling back to torch: {str(e)}",
+                             exc_info=True)
+
+        model = load_torch_model()
         logger.info(f"Model loaded successfully on {device}")
         return model
         
@@ -39,36 +75,64 @@ def load_model():
         logger.error(f"Error loading model: {str(e)}", exc_info=True)
         return None
 
-def detect_yolo(frame):
-    global model
+def _results_to_logs(results, timestamp):
     logs = []
+    if results.boxes:
+        for box in results.boxes:
+            cls = int(box.cls[0])
+            conf = float(box.conf[0])
+            name = results.names[cls]
+            
+            logger.info(f"Detection: {name} ({conf:.2f})")
+            
+            if conf > 0.4:
+                if name == "cell phone":
+                    logs.append({"time": timestamp, "event": "Phone detected", "confidence": conf})
+                elif name == "person" and len(results.boxes) > 1:
+                    logs.append({"time": timestamp, "event": "Background person detected", "confidence": conf})
+    return logs
+
+def _predict_batch(images):
+    with _predict_lock:
+        # Frames are letterboxed squares of the same size
+        return model.predict(images, imgsz=images[0].shape[0], conf=0.4, verbose=False)
+
+yolo_batcher = MicroBatcher(
+    predict=_predict_batch,
+    max_batch=settings.YOLO_MAX_BATCH,
+    max_wait_ms=settings.YOLO_MAX_WAIT_MS,
+    max_callers=settings.DETECTION_WORKERS
+)
+
+# Process workers are single-threaded, a batch there would always be one frame
+# that waited out the deadline for nothing
+BATCHING_ENABLED = (
+    settings.YOLO_BATCHING
+    and settings.DETECTION_EXECUTOR == "thread"
+    and yolo_batcher.max_batch > 1
+)
+
+def detect_yolo(ctx: FrameContext):
     timestamp = str(datetime.now())
+    ctx = FrameContext.ensure(ctx)  # Raw ndarrays are still accepted
 
     try:
-        if model is None:
-            model = load_model()
-            if model is None:
-                logger.error("YOLO model not loaded")
-                return []
+        if get_model() is None:
+            logger.error("YOLO model not loaded")
+            return []
 
-        # Process frame
-        results = model.predict(frame, conf=0.4)[0]
+        # Process frame, letterboxed to the model input so ultralytics skips its own resize
+        imgsz = resolution_for("yolo")
+        image = ctx.letterbox(imgsz)
+        if BATCHING_ENABLED:
+            results = yolo_batcher.submit(image).result()
+        else:
+            with _predict_lock:
+                results = model.predict(image, imgsz=imgsz, conf=0.4)[0]
         
-        if results.boxes:
-            for box in results.boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                name = model.names[cls]
-                
-                logger.info(f"Detection: {name} ({conf:.2f})")
-                
-                if conf > 0.4:
-                    if name == "cell phone":
-                        logs.append({"time": timestamp, "event": "Phone detected"})
-                    elif name == "person" and len(results.boxes) > 1:
-                        logs.append({"time": timestamp, "event": "Background person detected"})
+        return _results_to_logs(results, timestamp)
                     
     except Exception as e:
         logger.error(f"YOLO detection error: {str(e)}")
         
-    return logs
\ No newline at end of file
+    return []
@@ -7,7 +7,7 @@ from jose import JWTError, jwt
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from schemas.responses import ErrorResponse
-from routers import auth, exam  # Add exam router import
+from routers import auth, exam, health  # Add exam router import
 import cv2
 import numpy as np
 from datetime import datetime
@@ -21,16 +21,29 @@ from models.logs import Log
 from models.users import User
 from routers.auth import SECRET_KEY, ALGORITHM
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 import asyncio
+import time
 from starlette.websockets import WebSocketState
 import base64
-from typing import Dict
+from typing import Dict, Optional
 from utils.connection import manager  # Import manager from new module
 from utils.logger import logger
 from services.detection_service import DetectionService
 from services.log_service import LogService
-from utils.image_utils import decode_image_data
+from services.exam_session_service import ExamSessionService
+from services.log_writer import log_writer
+from utils.image_utils import decode_frame_message
+from utils.frame_protocol import split_message
+from services.admission import DEGRADED
+from services.result_stream import ResultStream, negotiate_encoding, encode_message
 from utils.mediapipe_config import configure_mediapipe
+from detection.detector_pool import detector_pool
+from services.detection_executor import detection_executor
+from detection.yolo_detection import yolo_batcher
+from detection.trackers import tracker_registry
+from detection.resolution import autotune, apply_resolutions
+from config.settings import settings
 
 # Security schemes
 security = HTTPBearer()
@@ -52,12 +65,27 @@ async def get_current_user_ws(token: str, db: Session) -> User:
         raise credentials_exception
     return user
 
+def token_session(token: str) -> Optional[str]:
+    """Exam session named by a WebSocket token issued at /start, if any"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("session")
+    except JWTError:
+        return None
+
 class WebSocketException(Exception):
     def __init__(self, code: int):
         self.code = code
 
 app = FastAPI()
 
+async def warm_up_detection():
+    try:
+        health.mark_ready(await detection_executor.warm_up())
+        logger.info("Detectors warmed up, instance ready")
+    except Exception as e:
+        health.mark_failed(str(e))
+        logger.error(f"Detector warm-up failed: {str(e)}", exc_info=True)
+
 # Initialize database and models on startup
 @app.on_event("startup")
 async def startup_event():
@@ -85,11 +113,46 @@ async def startup_event():
             logger.info("YOLO model loaded successfully")
         else:
             logger.warning("YOLO model initialization failed")
+
+        # Fit inference resolutions to the per-frame budget before workers start
+        if settings.INFERENCE_AUTOTUNE:
+            apply_resolutions(await asyncio.to_thread(
+                autotune, settings.FRAME_LATENCY_BUDGET_MS, settings.INFERENCE_AUTOTUNE_CANDIDATES
+            ))
+
+        # Start the detection worker pool and warm it up in the background;
+        # the instance reports ready once that finishes
+        detection_executor.start()
+        app.state.warmup_task = asyncio.create_task(warm_up_detection())
+
+        # Detection events are written in bulk in the background
+        log_writer.start()
+
+        # Per-session detection state follows the WebSocket lifecycle
+        manager.add_lifecycle_hooks(DetectionService.start_session, DetectionService.end_session)
+        manager.add_pause_hook(DetectionService.set_paused)
+
+        # Pick up disconnects other workers forward to sessions held here
+        app.state.command_listener = asyncio.create_task(
+            manager.listen_for_commands(settings.SESSION_COMMAND_POLL_SECONDS)
+        )
         
     except Exception as e:
         logger.error(f"Startup failed: {str(e)}", exc_info=True)
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in (getattr(app.state, "command_listener", None), getattr(app.state, "warmup_task", None)):
+        if task:
+            task.cancel()
+    manager.state.close()
+    await log_writer.stop()  # Final flush
+    detection_executor.shutdown()
+    yolo_batcher.stop()
+    tracker_registry.shutdown()
+    detector_pool.shutdown()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -102,6 +165,7 @@ app.add_middleware(
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(exam.router, prefix="/api/v1/exam", tags=["exam"])  # Add exam router
+app.include_router(health.router, tags=["health"])
 
 # Add exception handlers
 @app.exception_handler(404)
@@ -115,7 +179,8 @@ async def not_found_exception_handler(request: Request, exc: HTTPException):
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)  # Keep Retry-After on 503s
     )
 
 # Add root endpoint
@@ -152,49 +217,145 @@ async def websocket_endpoint(
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
 
+        # Shed load before taking on another session
+        admission = DetectionService.admit_connection(user_id)
+        if not admission.admitted:
+            await websocket.accept()
+            await websocket.close(code=1013, reason=f"Server at capacity, retry-after={admission.retry_after}")
+            return
+
         # Connect
         if not await manager.connect(websocket, user_id):
             logger.error(f"Failed to establish WebSocket connection for user {user_id}")
             return
+        if admission.decision == DEGRADED:
+            DetectionService.degrade_session(user_id)
+
+        # Events of this connection are stored under its exam session
+        requested_session = websocket.query_params.get("session") or token_session(token)
+        exam_session = await asyncio.to_thread(
+            ExamSessionService.for_connection, db, user_id, requested_session
+        )
+        DetectionService.attach_exam_session(user_id, exam_session.id)
             
         connection_established = True
         logger.info(f"WebSocket connection established for user {user_id}")
 
-        # Main processing loop
-        try:
-            while True:
-                try:
-                    # Check connection state
-                    if websocket.application_state != WebSocketState.CONNECTED:
-                        logger.info(f"WebSocket disconnected for user {user_id}")
-                        break
+        # Receive and process concurrently so a slow detector never backs up the socket
+        session = DetectionService.get_session(user_id)
+        frames = session.queue
 
-                    # Receive data
-                    data = await websocket.receive()
-                    
-                    if data["type"] == "websocket.disconnect":
-                        logger.info(f"Client initiated disconnect for user {user_id}")
-                        break
+        # Outbound format is negotiated with query parameters
+        encoding = negotiate_encoding(websocket.query_params.get("encoding"))
+        stream_mode = websocket.query_params.get("stream", settings.RESULT_STREAM_MODE)
+        stream = ResultStream(settings.RESULT_COALESCE_SECONDS) if stream_mode == "delta" else None
+
+        async def send(message: Dict):
+            if websocket.application_state == WebSocketState.CONNECTED:
+                data = encode_message(message, encoding)
+                if isinstance(data, bytes):
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
+
+        if session.degraded:
+            await send({"type": "admission", "decision": DEGRADED})
+        if session.rate:
+            await send({"type": "control", **session.rate.targets})
+
+        async def receive_frames():
+            try:
+                while True:
+                    try:
+                        # Check connection state
+                        if websocket.application_state != WebSocketState.CONNECTED:
+                            logger.info(f"WebSocket disconnected for user {user_id}")
+                            break
+
+                        # Receive data
+                        data = await websocket.receive()
+
+                        if data["type"] == "websocket.disconnect":
+                            logger.info(f"Client initiated disconnect for user {user_id}")
+                            break
+
+                        raw_data = data.get("text") or data.get("bytes")
+                        if not raw_data:
+                            continue
+
+                        if manager.is_paused(user_id):
+                            # Acknowledge without decoding so paused sessions cost no CPU
+                            ack = {"type": "ack", "status": "paused"}
+                            header, _ = split_message(raw_data)
+                            if header is not None:
+                                ack["seq"] = header.seq
+                            await send(ack)
+                            continue
+
+                        if session.rate and not session.rate.allow():
+                            continue  # Faster than the client's target fps
 
-                    raw_data = data.get("text") or data.get("bytes")
-                    if not raw_data:
+                        # Decoding happens in the processor so dropped frames cost nothing
+                        if not await frames.put(raw_data):
+                            break
+
+                    except WebSocketDisconnect:
+                        break
+                    except Exception as e:
+                        logger.error(f"Frame receive error: {str(e)}")
+                        if "close message" in str(e) or "disconnected" in str(e).lower():
+                            break
                         continue
+            finally:
+                frames.close()
 
+        async def process_frames():
+            while True:
+                timeout = stream.wait_timeout() if stream else None
+                if timeout is None:
+                    raw_data = await frames.get()
+                else:
+                    try:
+                        raw_data = await asyncio.wait_for(frames.get(), timeout)
+                    except asyncio.TimeoutError:
+                        # No new frame, send the transitions held back by coalescing
+                        message = stream.flush()
+                        if message:
+                            await send(message)
+                        continue
+                if raw_data is None:
+                    break
+                try:
                     # Process frame
-                    frame = decode_image_data(raw_data)
+                    header, frame = decode_frame_message(raw_data)
                     if frame is None:
                         continue
 
                     # Process detections
-                    logs = await DetectionService.process_frame(frame)
-                    if logs:
-                        stored_logs = await LogService.store_logs(db, user_id, logs)
-                        if stored_logs and websocket.application_state == WebSocketState.CONNECTED:
-                            await websocket.send_text(json.dumps({
-                                "type": "logs",
-                                "data": [{"event": log.log, "time": str(log.timestamp)} for log in stored_logs],
-                                "stored": True
-                            }))
+                    started = time.perf_counter()
+                    logs = await DetectionService.process_frame(frame, user_id)
+                    if session.rate:
+                        session.rate.observe((time.perf_counter() - started) * 1000)
+                        targets = session.rate.update(detection_executor.load)
+                        if targets:
+                            await send({"type": "control", **targets})
+
+                    LogService.store_logs(session.spans, logs)
+                    if stream:
+                        message = stream.update(log["event"] for log in logs)
+                    elif logs:
+                        message = {
+                            "type": "logs",
+                            "data": [{"event": log["event"], "time": log["time"]} for log in logs],
+                            "queued": True  # Stored as event spans by the background writer
+                        }
+                    else:
+                        message = None
+                    if message:
+                        if header is not None:
+                            # Lets binary clients match results to the frame they sent
+                            message["seq"] = header.seq
+                        await send(message)
 
                 except WebSocketDisconnect:
                     break
@@ -204,8 +365,14 @@ async def websocket_endpoint(
                         break
                     continue
 
+        # Main processing loop
+        receiver = asyncio.create_task(receive_frames())
+        try:
+            await process_frames()
         finally:
-            await manager.disconnect(user_id)
+            receiver.cancel()
+            await manager.disconnect(user_id, websocket)  # Closes the session's open spans
+            await log_writer.flush()  # The session's events are stored when it ends
             db.close()
 
     except Exception as e:
@@ -214,7 +381,7 @@ async def websocket_endpoint(
     finally:
         if connection_established:
             logger.info(f"Cleaning up connection for user {user_id}")
-            await manager.disconnect(user_id)
+            await manager.disconnect(user_id, websocket)
         try:
             db.close()
         except:
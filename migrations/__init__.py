@@ -0,0 +1 @@
+# Offline schema migrations for databases created before a model change, run with python -m
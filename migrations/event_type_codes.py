@@ -0,0 +1,105 @@
+"""Move logs and event_spans to small-int event types and add their indexes.
+
+Tables created before EventType stored the event type as a VARCHAR and
+only indexed id. This migration creates and seeds the event_types lookup
+table, converts each event_type column in place and creates the composite
+indexes the models declare. Already migrated tables are skipped, so it is
+safe to run again. Rows with an event type EventType does not know abort
+the migration before anything is changed; add a member for them first.
+
+    python -m migrations.event_type_codes --dry-run
+    python -m migrations.event_type_codes
+"""
+import argparse
+import sys
+from typing import Dict, List
+from sqlalchemy import Engine, String, inspect, text
+from models.event_types import EventType, EventTypeLookup
+from models.event_spans import EventSpan
+from models.logs import Log
+import models.users  # Registers the table logs.user_id refers to
+from utils.logger import logger
+
+TABLES = (Log.__table__, EventSpan.__table__)
+
+def _needs_conversion(engine: Engine, table) -> bool:
+    columns = {column["name"]: column["type"] for column in inspect(engine).get_columns(table.name)}
+    return isinstance(columns.get("event_type"), String)
+
+def unknown_event_types(engine: Engine, table) -> List[str]:
+    labels = {member.label for member in EventType}
+    with engine.connect() as conn:
+        found = conn.execute(text(f"SELECT DISTINCT event_type FROM {table.name}")).scalars().all()
+    return sorted(str(name) for name in found if name is not None and name not in labels)
+
+def _convert(conn, table):
+    name = table.name
+    conn.execute(text(f"ALTER TABLE {name} ADD COLUMN event_type_code SMALLINT"))
+    conn.execute(text(
+        f"UPDATE {name} SET event_type_code = "
+        f"(SELECT id FROM event_types WHERE event_types.name = {name}.event_type)"
+    ))
+    conn.execute(text(f"ALTER TABLE {name} DROP COLUMN event_type"))
+    conn.execute(text(f"ALTER TABLE {name} RENAME COLUMN event_type_code TO event_type"))
+    if conn.dialect.name != "sqlite":  # SQLite cannot add constraints to existing tables
+        conn.execute(text(
+            f"ALTER TABLE {name} ADD CONSTRAINT fk_{name}_event_type "
+            f"FOREIGN KEY (event_type) REFERENCES event_types (id)"
+        ))
+
+def migrate(engine: Engine, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Convert and index every table that needs it; returns the steps per table"""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    plan: Dict[str, List[str]] = {}
+    for table in TABLES:
+        if table.name not in existing:
+            continue
+        steps = []
+        if _needs_conversion(engine, table):
+            unknown = unknown_event_types(engine, table)
+            if unknown:
+                raise ValueError(f"{table.name} has event types EventType does not know: {', '.join(unknown)}")
+            steps.append("convert event_type")
+        present = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        # Indexes on columns a later migration adds (session_id) are created by that migration
+        steps.extend(f"create index {index.name}" for index in sorted(table.indexes, key=lambda index: index.name)
+                     if index.name not in present and {column.name for column in index.columns} <= columns)
+        if steps:
+            plan[table.name] = steps
+    if dry_run or not plan:
+        return plan
+
+    EventTypeLookup.__table__.create(engine, checkfirst=True)  # Seeded on creation
+    for table in TABLES:
+        steps = plan.get(table.name, [])
+        with engine.begin() as conn:
+            if "convert event_type" in steps:
+                _convert(conn, table)
+            for index in table.indexes:
+                if f"create index {index.name}" in steps:
+                    index.create(conn)
+        logger.info(f"Migrated {table.name}: {', '.join(steps) or 'nothing to do'}")
+    return plan
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Store event types as small-int codes and index the event tables")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the steps that would run")
+    args = parser.parse_args(argv)
+
+    from config.database import engine
+    try:
+        plan = migrate(engine, args.dry_run)
+    except ValueError as e:
+        print(f"Migration aborted: {e}", file=sys.stderr)
+        return 1
+    for table, steps in plan.items():
+        for step in steps:
+            print(f"{table}: {step}")
+    if not plan:
+        print("Schema is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Add exam sessions and move stored events and their aggregates onto them.
+
+Before exam sessions, logs and event_spans only carried a user_id and
+event_aggregates was keyed by (user_id, event_type), so every exam a user
+took ran together. This migration creates exam_sessions, adds the
+session_id columns and their indexes, files each user's session-less rows
+under one ended "legacy" session spanning them, and recreates
+event_aggregates keyed by (session_id, event_type) rebuilt from the raw
+tables. Run it after event_type_codes and before span_compaction, so
+compacted spans keep the session of the rows they replace. Already
+migrated steps are skipped, so it is safe to run again.
+
+    python -m migrations.exam_sessions --dry-run
+    python -m migrations.exam_sessions
+"""
+import argparse
+import secrets
+import sys
+from typing import Dict, List
+from sqlalchemy import Engine, func, inspect, select, text, update
+from sqlalchemy.orm import Session
+from models.event_aggregates import EventAggregate
+from models.event_spans import EventSpan
+from models.exam_sessions import ExamSession
+from models.logs import Log
+import models.users  # Registers the table the session tables refer to
+from services.event_aggregates import rebuild, session_ids
+from utils.logger import logger
+
+TABLES = (Log.__table__, EventSpan.__table__)
+LEGACY_PROFILE = "legacy"
+
+def _columns(engine: Engine, name: str) -> List[str]:
+    return [column["name"] for column in inspect(engine).get_columns(name)]
+
+def _legacy_users(engine: Engine, existing) -> List[int]:
+    """Users with rows not filed under a session"""
+    users = set()
+    with engine.connect() as conn:
+        for table in TABLES:
+            if table.name not in existing:
+                continue
+            where = "session_id IS NULL" if "session_id" in _columns(engine, table.name) else "1 = 1"
+            users.update(conn.execute(text(
+                f"SELECT DISTINCT user_id FROM {table.name} WHERE {where} AND user_id IS NOT NULL"
+            )).scalars())
+    return sorted(users)
+
+def _aggregates_keyed_by_session(engine: Engine) -> bool:
+    primary_key = inspect(engine).get_pk_constraint(EventAggregate.__tablename__)["constrained_columns"]
+    return "session_id" in primary_key
+
+def migrate(engine: Engine, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Bring the schema and stored rows onto exam sessions; returns the steps per table"""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    plan: Dict[str, List[str]] = {}
+    if ExamSession.__tablename__ not in existing:
+        plan[ExamSession.__tablename__] = ["create table"]
+    for table in TABLES:
+        if table.name not in existing:
+            continue
+        steps = []
+        if "session_id" not in _columns(engine, table.name):
+            steps.append("add session_id")
+        present = {index["name"] for index in inspector.get_indexes(table.name)}
+        steps.extend(f"create index {index.name}" for index in sorted(table.indexes, key=lambda index: index.name)
+                     if index.name not in present)
+        if steps:
+            plan[table.name] = steps
+    legacy_users = _legacy_users(engine, existing)
+    if legacy_users:
+        plan.setdefault(ExamSession.__tablename__, []).append(f"create legacy sessions for {len(legacy_users)} users")
+    aggregates = EventAggregate.__tablename__
+    if aggregates not in existing:
+        plan[aggregates] = ["create table", "rebuild"] if legacy_users else ["create table"]
+    elif not _aggregates_keyed_by_session(engine):
+        plan[aggregates] = ["recreate keyed by session", "rebuild"]
+    elif legacy_users:
+        plan[aggregates] = ["rebuild"]
+    if dry_run or not plan:
+        return plan
+
+    ExamSession.__table__.create(engine, checkfirst=True)
+    for table in TABLES:
+        steps = plan.get(table.name, [])
+        with engine.begin() as conn:
+            if "add session_id" in steps:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN session_id VARCHAR(32)"))
+                if conn.dialect.name != "sqlite":  # SQLite cannot add constraints to existing tables
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD CONSTRAINT fk_{table.name}_session "
+                        f"FOREIGN KEY (session_id) REFERENCES exam_sessions (id)"
+                    ))
+            for index in table.indexes:
+                if f"create index {index.name}" in steps:
+                    index.create(conn)
+        if steps:
+            logger.info(f"Migrated {table.name}: {', '.join(steps)}")
+
+    with Session(engine) as db:
+        for user_id in legacy_users:
+            _file_legacy_rows(db, user_id, [model for model in (Log, EventSpan) if model.__tablename__ in existing])
+        db.commit()
+    if legacy_users:
+        logger.info(f"Filed session-less events of {len(legacy_users)} users under legacy sessions")
+
+    if "recreate keyed by session" in plan.get(aggregates, []):
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE {aggregates}"))
+    EventAggregate.__table__.create(engine, checkfirst=True)
+    if "rebuild" in plan.get(aggregates, []):
+        with Session(engine) as db:
+            for session_id in session_ids(db):
+                rebuild(db, session_id)
+        logger.info(f"Rebuilt {aggregates} per exam session")
+    return plan
+
+def _file_legacy_rows(db: Session, user_id: int, models):
+    """One ended session covering the user's session-less rows, which are moved onto it"""
+    firsts, lasts = [], []
+    for model in models:
+        first_column, last_column = (
+            (Log.timestamp, Log.timestamp) if model is Log else (EventSpan.start_time, EventSpan.end_time)
+        )
+        first, last = db.execute(
+            select(func.min(first_column), func.max(last_column))
+            .where(model.user_id == user_id, model.session_id.is_(None))
+        ).one()
+        if first is not None:
+            firsts.append(first)
+            lasts.append(last)
+    legacy = ExamSession(id=secrets.token_hex(16), user_id=user_id, started_at=min(firsts, default=None),
+                         ended_at=max(lasts, default=None), status="ended", detector_profile=LEGACY_PROFILE)
+    db.add(legacy)
+    db.flush()
+    for model in models:
+        db.execute(update(model).where(model.user_id == user_id, model.session_id.is_(None))
+                   .values(session_id=legacy.id))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Add exam sessions and key stored events by session")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the steps that would run")
+    args = parser.parse_args(argv)
+
+    from config.database import engine
+    plan = migrate(engine, args.dry_run)
+    for table, steps in plan.items():
+        for step in steps:
+            print(f"{table}: {step}")
+    if not plan:
+        print("Schema is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+from .base import Base, Column, Integer, String, ForeignKey
+from sqlalchemy import DateTime, Index
+from .event_types import EventTypeCode
+
+class EventAggregate(Base):
+    """Running totals of one event type in an exam session, kept in step with logs and spans"""
+    __tablename__ = "event_aggregates"
+
+    session_id = Column(String(32), ForeignKey("exam_sessions.id"), primary_key=True)
+    event_type = Column(EventTypeCode, ForeignKey("event_types.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    count = Column(Integer, nullable=False, default=0)  # Occurrences, a span counts its merged events
+    first_time = Column(DateTime)
+    last_time = Column(DateTime)
+
+    __table_args__ = (Index("ix_event_aggregates_user", "user_id"),)
@@ -0,0 +1,23 @@
+from .base import Base, Column, Integer, String, ForeignKey
+from sqlalchemy import DateTime, Float, Index
+from .event_types import EventTypeCode
+
+class EventSpan(Base):
+    """One detection event seen on consecutive analysed frames"""
+    __tablename__ = "event_spans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    session_id = Column(String(32), ForeignKey("exam_sessions.id"), nullable=True)
+    event_type = Column(EventTypeCode, ForeignKey("event_types.id"))  # face_detected, hand_detected, etc.
+    log = Column(String(1000))  # Event text as sent to the client
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+    count = Column(Integer, default=1)  # Occurrences merged into the span
+    peak_confidence = Column(Float, nullable=True)  # Highest detector score, if it reports one
+
+    __table_args__ = (
+        Index("ix_event_spans_user_start", "user_id", "start_time"),
+        Index("ix_event_spans_user_event_type", "user_id", "event_type"),
+        Index("ix_event_spans_session_start", "session_id", "start_time"),
+    )
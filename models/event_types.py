@@ -0,0 +1,61 @@
+import enum
+from .base import Base, Column, String
+from sqlalchemy import SmallInteger, event, insert
+from sqlalchemy.types import TypeDecorator
+
+class EventType(enum.IntEnum):
+    """Stored event types; new detector events need a member here.
+
+    Codes are persisted, so members may be added but never renumbered.
+    """
+    FACE_DETECTED = 1
+    FACE_NOT_DETECTED = 2
+    UNUSUAL_FACE_MOVEMENT_DETECTED = 3
+    HAND_DETECTED = 4
+    EYE_MOVEMENT_DETECTED = 5
+    MOUTH_MOVEMENT_DETECTED = 6
+    PHONE_DETECTED = 7
+    BACKGROUND_PERSON_DETECTED = 8
+    SESSION_PAUSED = 20
+    SESSION_RESUMED = 21
+    SESSION_ENDED = 22
+    SESSION_STOPPED = 23
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @classmethod
+    def is_known(cls, label: str) -> bool:
+        return label.upper() in cls.__members__
+
+    @classmethod
+    def from_label(cls, label: str) -> "EventType":
+        try:
+            return cls[label.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown event type: {label}") from None
+
+class EventTypeCode(TypeDecorator):
+    """Event type names in Python, stored as their small-int EventType code"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return int(EventType.from_label(value))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else EventType(value).label
+
+class EventTypeLookup(Base):
+    """Names of the EventType codes, for reading the tables from SQL"""
+    __tablename__ = "event_types"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String(100), unique=True, nullable=False)
+
+@event.listens_for(EventTypeLookup.__table__, "after_create")
+def _seed_event_types(table, connection, **kwargs):
+    connection.execute(insert(table), [{"id": int(member), "name": member.label} for member in EventType])
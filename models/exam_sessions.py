@@ -0,0 +1,16 @@
+from .base import Base, Column, Integer, String, ForeignKey
+from sqlalchemy import DateTime, Index
+from datetime import datetime
+
+class ExamSession(Base):
+    """One exam taken by a user, from /start until it is stopped"""
+    __tablename__ = "exam_sessions"
+
+    id = Column(String(32), primary_key=True)  # Handed to the client as sessionId
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    ended_at = Column(DateTime, nullable=True)
+    status = Column(String(20), default="created")  # created, running, paused, ended
+    detector_profile = Column(String(20), default="standard")  # standard or degraded, from admission
+
+    __table_args__ = (Index("ix_exam_sessions_user_started", "user_id", "started_at"),)
@@ -1,14 +1,23 @@
 from .base import Base, Column, Integer, String, ForeignKey, relationship
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 from datetime import datetime
+from .event_types import EventTypeCode
 
 class Log(Base):
     __tablename__ = "logs"
 
     id = Column(Integer, primary_key=True, index=True)
     log = Column(String(1000))
-    event_type = Column(String(100))  # face_not_detected, hand_detected, etc.
+    event_type = Column(EventTypeCode, ForeignKey("event_types.id"))  # face_not_detected, hand_detected, etc.
     timestamp = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"))
+    session_id = Column(String(32), ForeignKey("exam_sessions.id"), nullable=True)
     
     user = relationship("User", back_populates="logs")
+
+    # Session info and summaries read one user's or one session's rows by time and by type
+    __table_args__ = (
+        Index("ix_logs_user_timestamp", "user_id", "timestamp"),
+        Index("ix_logs_user_event_type", "user_id", "event_type"),
+        Index("ix_logs_session_timestamp", "session_id", "timestamp"),
+    )
@@ -3,15 +3,25 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from config.database import get_db
 from models.logs import Log
-from schemas.exam import ExamSummary
+from models.event_spans import EventSpan
+from models.event_aggregates import EventAggregate
+from models.exam_sessions import ExamSession
+from schemas.exam import ExamSummary, ExamSessionInfo
 from datetime import datetime, timedelta
-from sqlalchemy import func
-from typing import Dict, Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from utils.connection import manager  # Import manager from new module
 import secrets
+import asyncio
 from routers.auth import create_access_token, get_current_user
 from fastapi.responses import JSONResponse
+from services.detection_service import DetectionService
+from services.detection_executor import detection_executor
+from services.log_service import LogService, paused_seconds
+from services.exam_session_service import ExamSessionService, RUNNING, PAUSED, ENDED
+from services.admission import DEGRADED
+from services.log_writer import log_writer
+from utils.logger import logger
 
 router = APIRouter()
 security = HTTPBearer()
@@ -25,23 +35,24 @@ class SessionInfo(BaseModel):
 @router.get("/session/{user_id}", response_model=SessionInfo)
 def get_session_info(user_id: int, db: Session = Depends(get_db)):
     """Get current exam session info"""
-    # Get most recent log
-    latest_log = db.query(Log).filter(
-        Log.user_id == user_id
-    ).order_by(Log.timestamp.desc()).first()
-    
-    if latest_log:
-        start_time = db.query(func.min(Log.timestamp)).filter(
-            Log.user_id == user_id
-        ).scalar()
-        
+    # Only the user's open exam session, not their earlier ones
+    exam_session = ExamSessionService.current(db, user_id)
+
+    if exam_session:
+        start_time = exam_session.started_at
+        totals = LogService.event_totals(db, session_id=exam_session.id)
+        pause_events = LogService.pause_events(db, totals, session_id=exam_session.id)
+
         duration = None
         if start_time:
-            duration = (datetime.utcnow() - start_time).total_seconds() / 60
+            # Paused time doesn't count towards the session
+            now = datetime.utcnow()
+            duration = ((now - start_time).total_seconds() - paused_seconds(pause_events, now)) / 60
 
+        paused = bool(pause_events) and pause_events[-1].event_type == "session_paused"
         return SessionInfo(
             user_id=user_id,
-            status="running",
+            status="paused" if paused else "running",
             start_time=start_time,
             duration=round(duration, 2) if duration else None
         )
@@ -51,6 +62,26 @@ def get_session_info(user_id: int, db: Session = Depends(get_db)):
         status="not_started"
     )
 
+@router.get("/detection-stats")
+def get_executor_stats():
+    """Get detection worker load, admission and log writer counters for this API worker"""
+    return {
+        **detection_executor.stats(),
+        "admission": DetectionService.capacity_stats(),
+        "log_writer": log_writer.stats()
+    }
+
+@router.get("/detection-stats/{user_id}")
+def get_detection_stats(user_id: int):
+    """Get live detection counters for an active session"""
+    stats = DetectionService.session_stats(user_id)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active session found"
+        )
+    return stats
+
 @router.post("/start/{user_id}")
 def start_exam_session(
     user_id: int,
@@ -78,6 +109,9 @@ def start_exam_session(
     })
     
     if manager.is_connected(user_id):
+        current = ExamSessionService.current(db, user_id)
+        if current:
+            session_id = current.id  # Keep addressing the running session
         return {
             "message": "Session already running",
             "status": "running",
@@ -93,25 +127,49 @@ def start_exam_session(
             }
         }
     
+    admission = DetectionService.admit(user_id)
+    if not admission.admitted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server at capacity ({admission.reason}), retry later",
+            headers={"Retry-After": str(admission.retry_after)}
+        )
+    ExamSessionService.create(
+        db, user_id, profile="degraded" if admission.decision == DEGRADED else "standard", session_id=session_id
+    )
+
+    ws_config = {
+        "sessionId": session_id,
+        "token": ws_token,
+        "additionalParams": {
+            "userId": user_id,
+            "maxDuration": 7200,  # 2 hours in seconds
+            "keepAliveInterval": 15000  # 15 seconds in milliseconds
+        }
+    }
+    targets = DetectionService.initial_rate_targets()
+    if targets:
+        # Starting point only, the server adjusts it with "control" messages
+        ws_config["frameTargets"] = targets
+
     return {
         "message": "Start new session",
         "status": "ready",
+        "admission": admission.decision,
         "wsUrl": f"{base_url}/{user_id}",
-        "wsConfig": {
-            "sessionId": session_id,
-            "token": ws_token,
-            "additionalParams": {
-                "userId": user_id,
-                "maxDuration": 7200,  # 2 hours in seconds
-                "keepAliveInterval": 15000  # 15 seconds in milliseconds
-            }
-        }
+        "wsConfig": ws_config
     }
 
 @router.post("/pause/{user_id}")
-def pause_exam_session(user_id: int):
+def pause_exam_session(user_id: int, db: Session = Depends(get_db)):
     """Pause exam session"""
     if manager.set_paused(user_id, True):
+        exam_session = ExamSessionService.current(db, user_id)
+        LogService.add_session_event(
+            db, user_id, "Exam session paused", "session_paused", exam_session.id if exam_session else None
+        )
+        if exam_session:
+            ExamSessionService.set_status(db, exam_session, PAUSED)
         return {"message": "Session paused", "status": "paused"}
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -119,9 +177,15 @@ def pause_exam_session(user_id: int):
     )
 
 @router.post("/resume/{user_id}")
-def resume_exam_session(user_id: int):
+def resume_exam_session(user_id: int, db: Session = Depends(get_db)):
     """Resume exam session"""
     if manager.set_paused(user_id, False):
+        exam_session = ExamSessionService.current(db, user_id)
+        LogService.add_session_event(
+            db, user_id, "Exam session resumed", "session_resumed", exam_session.id if exam_session else None
+        )
+        if exam_session:
+            ExamSessionService.set_status(db, exam_session, RUNNING)
         return {"message": "Session resumed", "status": "running"}
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -141,7 +205,7 @@ async def stop_exam_session(
         if current_user.id != user_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-        if not manager.is_connected(user_id):
+        if not await asyncio.to_thread(manager.is_connected, user_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No active session found"
@@ -149,18 +213,15 @@ async def stop_exam_session(
 
         # Force disconnect connection
         await manager.force_disconnect(user_id)
+        await log_writer.flush()  # Store buffered events before the final log
 
-        # Add final log
-        try:
-            db.add(Log(
-                log="Exam session ended",
-                event_type="session_ended",
-                timestamp=datetime.utcnow(),
-                user_id=user_id
-            ))
-            db.commit()
-        except:
-            db.rollback()
+        # Add final log and close the exam session
+        exam_session = ExamSessionService.current(db, user_id)
+        LogService.add_session_event(
+            db, user_id, "Exam session ended", "session_ended", exam_session.id if exam_session else None
+        )
+        if exam_session:
+            ExamSessionService.set_status(db, exam_session, ENDED)
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -178,53 +239,85 @@ async def stop_exam_session(
 
 @router.get("/summary/{user_id}", response_model=ExamSummary)
 async def get_exam_summary(user_id: int, db: Session = Depends(get_db)):
-    """Get exam summary for a user"""
-    
-    # Get all logs except session stop events
-    logs = db.query(Log).filter(
-        Log.user_id == user_id,
-        Log.event_type != "session_stopped"  # Exclude session stop events
-    ).all()
-    
-    if not logs:
+    """Get exam summary for a user, over all of their sessions"""
+    totals = LogService.event_totals(db, user_id=user_id)
+    if not totals:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No exam logs found for this user"
         )
-    
-    # Calculate duration
-    start_time = min(log.timestamp for log in logs)
-    end_time = max(log.timestamp for log in logs)
-    duration = (end_time - start_time).total_seconds() / 60  # in minutes
-    
-    # Count suspicious activities
-    suspicious_activities: Dict[str, int] = {}
-    total_checks = len(logs)
-    face_detections = 0
-    
-    # Define non-suspicious events
-    non_suspicious_events = {"face_detected", "session_stopped"}
-    
-    for log in logs:
-        if log.event_type == "face_detected":
-            face_detections += 1
-        elif log.event_type not in non_suspicious_events:  # Only count suspicious events
-            suspicious_activities[log.event_type] = suspicious_activities.get(log.event_type, 0) + 1
-    
-    # Calculate compliance
-    face_detection_rate = (face_detections / total_checks) * 100 if total_checks > 0 else 0
-    
-    # Calculate overall compliance
-    suspicious_weight = sum(suspicious_activities.values())
-    overall_compliance = max(0, face_detection_rate - (suspicious_weight / total_checks * 20))
-    
-    return ExamSummary(
-        total_duration=round(duration, 2),
-        face_detection_rate=round(face_detection_rate, 2),
-        suspicious_activities=suspicious_activities,
-        overall_compliance=round(overall_compliance, 2)
+    return LogService.summarize(totals, LogService.pause_events(db, totals, user_id=user_id))
+
+def _exam_session_info(exam_session) -> ExamSessionInfo:
+    return ExamSessionInfo(
+        session_id=exam_session.id,
+        user_id=exam_session.user_id,
+        status=exam_session.status,
+        detector_profile=exam_session.detector_profile,
+        started_at=exam_session.started_at,
+        ended_at=exam_session.ended_at
     )
 
+def _get_exam_session(db: Session, session_id: str):
+    exam_session = ExamSessionService.get(db, session_id)
+    if exam_session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exam session not found"
+        )
+    return exam_session
+
+@router.get("/user/{user_id}/sessions", response_model=List[ExamSessionInfo])
+def list_exam_sessions(user_id: int, db: Session = Depends(get_db)):
+    """A user's exam sessions, newest first"""
+    return [_exam_session_info(exam_session) for exam_session in ExamSessionService.user_sessions(db, user_id)]
+
+@router.get("/sessions/{session_id}", response_model=ExamSessionInfo)
+def get_exam_session(session_id: str, db: Session = Depends(get_db)):
+    """Get one exam session"""
+    return _exam_session_info(_get_exam_session(db, session_id))
+
+@router.get("/sessions/{session_id}/summary", response_model=ExamSummary)
+def get_exam_session_summary(session_id: str, db: Session = Depends(get_db)):
+    """Get the summary of one exam session, reading only its rows"""
+    _get_exam_session(db, session_id)
+    totals = LogService.event_totals(db, session_id=session_id)
+    if not totals:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No exam logs found for this session"
+        )
+    return LogService.summarize(totals, LogService.pause_events(db, totals, session_id=session_id))
+
+@router.delete("/sessions/{session_id}")
+def delete_exam_session(
+    session_id: str,
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """Delete an ended exam session with its logs, spans and aggregates"""
+    exam_session = _get_exam_session(db, session_id)
+    current_user = get_current_user(credentials.credentials, db)
+    if current_user.id != exam_session.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this session"
+        )
+    if exam_session.status != ENDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Stop the session before deleting it"
+        )
+    try:
+        deleted_count = ExamSessionService.delete(db, exam_session)
+    except Exception as e:
+        logger.error(f"Error deleting exam session {session_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete session"
+        )
+    return {"message": f"Deleted session {session_id}", "deleted_count": deleted_count}
+
 @router.post("/clear-logs/{user_id}")
 async def clear_exam_logs(
     user_id: int,
@@ -241,8 +334,11 @@ async def clear_exam_logs(
                 detail="Not authorized to clear these logs"
             )
 
-        # Delete all logs for the user
+        # Delete all logs and event spans for the user
         deleted_count = db.query(Log).filter(Log.user_id == user_id).delete()
+        deleted_count += db.query(EventSpan).filter(EventSpan.user_id == user_id).delete()
+        db.query(EventAggregate).filter(EventAggregate.user_id == user_id).delete()
+        db.query(ExamSession).filter(ExamSession.user_id == user_id).delete()
         db.commit()
 
         return JSONResponse(
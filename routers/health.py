@@ -0,0 +1,29 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+# Readiness: set once detectors are warmed up, until then /ready returns 503
+warmup_state = {"ready": False, "timings_ms": None, "error": None}
+
+def mark_ready(timings_ms):
+    warmup_state["timings_ms"] = timings_ms
+    warmup_state["ready"] = True
+
+def mark_failed(error: str):
+    warmup_state["error"] = error
+
+@router.get("/live")
+async def live():
+    """Liveness: the process is up and serving"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def ready():
+    """Readiness: detectors are warmed up and sessions can be routed here"""
+    if not warmup_state["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming_up", **warmup_state}
+        )
+    return {"status": "ready", **warmup_state}
@@ -1,8 +1,17 @@
 from pydantic import BaseModel
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Optional
 
 class ExamSummary(BaseModel):
     total_duration: float  # in minutes
     face_detection_rate: float  # percentage of time face was detected
     suspicious_activities: Dict[str, int]  # count of each type of suspicious activity
     overall_compliance: float  # overall compliance percentage
+
+class ExamSessionInfo(BaseModel):
+    session_id: str
+    user_id: int
+    status: str  # created, running, paused or ended
+    detector_profile: str
+    started_at: datetime
+    ended_at: Optional[datetime] = None
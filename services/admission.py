@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+from utils.logger import logger
+from config.settings import settings
+
+ADMIT = "admit"
+DEGRADED = "degraded"
+REJECT = "reject"
+
+class Admission(NamedTuple):
+    decision: str
+    reason: str = ""
+    retry_after: Optional[int] = None  # Seconds, set when rejected
+
+    @property
+    def admitted(self) -> bool:
+        return self.decision != REJECT
+
+def cpu_load() -> float:
+    """One-minute load average per core, 0 where unavailable"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+class AdmissionController:
+    """Decides whether a new session fits, from measured per-session cost and current load.
+
+    Session cost is the worker time one session uses per second of wall
+    time, learned from the executor's busy time; projected utilisation is
+    (sessions + 1) * cost / workers. Utilisation, CPU load and executor
+    queue depth are each compared against a degrade and a reject threshold.
+
+    A session is admitted when it is started and connects a moment later;
+    grant() keeps that decision for grant_seconds so the connection claims it
+    instead of being counted and decided a second time. Pending grants count
+    as sessions in later decisions.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        session_cost: float,
+        degrade: Dict[str, float],
+        reject: Dict[str, float],
+        retry_after: int,
+        sample_seconds: float = 5.0,
+        alpha: float = 0.3,
+        grant_seconds: float = 60.0
+    ):
+        self.workers = max(1, workers)
+        self.session_cost = session_cost
+        self.degrade = degrade
+        self.reject = reject
+        self.retry_after = retry_after
+        self.sample_seconds = sample_seconds
+        self.alpha = alpha
+        self._last_sample = None  # (time, busy_seconds)
+        self.decisions = {ADMIT: 0, DEGRADED: 0, REJECT: 0}
+        self.grant_seconds = grant_seconds
+        self._grants: Dict[Hashable, Tuple[float, Admission]] = {}  # key -> (expiry, decision)
+        self._grants_lock = threading.Lock()
+
+    def observe(self, busy_seconds: float, sessions: int, now: Optional[float] = None):
+        """Refine the per-session cost from the executor's cumulative busy time"""
+        now = time.monotonic() if now is None else now
+        if self._last_sample is None:
+            self._last_sample = (now, busy_seconds)
+            return
+        last_time, last_busy = self._last_sample
+        elapsed = now - last_time
+        if elapsed < self.sample_seconds:
+            return
+        self._last_sample = (now, busy_seconds)
+        if sessions > 0:
+            measured = (busy_seconds - last_busy) / elapsed / sessions
+            self.session_cost += self.alpha * (measured - self.session_cost)
+
+    def utilisation(self, sessions: int) -> float:
+        """Projected worker utilisation with one more session"""
+        return (sessions + 1) * self.session_cost / self.workers
+
+    def decide(self, sessions: int, cpu: float, queue: float) -> Admission:
+        signals = {"utilisation": self.utilisation(sessions), "cpu": cpu, "queue": queue}
+        over_reject = [name for name, value in signals.items() if value >= self.reject[name]]
+        over_degrade = [name for name, value in signals.items() if value >= self.degrade[name]]
+        if over_reject:
+            admission = Admission(REJECT, f"{', '.join(over_reject)} over limit", self.retry_after)
+        elif over_degrade:
+            admission = Admission(DEGRADED, f"{', '.join(over_degrade)} high")
+        else:
+            admission = Admission(ADMIT)
+        self.decisions[admission.decision] += 1
+        return admission
+
+    def _expire_grants(self, now: float):
+        for key in [key for key, (expiry, _) in self._grants.items() if expiry <= now]:
+            del self._grants[key]
+
+    def grant(self, key: Hashable, admission: Admission, now: Optional[float] = None):
+        """Keep an admitted decision until the session connects"""
+        now = time.monotonic() if now is None else now
+        with self._grants_lock:
+            self._expire_grants(now)
+            self._grants[key] = (now + self.grant_seconds, admission)
+
+    def claim(self, key: Hashable, now: Optional[float] = None) -> Optional[Admission]:
+        """Take the pending decision for a connecting session, None if there is none"""
+        now = time.monotonic() if now is None else now
+        with self._grants_lock:
+            self._expire_grants(now)
+            entry = self._grants.pop(key, None)
+        return entry[1] if entry else None
+
+    def pending(self, now: Optional[float] = None) -> int:
+        """Admitted sessions that have not connected yet"""
+        now = time.monotonic() if now is None else now
+        with self._grants_lock:
+            self._expire_grants(now)
+            return len(self._grants)
+
+    def stats(self, sessions: int) -> Dict:
+        return {
+            "session_cost": round(self.session_cost, 4),
+            "capacity": int(round(self.reject["utilisation"] * self.workers / self.session_cost, 6))
+            if self.session_cost else None,
+            "utilisation": round(self.utilisation(sessions), 3),
+            "pending": self.pending(),
+            "decisions": dict(self.decisions),
+        }
+
+admission_controller = AdmissionController(
+    workers=settings.DETECTION_WORKERS,
+    session_cost=settings.ADMISSION_SESSION_COST,
+    degrade={
+        "utilisation": settings.ADMISSION_DEGRADE_UTILISATION,
+        "cpu": settings.ADMISSION_DEGRADE_CPU,
+        "queue": settings.ADMISSION_DEGRADE_QUEUE,
+    },
+    reject={
+        "utilisation": settings.ADMISSION_REJECT_UTILISATION,
+        "cpu": settings.ADMISSION_REJECT_CPU,
+        "queue": settings.ADMISSION_REJECT_QUEUE,
+    },
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+    grant_seconds=settings.ADMISSION_GRANT_SECONDS
+)
@@ -0,0 +1,200 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict
+from utils.logger import logger
+from config.settings import settings
+from detection.resolution import inference_resolutions
+from services.frame_ring import FrameRing, StaleFrameError, run_with_frame
+
+def init_detection_worker(torch_threads: int, resolutions: Dict[str, int]):
+    """Per-process initialisation for the process pool backend"""
+    from utils.mediapipe_config import configure_mediapipe
+    configure_mediapipe()
+
+    # Use the parent's (possibly autotuned) inference resolutions
+    from detection.resolution import apply_resolutions
+    apply_resolutions(resolutions)
+
+    # Each worker owns its own detector pool, probe it and close it on exit
+    from detection.detector_pool import detector_pool
+    detector_pool.start_health_checks(settings.DETECTOR_POOL_HEALTH_INTERVAL)
+    atexit.register(detector_pool.shutdown)
+
+    from detection.trackers import tracker_registry
+    atexit.register(tracker_registry.shutdown)
+
+    import torch
+    torch.set_num_threads(torch_threads)  # Avoid oversubscribing cores across workers
+
+    from detection.yolo_detection import load_model
+    if load_model() is None:
+        logger.warning(f"YOLO model failed to load in detection worker {os.getpid()}")
+
+    # Warm in the initializer so restarted workers are warm too
+    from detection.warmup import warm_up
+    warm_up(1, warm_up_sizes())
+    logger.info(f"Detection worker {os.getpid()} initialised")
+
+def warm_up_sizes():
+    """Client frame sizes the server may ask for, plus the largest inference resolution"""
+    sizes = {level["resolution"] for level in settings.RATE_LEVELS} if settings.ADAPTIVE_RATE else set()
+    sizes.add(max(inference_resolutions.values()))
+    return sizes
+
+def timed_call(fn, *args):
+    """Run fn in the worker and report how long it kept the worker busy"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+class DetectionExecutor:
+    """Runs blocking detection work off the event loop with a bounded in-flight limit"""
+
+    def __init__(
+        self,
+        backend: str,
+        max_workers: int,
+        max_in_flight: int,
+        torch_threads: int,
+        ring_slots: int = 0,
+        ring_slot_bytes: int = 0
+    ):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown detection executor backend: {backend}")
+        self.backend = backend
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.torch_threads = torch_threads
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.busy_seconds = 0.0  # Worker time spent in detection, for capacity estimates
+        self.ring_slots = ring_slots
+        self.ring_slot_bytes = ring_slot_bytes
+        self.ring: Optional[FrameRing] = None
+        self.stale_frames = 0
+
+    @property
+    def load(self) -> float:
+        """Calls running or queued per worker; above 1 frames are waiting"""
+        return self.in_flight / self.max_workers
+
+    def _create_executor(self) -> Executor:
+        if self.backend == "process":
+            # Spawn so workers never inherit torch/MediaPipe threads from the parent
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_detection_worker,
+                initargs=(self.torch_threads, dict(inference_resolutions))
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="detection"
+        )
+
+    def start(self):
+        if self._executor is None:
+            if self.backend == "thread":
+                # Threads share this process's detector pool
+                from detection.detector_pool import detector_pool
+                detector_pool.start_health_checks(settings.DETECTOR_POOL_HEALTH_INTERVAL)
+            elif self.ring_slots > 0:
+                # Hand frames to worker processes through shared memory instead of pickling
+                self.ring = FrameRing(self.ring_slots, self.ring_slot_bytes)
+            self._executor = self._create_executor()
+            logger.info(f"Detection executor started ({self.backend}, {self.max_workers} workers, "
+                        f"{self.max_in_flight} max in flight)")
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the worker pool, waiting if too many calls are in flight"""
+        if self._executor is None:
+            self.start()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                executor = self._executor
+                try:
+                    loop = asyncio.get_running_loop()
+                    elapsed, result = await loop.run_in_executor(executor, timed_call, fn, *args)
+                    self.busy_seconds += elapsed
+                    return result
+                except BrokenProcessPool:
+                    if self._executor is executor:
+                        logger.error("Detection worker process died, restarting pool")
+                        self._restart()
+                    raise
+        finally:
+            self.in_flight -= 1
+
+    async def run_frame(self, fn, frame, *args):
+        """Run fn(frame, *args), passing the frame through the shared-memory ring when there is one"""
+        if self._executor is None:
+            self.start()
+        ring = self.ring
+        ref = ring.put(frame) if ring else None
+        if ref is None:
+            # Threads share the frame by reference; oversized frames or a full ring get pickled
+            return await self.run(fn, frame, *args)
+        try:
+            return await self.run(run_with_frame, fn, ref, *args)
+        except StaleFrameError:
+            self.stale_frames += 1
+            raise
+        finally:
+            ring.release(ref)
+
+    async def warm_up(self) -> Dict:
+        """Start the workers and warm their detectors; returns warm-up time per detector"""
+        self.start()
+        if self.backend == "thread":
+            from detection.warmup import warm_up
+            return await asyncio.to_thread(warm_up, self.max_workers, warm_up_sizes())
+        # Workers warm up in their initializer; one call per worker makes them all spawn
+        started = time.perf_counter()
+        pids = await asyncio.gather(*(self.run(os.getpid) for _ in range(self.max_workers)))
+        logger.info(f"{len(set(pids))} detection workers warmed up")
+        return {"workers": round((time.perf_counter() - started) * 1000, 1)}
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "load": round(self.load, 2),
+            "busy_seconds": round(self.busy_seconds, 1),
+            "stale_frames": self.stale_frames,
+            "frame_ring": self.ring.stats() if self.ring else None,
+        }
+
+    def _restart(self):
+        broken = self._executor
+        self._executor = self._create_executor()
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            if self.ring:
+                self.ring.close()
+                self.ring = None
+            logger.info("Detection executor shut down")
+
+detection_executor = DetectionExecutor(
+    backend=settings.DETECTION_EXECUTOR,
+    max_workers=settings.DETECTION_WORKERS,
+    max_in_flight=settings.DETECTION_MAX_IN_FLIGHT,
+    torch_threads=settings.DETECTION_TORCH_THREADS,
+    ring_slots=settings.FRAME_RING_SLOTS,
+    ring_slot_bytes=settings.FRAME_RING_SLOT_BYTES
+)
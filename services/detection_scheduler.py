@@ -0,0 +1,120 @@
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from utils.logger import logger
+from config.settings import settings
+
+# Order in which detector results are reported
+DETECTORS = ("face", "hands", "face_mesh", "yolo")
+
+# Face events meaning a face is in view
+FACE_PRESENT_EVENTS = {"Face detected", "Unusual face movement detected"}
+
+class DetectorCadence:
+    """How often a detector runs: every Nth frame ("3") or every X ms ("500ms")"""
+
+    def __init__(self, spec):
+        spec = str(spec).strip().lower()
+        self.every_frames = 1
+        self.every_seconds = 0.0
+        if spec.endswith("ms"):
+            self.every_seconds = max(0.0, float(spec[:-2])) / 1000
+        else:
+            self.every_frames = max(1, int(spec))
+
+    def is_due(self, frames_since: Optional[int], seconds_since: Optional[float]) -> bool:
+        if frames_since is None:
+            return True  # Never ran for this session
+        if self.every_seconds:
+            return seconds_since >= self.every_seconds
+        return frames_since >= self.every_frames
+
+def parse_cadences(specs: Dict[str, str]) -> Dict[str, DetectorCadence]:
+    cadences = {}
+    for name in DETECTORS:
+        try:
+            cadences[name] = DetectorCadence(specs.get(name, "1"))
+        except ValueError:
+            logger.error(f"Invalid cadence '{specs.get(name)}' for {name}, running every frame")
+            cadences[name] = DetectorCadence("1")
+    return cadences
+
+class _Gated:
+    """Result marker for a detector that was due but skipped by a cascade rule"""
+
+    def __repr__(self):
+        return "GATED"
+
+    def __reduce__(self):
+        # Unpickles as the module singleton, so `is GATED` holds across worker processes
+        return "GATED"
+
+GATED = _Gated()
+
+def gated_or_logs(logs) -> List[Dict]:
+    """Detector result as a list of logs, empty for GATED"""
+    return [] if logs is GATED else logs
+
+def has_face(face_logs: List[Dict]) -> bool:
+    return any(log["event"] in FACE_PRESENT_EVENTS for log in face_logs)
+
+def cascade_allows(name: str, face_present: bool) -> bool:
+    """Whether cascade rules let a due detector run"""
+    if name == "face_mesh" and settings.FACE_MESH_REQUIRES_FACE:
+        # Landmarks are meaningless without a face
+        return face_present
+    return True
+
+class DetectorScheduler:
+    """Per-session decision of which detectors run on a frame, with cached results for the rest"""
+
+    def __init__(self, cadences: Dict[str, DetectorCadence]):
+        self.cadences = cadences
+        self.frame_index = 0
+        self._last_run_frame: Dict[str, int] = {}
+        self._last_run_time: Dict[str, float] = {}
+        self._cache: Dict[str, List[Dict]] = {}
+
+    def plan(self, now: Optional[float] = None) -> Tuple[str, ...]:
+        """Advance to the next frame and return the detectors due on it"""
+        now = time.monotonic() if now is None else now
+        self.frame_index += 1
+        due = []
+        for name in DETECTORS:
+            last_frame = self._last_run_frame.get(name)
+            frames_since = None if last_frame is None else self.frame_index - last_frame
+            seconds_since = None if last_frame is None else now - self._last_run_time[name]
+            if self.cadences[name].is_due(frames_since, seconds_since):
+                due.append(name)
+        return tuple(due)
+
+    def reset(self):
+        """Drop cached results so every detector is due on the next frame"""
+        self._last_run_frame.clear()
+        self._last_run_time.clear()
+        self._cache.clear()
+
+    @property
+    def face_present(self) -> bool:
+        """Face presence from the most recent face detection run"""
+        return has_face(self._cache.get("face", []))
+
+    def merge(self, fresh: Dict[str, Union[List[Dict], _Gated]], timestamp: str, now: Optional[float] = None) -> List[Dict]:
+        """Store fresh results and fill skipped detectors from the cache"""
+        now = time.monotonic() if now is None else now
+        for name, logs in fresh.items():
+            if logs is GATED:
+                # Nothing to report, but stay due so it runs once the gate opens
+                self._cache[name] = []
+                continue
+            self._cache[name] = logs
+            self._last_run_frame[name] = self.frame_index
+            self._last_run_time[name] = now
+
+        all_logs = []
+        for name in DETECTORS:
+            if name in fresh:
+                all_logs.extend(gated_or_logs(fresh[name]))
+            else:
+                # Re-emit the last known state with this frame's time
+                all_logs.extend({**log, "time": timestamp} for log in self._cache.get(name, []))
+        return all_logs
@@ -1,39 +1,202 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
 from utils.logger import logger
-import cv2
 from detection.face_detection import detect_face
 from detection.hand_detection import detect_hands
 from detection.face_mesh_detection import detect_face_mesh
 from detection.yolo_detection import detect_yolo
+from detection.detector_pool import detector_pool
+from detection.trackers import tracker_registry
+from detection.frame_context import FrameContext
+from services.detection_executor import detection_executor
+from services.log_service import LogService
+from services.detection_scheduler import (
+    DETECTORS, GATED, parse_cadences, has_face, cascade_allows, gated_or_logs
+)
+from services.detection_session import DetectionSession
+from services.rate_control import initial_level
+from services.admission import ADMIT, Admission, admission_controller, cpu_load
+from config.settings import settings
+
+DETECTOR_LABELS = {"face": "Face", "hands": "Hand", "face_mesh": "Face Mesh", "yolo": "YOLO"}
+
+def landmark_detector(kind: str, session_id: Optional[int]):
+    """Session-owned tracker when tracking is on, otherwise a pooled static-mode graph"""
+    if session_id is not None and settings.MEDIAPIPE_TRACKING:
+        return tracker_registry.checkout(session_id, kind)
+    return detector_pool.checkout(kind)
 
 class DetectionService:
+    cadences = parse_cadences(settings.DETECTOR_CADENCE)
+    degraded_cadences = parse_cadences(settings.DEGRADED_DETECTOR_CADENCE)
+    sessions: Dict[int, DetectionSession] = {}
+
     @staticmethod
-    async def process_frame(frame) -> List[Dict]:
-        logger.info("Processing new frame")
-        all_logs = []
+    def analyze_frame(
+        frame,
+        detectors: Tuple[str, ...] = DETECTORS,
+        face_present: bool = True,
+        session_id: Optional[int] = None
+    ) -> Dict[str, Union[List[Dict], object]]:
+        """Run the given detectors on a frame; blocking, called from the worker pool.
+
+        A detector skipped by a cascade rule maps to GATED instead of a list.
+        """
+        results: Dict[str, Union[List[Dict], object]] = {}
         
         try:
-            # Process each detection type
-            detections = [
-                ("Face", detect_face(frame)),
-                ("Hand", detect_hands(frame)), 
-                ("Face Mesh", detect_face_mesh(frame)),
-                ("YOLO", detect_yolo(frame))
-            ]
-
-            # Collect logs from all detections
-            for detector_name, logs in detections:
-                if logs:
-                    logger.info(f"{detector_name} detection found {len(logs)} events")
-                    all_logs.extend(logs)
+            # Shared preprocessing, computed at most once per frame
+            ctx = FrameContext(frame)
+
+            # Borrow long-lived MediaPipe graphs for this frame
+            if "face" in detectors:
+                with detector_pool.checkout("face") as face_detection:
+                    results["face"] = detect_face(ctx, face_detection)
+                face_present = has_face(results["face"])
+            if "hands" in detectors:
+                with landmark_detector("hands", session_id) as hands_detection:
+                    results["hands"] = detect_hands(ctx, hands_detection)
+            if "face_mesh" in detectors:
+                if cascade_allows("face_mesh", face_present):
+                    with landmark_detector("face_mesh", session_id) as face_mesh:
+                        results["face_mesh"] = detect_face_mesh(ctx, face_mesh)
                 else:
-                    logger.debug(f"No {detector_name} detections")
+                    results["face_mesh"] = GATED
+            if "yolo" in detectors:
+                results["yolo"] = detect_yolo(ctx)
 
-            if all_logs:
-                logger.info(f"Total events detected: {len(all_logs)}")
+            # Report results from all detections
+            for name, logs in results.items():
+                if logs is GATED:
+                    logger.debug(f"{DETECTOR_LABELS[name]} detection gated")
+                elif logs:
+                    logger.info(f"{DETECTOR_LABELS[name]} detection found {len(logs)} events")
+                else:
+                    logger.debug(f"No {DETECTOR_LABELS[name]} detections")
             
         except Exception as e:
             logger.error(f"Error in frame processing: {str(e)}", exc_info=True)
         
-        return all_logs
+        return results
+
+    @classmethod
+    def get_session(cls, user_id: int) -> DetectionSession:
+        if user_id not in cls.sessions:
+            cls.sessions[user_id] = DetectionSession(cls.cadences, detection_executor.load, user_id)
+        return cls.sessions[user_id]
+
+    @classmethod
+    def start_session(cls, user_id: int):
+        cls.end_session(user_id)  # A reconnect starts from fresh state
+        cls.sessions[user_id] = DetectionSession(cls.cadences, detection_executor.load, user_id)
+
+    @classmethod
+    def _decide(cls, user_id: int) -> Admission:
+        if not settings.ADMISSION_CONTROL or user_id in cls.sessions:
+            return Admission(ADMIT)  # Reconnects keep their place
+        admission_controller.observe(detection_executor.busy_seconds, len(cls.sessions))
+        # Sessions admitted but not connected yet already hold a place
+        sessions = len(cls.sessions) + admission_controller.pending()
+        admission = admission_controller.decide(sessions, cpu_load(), detection_executor.load)
+        if admission.decision != ADMIT:
+            logger.warning(f"Session for user {user_id} {admission.decision}: {admission.reason}")
+        return admission
+
+    @classmethod
+    def attach_exam_session(cls, user_id: int, session_id: str):
+        """Key the session's stored events by its exam session"""
+        session = cls.sessions.get(user_id)
+        if session:
+            session.spans.session_id = session_id
+
+    @classmethod
+    def admit(cls, user_id: int) -> Admission:
+        """Admission decision for a session about to start, kept for its WebSocket"""
+        admission = cls._decide(user_id)
+        if admission.admitted:
+            admission_controller.grant(user_id, admission)
+        return admission
+
+    @classmethod
+    def admit_connection(cls, user_id: int) -> Admission:
+        """Decision for an accepted WebSocket, reusing the one made when the session started"""
+        granted = admission_controller.claim(user_id)
+        return granted if granted is not None else cls._decide(user_id)
+
+    @classmethod
+    def degrade_session(cls, user_id: int):
+        cls.get_session(user_id).degrade(cls.degraded_cadences)
+
+    @classmethod
+    def capacity_stats(cls) -> Dict:
+        return admission_controller.stats(len(cls.sessions))
+
+    @classmethod
+    def initial_rate_targets(cls) -> Optional[Dict]:
+        """Client frame targets for a session starting now, None if adaptive rate is off"""
+        if not settings.ADAPTIVE_RATE:
+            return None
+        return dict(settings.RATE_LEVELS[initial_level(settings.RATE_LEVELS, detection_executor.load)])
+
+    @classmethod
+    def session_stats(cls, user_id: int) -> Optional[Dict]:
+        session = cls.sessions.get(user_id)
+        return session.stats() if session else None
+
+    @classmethod
+    def end_session(cls, user_id: int):
+        """Drop per-session detection state"""
+        session = cls.sessions.pop(user_id, None)
+        if session:
+            session.queue.close()  # Ends the connection's processing loop
+            LogService.close_spans(session.spans)
+            logger.info(f"Detection stats for user {user_id}: {session.stats()}")
+        if detection_executor.backend == "thread":
+            # Process workers hold their own trackers and evict them by LRU/idle time
+            tracker_registry.release(user_id)
+
+    @classmethod
+    def set_paused(cls, user_id: int, paused: bool):
+        """Release detector state for a paused session, it restarts clean on resume"""
+        if not paused:
+            return
+        session = cls.sessions.get(user_id)
+        if session:
+            session.release()
+            LogService.close_spans(session.spans)  # Paused time is not part of any span
+        if detection_executor.backend == "thread":
+            tracker_registry.release(user_id)
+
+    @classmethod
+    async def process_frame(cls, frame, user_id: Optional[int] = None) -> List[Dict]:
+        logger.info("Processing new frame")
+        timestamp = str(datetime.now())
+        try:
+            if user_id is None:
+                # No session to cache results for, run everything
+                results = await detection_executor.run_frame(cls.analyze_frame, frame)
+                return [log for name in DETECTORS for log in gated_or_logs(results.get(name, []))]
+
+            session = cls.get_session(user_id)
+            scheduler = session.scheduler
+            if session.gate and session.gate.should_skip(frame):
+                # Scene unchanged, re-emit the previous detector state
+                logger.debug(f"Unchanged frame skipped for user {user_id}")
+                return scheduler.merge({}, timestamp)
+
+            due = scheduler.plan()
+            results = {}
+            if due:
+                # Detection is CPU-bound, keep it off the event loop
+                results = await detection_executor.run_frame(
+                    cls.analyze_frame, frame, due, scheduler.face_present, user_id
+                )
+            all_logs = scheduler.merge(results, timestamp)
+            admission_controller.observe(detection_executor.busy_seconds, len(cls.sessions))
+
+            if all_logs:
+                logger.info(f"Total events detected: {len(all_logs)} (ran {', '.join(due) or 'none'})")
+            return all_logs
+        except Exception as e:
+            logger.error(f"Error dispatching frame: {str(e)}", exc_info=True)
+            return []
@@ -0,0 +1,51 @@
+from typing import Dict, Optional
+from services.detection_scheduler import DetectorScheduler, DetectorCadence
+from services.frame_gate import FrameChangeGate
+from services.frame_queue import FrameQueue
+from services.rate_control import RateController, initial_level
+from services.span_tracker import SpanTracker
+from config.settings import settings
+
+class DetectionSession:
+    """Per-session detection state kept between frames"""
+
+    def __init__(self, cadences: Dict[str, DetectorCadence], load: float = 0.0, user_id: Optional[int] = None):
+        self.scheduler = DetectorScheduler(cadences)
+        self.gate = FrameChangeGate(
+            threshold=settings.MOTION_THRESHOLD,
+            max_skip_seconds=settings.MOTION_MAX_SKIP_SECONDS
+        ) if settings.MOTION_GATING else None
+        self.queue = FrameQueue(settings.FRAME_QUEUE_SIZE, settings.FRAME_QUEUE_POLICY)
+        self.rate = RateController(
+            levels=settings.RATE_LEVELS,
+            latency_budget_ms=settings.FRAME_LATENCY_BUDGET_MS,
+            update_seconds=settings.RATE_UPDATE_SECONDS,
+            level=initial_level(settings.RATE_LEVELS, load)
+        ) if settings.ADAPTIVE_RATE else None
+        self.spans = SpanTracker(user_id, settings.SPAN_MAX_GAP_SECONDS, settings.SPAN_MAX_SECONDS)
+        self.degraded = False
+
+    def degrade(self, cadences: Dict[str, DetectorCadence]):
+        """Run detectors less often, for sessions admitted while the server is busy"""
+        self.scheduler.cadences = cadences
+        self.degraded = True
+
+    def release(self):
+        """Drop cached detector state, e.g. while the session is paused"""
+        self.scheduler.reset()
+        if self.gate:
+            self.gate.reset()
+
+    def stats(self) -> Dict:
+        stats = {"analysed_frames": self.scheduler.frame_index, "degraded": self.degraded}
+        if self.gate:
+            stats.update({
+                "received_frames": self.gate.frames,
+                "skipped_frames": self.gate.skipped,
+                "skip_ratio": round(self.gate.skip_ratio, 3),
+            })
+        stats["open_spans"] = self.spans.open_spans
+        stats["queue"] = self.queue.stats()
+        if self.rate:
+            stats["rate"] = self.rate.stats()
+        return stats
@@ -0,0 +1,160 @@
+"""Per-session event totals maintained on write, and their consistency check.
+
+Every logs row and event span is folded into event_aggregates in the same
+transaction that stores it, so a summary reads a handful of rows however
+long the exam ran. check compares the aggregates with totals recomputed
+from the raw tables; rebuild replaces them with those totals.
+
+    python -m services.event_aggregates --check
+    python -m services.event_aggregates --rebuild --user-id 42
+    python -m services.event_aggregates --check --session-id 5f0c...
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from models.event_aggregates import EventAggregate
+from models.event_spans import EventSpan
+from models.exam_sessions import ExamSession
+from models.logs import Log
+from utils.logger import logger
+
+def aggregate_rows(rows: Iterable[Dict]) -> List[Dict]:
+    """Aggregate deltas for logs rows (timestamp) or spans (start/end time and count).
+
+    Rows without an exam session, stored before sessions existed, are left
+    to the exam_sessions migration and a rebuild.
+    """
+    merged: Dict[Tuple[str, str], Dict] = {}
+    for row in rows:
+        if row.get("session_id") is None:
+            continue
+        first = row.get("start_time", row.get("timestamp"))
+        last = row.get("end_time", first)
+        key = (row["session_id"], row["event_type"])
+        delta = merged.get(key)
+        if delta is None:
+            merged[key] = {"session_id": key[0], "event_type": key[1], "user_id": row["user_id"],
+                           "count": row.get("count", 1), "first_time": first, "last_time": last}
+        else:
+            delta["count"] += row.get("count", 1)
+            delta["first_time"] = min(delta["first_time"], first)
+            delta["last_time"] = max(delta["last_time"], last)
+    return list(merged.values())
+
+def _upsert(db: Session, deltas: List[Dict]):
+    table = EventAggregate.__table__
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(deltas)
+        stmt = stmt.on_duplicate_key_update(
+            count=table.c.count + stmt.inserted.count,
+            first_time=func.least(table.c.first_time, stmt.inserted.first_time),
+            last_time=func.greatest(table.c.last_time, stmt.inserted.last_time),
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.session_id, table.c.event_type],
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "first_time": func.min(table.c.first_time, stmt.excluded.first_time),
+                "last_time": func.max(table.c.last_time, stmt.excluded.last_time),
+            },
+        )
+    db.execute(stmt)
+
+def record_events(db: Session, rows: List[Dict]):
+    """Fold stored rows into the aggregates; run inside the transaction that stores them"""
+    deltas = aggregate_rows(rows)
+    if deltas:
+        _upsert(db, deltas)
+
+def raw_totals(db: Session, session_id: str) -> Dict[str, Tuple[int, datetime, datetime]]:
+    """(count, first, last) per event type recomputed from a session's event spans and logs rows"""
+    span_totals = db.execute(
+        select(EventSpan.event_type, func.sum(EventSpan.count),
+               func.min(EventSpan.start_time), func.max(EventSpan.end_time))
+        .where(EventSpan.session_id == session_id).group_by(EventSpan.event_type)
+    ).all()
+    log_totals = db.execute(
+        select(Log.event_type, func.count(Log.id), func.min(Log.timestamp), func.max(Log.timestamp))
+        .where(Log.session_id == session_id).group_by(Log.event_type)
+    ).all()
+    totals: Dict[str, Tuple[int, datetime, datetime]] = {}
+    for event_type, count, first, last in span_totals + log_totals:
+        previous = totals.get(event_type)
+        if previous:
+            count += previous[0]
+            first, last = min(first, previous[1]), max(last, previous[2])
+        totals[event_type] = (int(count), first, last)
+    return totals
+
+def stored_totals(db: Session, session_id: str) -> Dict[str, Tuple[int, datetime, datetime]]:
+    rows = db.scalars(select(EventAggregate).where(EventAggregate.session_id == session_id)).all()
+    return {row.event_type: (row.count, row.first_time, row.last_time) for row in rows}
+
+def check(db: Session, session_id: str) -> List[str]:
+    """Event types whose aggregate differs from the raw tables"""
+    raw, stored = raw_totals(db, session_id), stored_totals(db, session_id)
+    return [
+        f"session {session_id} {event_type}: stored {stored.get(event_type)} != raw {raw.get(event_type)}"
+        for event_type in sorted(raw.keys() | stored.keys())
+        if raw.get(event_type) != stored.get(event_type)
+    ]
+
+def rebuild(db: Session, session_id: str):
+    """Replace a session's aggregates with totals from the raw tables"""
+    try:
+        user_id = db.scalar(select(ExamSession.user_id).where(ExamSession.id == session_id))
+        db.execute(delete(EventAggregate).where(EventAggregate.session_id == session_id))
+        rows = [
+            {"session_id": session_id, "event_type": event_type, "user_id": user_id,
+             "count": count, "first_time": first, "last_time": last}
+            for event_type, (count, first, last) in raw_totals(db, session_id).items()
+        ]
+        if rows:
+            _upsert(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def session_ids(db: Session, user_id: Optional[int] = None) -> List[str]:
+    query = select(ExamSession.id).order_by(ExamSession.started_at)
+    if user_id is not None:
+        query = query.where(ExamSession.user_id == user_id)
+    return list(db.scalars(query))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check or rebuild per-session event aggregates")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute aggregates from logs and spans")
+    parser.add_argument("--check", action="store_true", help="Report aggregates that differ, exit 1 if any")
+    parser.add_argument("--user-id", type=int, help="Only this user's sessions")
+    parser.add_argument("--session-id", help="Only this session")
+    args = parser.parse_args(argv)
+    if not (args.check or args.rebuild):
+        parser.error("Pass --check and/or --rebuild")
+
+    from config.database import SessionLocal
+    db = SessionLocal()
+    try:
+        sessions = [args.session_id] if args.session_id else session_ids(db, args.user_id)
+        mismatches = []
+        for session_id in sessions:
+            if args.rebuild:
+                rebuild(db, session_id)
+            if args.check:
+                mismatches.extend(check(db, session_id))
+    finally:
+        db.close()
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}", file=sys.stderr)
+    logger.info(f"Event aggregates {'rebuilt' if args.rebuild else 'checked'} for {len(sessions)} sessions")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
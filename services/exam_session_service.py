@@ -0,0 +1,97 @@
+import secrets
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from models.event_aggregates import EventAggregate
+from models.event_spans import EventSpan
+from models.exam_sessions import ExamSession
+from models.logs import Log
+from utils.logger import logger
+
+CREATED = "created"
+RUNNING = "running"
+PAUSED = "paused"
+ENDED = "ended"
+
+class ExamSessionService:
+    @staticmethod
+    def create(db: Session, user_id: int, profile: str = "standard", session_id: Optional[str] = None) -> ExamSession:
+        """Record a new exam session; the user's earlier open sessions are ended"""
+        now = datetime.utcnow()
+        for previous in ExamSessionService.open_sessions(db, user_id):
+            previous.status, previous.ended_at = ENDED, now
+        exam_session = ExamSession(
+            id=session_id or secrets.token_hex(16),
+            user_id=user_id,
+            started_at=now,
+            status=CREATED,
+            detector_profile=profile
+        )
+        db.add(exam_session)
+        db.commit()
+        return exam_session
+
+    @staticmethod
+    def open_sessions(db: Session, user_id: int) -> List[ExamSession]:
+        return db.query(ExamSession).filter(
+            ExamSession.user_id == user_id,
+            ExamSession.status != ENDED
+        ).order_by(ExamSession.started_at.desc()).all()
+
+    @staticmethod
+    def user_sessions(db: Session, user_id: int) -> List[ExamSession]:
+        return db.query(ExamSession).filter(
+            ExamSession.user_id == user_id
+        ).order_by(ExamSession.started_at.desc()).all()
+
+    @staticmethod
+    def current(db: Session, user_id: int) -> Optional[ExamSession]:
+        """The user's latest session that has not ended"""
+        open_sessions = ExamSessionService.open_sessions(db, user_id)
+        return open_sessions[0] if open_sessions else None
+
+    @staticmethod
+    def get(db: Session, session_id: str) -> Optional[ExamSession]:
+        return db.get(ExamSession, session_id)
+
+    @staticmethod
+    def for_connection(db: Session, user_id: int, session_id: Optional[str] = None) -> ExamSession:
+        """Session a WebSocket's events belong to.
+
+        The session the client was given at /start if it names one, otherwise
+        the user's open session; clients connecting without /start get a new one.
+        """
+        exam_session = ExamSessionService.get(db, session_id) if session_id else None
+        if exam_session is None or exam_session.user_id != user_id or exam_session.status == ENDED:
+            exam_session = ExamSessionService.current(db, user_id)
+        if exam_session is None:
+            logger.info(f"User {user_id} connected without starting a session, creating one")
+            exam_session = ExamSessionService.create(db, user_id)
+        if exam_session.status == CREATED:
+            ExamSessionService.set_status(db, exam_session, RUNNING)
+        return exam_session
+
+    @staticmethod
+    def set_status(db: Session, exam_session: ExamSession, status: str):
+        exam_session.status = status
+        if status == ENDED:
+            exam_session.ended_at = datetime.utcnow()
+        try:
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error updating exam session {exam_session.id}: {str(e)}")
+            db.rollback()
+
+    @staticmethod
+    def delete(db: Session, exam_session: ExamSession) -> int:
+        """Delete a session and its rows, touching only that session; returns the events deleted"""
+        try:
+            deleted = db.query(Log).filter(Log.session_id == exam_session.id).delete()
+            deleted += db.query(EventSpan).filter(EventSpan.session_id == exam_session.id).delete()
+            db.query(EventAggregate).filter(EventAggregate.session_id == exam_session.id).delete()
+            db.delete(exam_session)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
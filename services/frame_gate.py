@@ -0,0 +1,46 @@
+import time
+from typing import Optional
+import cv2
+import numpy as np
+
+class FrameChangeGate:
+    """Skips frames that barely differ from the last analysed one"""
+
+    def __init__(self, threshold: float, max_skip_seconds: float, thumb_size=(32, 24)):
+        self.threshold = threshold
+        self.max_skip_seconds = max_skip_seconds
+        self.thumb_size = thumb_size
+        self._reference: Optional[np.ndarray] = None
+        self._reference_time = 0.0
+        self.frames = 0
+        self.skipped = 0
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        # Shrink before converting so the colour conversion touches ~800 pixels
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def should_skip(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """True when the frame is close enough to the last analysed frame to reuse its results"""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        thumb = self.thumbnail(frame)
+
+        if self._reference is not None and now - self._reference_time < self.max_skip_seconds:
+            # Mean absolute difference in grey levels (0-255)
+            if float(np.abs(thumb - self._reference).mean()) < self.threshold:
+                self.skipped += 1
+                return True
+
+        # Compare against the analysed frame, not the previous one, so slow drift still registers
+        self._reference = thumb
+        self._reference_time = now
+        return False
+
+    def reset(self):
+        """Forget the reference frame so the next frame is analysed"""
+        self._reference = None
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional
+
+QUEUE_POLICIES = ("latest", "block")
+
+class FrameQueue:
+    """Bounded per-session buffer between the socket receiver and the frame processor.
+
+    With the "latest" policy a full queue drops its oldest frame so the
+    processor always works on the newest one; "block" makes the receiver wait,
+    pushing backpressure into the socket.
+    """
+
+    def __init__(self, max_size: int, policy: str = "latest"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown frame queue policy: {policy}")
+        self.max_size = max(1, max_size)
+        self.policy = policy
+        self.closed = False
+        self.received = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._items: deque = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    async def put(self, item: Any) -> bool:
+        """Queue a frame; False once the queue is closed"""
+        if self.closed:
+            return False
+        self.received += 1
+        while len(self._items) >= self.max_size:
+            if self.policy == "latest":
+                self._items.popleft()
+                self.dropped += 1
+            else:
+                self._not_full.clear()
+                await self._not_full.wait()
+                if self.closed:
+                    return False
+        self._items.append(item)
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> Optional[Any]:
+        """Next frame, waiting for one; None once closed and drained"""
+        while not self._items:
+            if self.closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        item = self._items.popleft()
+        self._not_full.set()
+        return item
+
+    def close(self):
+        """Stop accepting frames and wake any waiters"""
+        self.closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "received": self.received,
+            "dropped": self.dropped,
+            "drop_ratio": round(self.dropped / self.received, 3) if self.received else 0.0,
+        }
@@ -0,0 +1,148 @@
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from utils.logger import logger
+
+class FrameRef(NamedTuple):
+    """Small picklable handle to a frame stored in a ring slot"""
+    name: str
+    slot: int
+    generation: int
+    offset: int  # Byte offset of the frame data in the segment
+    shape: tuple
+    dtype: str
+
+class StaleFrameError(RuntimeError):
+    """The slot was reclaimed and rewritten while a worker was reading it"""
+
+class FrameRing:
+    """Fixed-size frame slots in shared memory, written by the front-end and read by workers.
+
+    The owning process hands out slots and releases them once the worker's
+    result is back. Each slot carries a generation counter in the segment
+    header; workers check it after reading, so a slot reclaimed from a
+    crashed or cancelled call is detected instead of returning results for
+    the wrong frame.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, lease_seconds: float = 30.0):
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes
+        self.lease_seconds = lease_seconds
+        self._header_bytes = self.slots * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=self._header_bytes + self.slots * slot_bytes)
+        self.name = self.shm.name
+        self._generations = np.ndarray((self.slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._generations[:] = 0
+        self._free: List[int] = list(range(self.slots))
+        self._leases: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.bytes_written = 0
+        self.fallbacks = 0
+        self.reclaimed = 0
+
+    def _offset(self, slot: int) -> int:
+        return self._header_bytes + slot * self.slot_bytes
+
+    def reclaim_expired(self, now: Optional[float] = None) -> int:
+        """Free slots whose lease ran out, e.g. after a lost release"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [slot for slot, since in self._leases.items() if now - since > self.lease_seconds]
+            for slot in expired:
+                del self._leases[slot]
+                self._generations[slot] += 1  # Readers of the old frame see it as stale
+                self._free.append(slot)
+        if expired:
+            self.reclaimed += len(expired)
+            logger.warning(f"Reclaimed {len(expired)} expired frame ring slots")
+        return len(expired)
+
+    def put(self, frame: np.ndarray, now: Optional[float] = None) -> Optional[FrameRef]:
+        """Copy a frame into a free slot; None when it doesn't fit or the ring is full"""
+        now = time.monotonic() if now is None else now
+        if frame.nbytes > self.slot_bytes:
+            self.fallbacks += 1
+            return None
+        with self._lock:
+            slot = self._free.pop() if self._free else None
+        if slot is None and self.reclaim_expired(now):
+            with self._lock:
+                slot = self._free.pop() if self._free else None
+        if slot is None:
+            self.fallbacks += 1
+            return None
+
+        with self._lock:
+            self._generations[slot] += 1
+            generation = int(self._generations[slot])
+            self._leases[slot] = now
+        offset = self._offset(slot)
+        target = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.shm.buf, offset=offset)
+        target[...] = frame  # The only copy between decode and inference
+        self.writes += 1
+        self.bytes_written += frame.nbytes
+        return FrameRef(self.name, slot, generation, offset, frame.shape, frame.dtype.str)
+
+    def release(self, ref: FrameRef):
+        with self._lock:
+            if self._leases.pop(ref.slot, None) is not None and int(self._generations[ref.slot]) == ref.generation:
+                self._free.append(ref.slot)
+
+    @property
+    def in_use(self) -> int:
+        return len(self._leases)
+
+    def stats(self) -> Dict:
+        return {
+            "slots": self.slots,
+            "in_use": self.in_use,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "fallbacks": self.fallbacks,
+            "reclaimed": self.reclaimed,
+            # Frame copies per stage: ring write in the front-end, none in the worker,
+            # pickling and unpickling for frames that didn't fit
+            "copies": {"ring_write": self.writes, "worker_read": 0, "pickled": self.fallbacks * 2},
+        }
+
+    def close(self):
+        self._generations = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+# Worker side: segments attached by name, kept for the life of the process
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+def _generation(shm: shared_memory.SharedMemory, slot: int) -> int:
+    return int(np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=slot * 8)[0])
+
+def read_frame(ref: FrameRef) -> np.ndarray:
+    """Zero-copy, read-only view of a frame in a ring slot"""
+    shm = _attach(ref.name)
+    if _generation(shm, ref.slot) != ref.generation:
+        raise StaleFrameError(f"Frame ring slot {ref.slot} was reused")
+    frame = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf, offset=ref.offset)
+    frame.flags.writeable = False
+    return frame
+
+def run_with_frame(fn, ref: FrameRef, *args):
+    """Worker entry point: fn(frame, *args) on a frame read from the ring"""
+    frame = read_frame(ref)
+    result = fn(frame, *args)
+    if _generation(_attach(ref.name), ref.slot) != ref.generation:
+        # Reclaimed mid-read, the result may mix two frames
+        raise StaleFrameError(f"Frame ring slot {ref.slot} was reused during detection")
+    return result
@@ -1,58 +1,133 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
+from models.event_aggregates import EventAggregate
+from models.event_types import EventType
 from models.logs import Log
+from schemas.exam import ExamSummary
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 from utils.logger import logger
+from services.log_writer import log_writer
+from services.event_aggregates import record_events
+from services.span_tracker import SpanTracker, event_type_of
+
+# Session lifecycle events that are not detections
+PAUSE_EVENTS = ("session_paused", "session_resumed")
+# Written as logs rows; detection events are stored as spans
+LIFECYCLE_EVENTS = PAUSE_EVENTS + ("session_ended",)
+
+class EventTotals(NamedTuple):
+    count: int
+    first: datetime
+    last: datetime
+
+def paused_seconds(events: Iterable[Tuple[datetime, str]], until: datetime) -> float:
+    """Time spent paused given (timestamp, event_type) pause/resume events in time order"""
+    total = 0.0
+    paused_at = None
+    for timestamp, event_type in events:
+        if event_type == "session_paused" and paused_at is None:
+            paused_at = timestamp
+        elif event_type == "session_resumed" and paused_at is not None:
+            total += (timestamp - paused_at).total_seconds()
+            paused_at = None
+    if paused_at is not None and until > paused_at:
+        total += (until - paused_at).total_seconds()  # Still paused
+    return total
 
 class LogService:
     @staticmethod
-    async def store_logs(db: Session, user_id: int, logs: list) -> list:
-        if not logs:
-            return []
+    def add_session_event(db: Session, user_id: int, log: str, event_type: str, session_id: Optional[str] = None):
+        """Store a session lifecycle event such as a pause"""
+        row = {"log": log, "event_type": event_type, "timestamp": datetime.utcnow(),
+               "user_id": user_id, "session_id": session_id}
+        try:
+            db.add(Log(**row))
+            record_events(db, [row])
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error storing {event_type} event: {str(e)}")
+            db.rollback()
 
-        logger.info(f"Attempting to store {len(logs)} logs for user {user_id}")
-        log_entries = []
+    @staticmethod
+    def store_logs(spans: SpanTracker, logs: List[Dict], now: Optional[datetime] = None) -> List[Dict]:
+        """Merge a frame's detection events into the session's spans; queues and returns the closed spans"""
+        unknown = [log["event"] for log in logs if not EventType.is_known(event_type_of(log["event"]))]
+        if unknown:
+            # A row the database cannot store would fail every flush it is part of
+            logger.error(f"Dropping events without an EventType code: {unknown}")
+            logs = [log for log in logs if log["event"] not in unknown]
+        closed = spans.update(logs, now or datetime.utcnow())
+        if closed:
+            log_writer.add(closed)
+            logger.debug(f"Queued {len(closed)} event spans for user {spans.user_id}")
+        return closed
 
-        try:
-            # Create all log entries first
-            for log_entry in logs:
-                try:
-                    db_log = Log(
-                        log=log_entry["event"],
-                        event_type=log_entry["event"].lower().replace(" ", "_"),
-                        timestamp=datetime.utcnow(),
-                        user_id=user_id
-                    )
-                    log_entries.append(db_log)
-                    logger.debug(f"Created log entry: {log_entry}")
-                except Exception as e:
-                    logger.error(f"Error creating log entry: {str(e)}")
-                    continue
-
-            if log_entries:
-                try:
-                    # Add all entries to session
-                    for entry in log_entries:
-                        db.add(entry)
-                    
-                    # Commit transaction
-                    db.flush()  # Flush changes to DB
-                    db.commit()  # Commit transaction
-                    logger.info(f"Successfully stored {len(log_entries)} logs")
-                    
-                    # Refresh entries to get their IDs
-                    for entry in log_entries:
-                        db.refresh(entry)
-                        
-                    return log_entries
-                except Exception as e:
-                    logger.error(f"Database error: {str(e)}", exc_info=True)
-                    db.rollback()
-                    return []
+    @staticmethod
+    def close_spans(spans: SpanTracker) -> List[Dict]:
+        """Queue a session's open spans, e.g. when it ends or pauses"""
+        closed = spans.close()
+        if closed:
+            log_writer.add(closed)
+        return closed
 
-        except Exception as e:
-            logger.error(f"Transaction error: {str(e)}", exc_info=True)
-            if 'db' in locals():
-                db.rollback()
+    @staticmethod
+    def event_totals(
+        db: Session, user_id: Optional[int] = None, session_id: Optional[str] = None
+    ) -> Dict[str, EventTotals]:
+        """Occurrences and first/last time per event type for one session, or all of a user's"""
+        query = db.query(
+            EventAggregate.event_type, func.sum(EventAggregate.count),
+            func.min(EventAggregate.first_time), func.max(EventAggregate.last_time)
+        )
+        if session_id is not None:
+            query = query.filter(EventAggregate.session_id == session_id)
+        else:
+            query = query.filter(EventAggregate.user_id == user_id)
+        rows = query.group_by(EventAggregate.event_type).all()
+        return {event_type: EventTotals(int(count), first, last) for event_type, count, first, last in rows}
+
+    @staticmethod
+    def pause_events(
+        db: Session, totals: Dict[str, EventTotals], user_id: Optional[int] = None, session_id: Optional[str] = None
+    ) -> List[Tuple[datetime, str]]:
+        """Pause and resume events in time order; skips the query for sessions never paused"""
+        if "session_paused" not in totals:
             return []
+        query = db.query(Log.timestamp, Log.event_type).filter(Log.event_type.in_(PAUSE_EVENTS))
+        if session_id is not None:
+            query = query.filter(Log.session_id == session_id)
+        else:
+            query = query.filter(Log.user_id == user_id)
+        return query.order_by(Log.timestamp).all()
+
+    @staticmethod
+    def summarize(totals: Dict[str, EventTotals], pause_events: List[Tuple[datetime, str]]) -> ExamSummary:
+        """Exam summary from event totals, excluding time spent paused"""
+        totals = {event_type: total for event_type, total in totals.items() if event_type != "session_stopped"}
+        start_time = min(total.first for total in totals.values())
+        end_time = max(total.last for total in totals.values())
+        paused = paused_seconds(pause_events, end_time)
+        duration = ((end_time - start_time).total_seconds() - paused) / 60  # in minutes
+        counts = {event_type: total.count for event_type, total in totals.items() if event_type not in PAUSE_EVENTS}
+
+        # Count suspicious activities
+        total_checks = sum(counts.values())
+        face_detections = counts.get("face_detected", 0)
+        non_suspicious_events = {"face_detected", "session_stopped"}
+        suspicious_activities = {
+            event_type: count for event_type, count in counts.items()
+            if event_type not in non_suspicious_events
+        }
+
+        # Calculate compliance
+        face_detection_rate = (face_detections / total_checks) * 100 if total_checks > 0 else 0
+        suspicious_weight = sum(suspicious_activities.values())
+        overall_compliance = max(0, face_detection_rate - (suspicious_weight / total_checks * 20)) if total_checks else 0
 
-        return []
+        return ExamSummary(
+            total_duration=round(duration, 2),
+            face_detection_rate=round(face_detection_rate, 2),
+            suspicious_activities=suspicious_activities,
+            overall_compliance=round(overall_compliance, 2)
+        )
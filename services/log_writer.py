@@ -0,0 +1,147 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.event_spans import EventSpan
+from models.logs import Log
+from config.database import SessionLocal
+from config.settings import settings
+from services.event_aggregates import record_events
+from utils.logger import logger
+
+class BulkLogWriter:
+    """Write-behind buffer for rows of one table (model), from all sessions.
+
+    Rows are queued in memory and written as multi-row INSERTs, at the latest
+    every flush_seconds or as soon as max_batch rows are waiting. A failed
+    flush puts its rows back; beyond max_backlog the oldest rows are dropped
+    so a database outage cannot exhaust memory.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_batch: int,
+        flush_seconds: float,
+        max_backlog: int,
+        model=Log,
+        on_write: Optional[Callable[[Session, List[Dict]], None]] = None
+    ):
+        self.session_factory = session_factory
+        self.model = model
+        self.on_write = on_write  # Runs in the same transaction as the inserts
+        self.max_batch = max(1, max_batch)
+        self.flush_seconds = flush_seconds
+        self.max_backlog = max(self.max_batch, max_backlog)
+        self._rows: List[Dict] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    @property
+    def backlog(self) -> int:
+        return len(self._rows)
+
+    def add(self, rows: List[Dict]):
+        """Queue rows (column values of the writer's model) for the next flush"""
+        self._rows.extend(rows)
+        self._trim()
+        if len(self._rows) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+
+    def _trim(self):
+        overflow = len(self._rows) - self.max_backlog
+        if overflow > 0:
+            del self._rows[:overflow]
+            self.rows_dropped += overflow
+            logger.error(f"Log backlog over {self.max_backlog} rows, dropped {overflow} oldest")
+
+    def _write(self, rows: List[Dict]):
+        db = self.session_factory()
+        try:
+            for start in range(0, len(rows), self.max_batch):
+                db.execute(insert(self.model).values(rows[start:start + self.max_batch]))
+            if self.on_write:
+                self.on_write(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            rows, self._rows = self._rows, []
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Log flush of {len(rows)} rows failed: {str(e)}")
+                self._rows[:0] = rows  # Retry with the next flush, oldest first
+                self._trim()
+                return 0
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "backlog": self.backlog,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "failures": self.failures,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            "max_flush_ms": round(self.max_flush_ms, 1),
+        }
+
+# Detection events are stored as spans; lifecycle events are written to logs directly
+log_writer = BulkLogWriter(
+    session_factory=SessionLocal,
+    max_batch=settings.LOG_FLUSH_BATCH,
+    flush_seconds=settings.LOG_FLUSH_SECONDS,
+    max_backlog=settings.LOG_MAX_BACKLOG,
+    model=EventSpan,
+    on_write=record_events
+)
@@ -0,0 +1,97 @@
+import time
+from typing import Dict, List, Optional
+
+class RateController:
+    """Per-session frame rate, resolution and JPEG quality targets for the client.
+
+    Levels run from best quality (0) to cheapest. Pressure is the larger of
+    the server load (executor work per worker) and this session's smoothed
+    processing latency relative to the budget; high pressure steps one level
+    down, low pressure one level up, at most once per update interval.
+    """
+
+    def __init__(
+        self,
+        levels: List[Dict],
+        latency_budget_ms: float,
+        update_seconds: float,
+        high_pressure: float = 1.0,
+        low_pressure: float = 0.6,
+        level: int = 0
+    ):
+        if not levels:
+            raise ValueError("At least one rate level is required")
+        self.levels = levels
+        self.latency_budget_ms = latency_budget_ms
+        self.update_seconds = update_seconds
+        self.high_pressure = high_pressure
+        self.low_pressure = low_pressure
+        self.level = min(max(0, level), len(levels) - 1)
+        self.latency_ms: Optional[float] = None
+        self.accepted = 0
+        self.throttled = 0
+        self.changes = 0
+        self._last_update = None
+        self._last_accepted = None
+
+    @property
+    def targets(self) -> Dict:
+        return dict(self.levels[self.level])
+
+    def observe(self, latency_ms: float, alpha: float = 0.3):
+        """Fold one frame's processing time into the moving average"""
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += alpha * (latency_ms - self.latency_ms)
+
+    def pressure(self, load: float) -> float:
+        latency = (self.latency_ms or 0.0) / self.latency_budget_ms if self.latency_budget_ms else 0.0
+        return max(load, latency)
+
+    def update(self, load: float, now: Optional[float] = None) -> Optional[Dict]:
+        """New targets when the level changed, otherwise None"""
+        now = time.monotonic() if now is None else now
+        if self._last_update is not None and now - self._last_update < self.update_seconds:
+            return None
+        self._last_update = now
+
+        pressure = self.pressure(load)
+        level = self.level
+        if pressure > self.high_pressure:
+            level = min(level + 1, len(self.levels) - 1)
+        elif pressure < self.low_pressure:
+            level = max(level - 1, 0)
+        if level == self.level:
+            return None
+        self.level = level
+        self.changes += 1
+        return self.targets
+
+    def allow(self, now: Optional[float] = None, slack: float = 0.2) -> bool:
+        """Whether a frame fits the target fps; clients sending faster are throttled"""
+        now = time.monotonic() if now is None else now
+        min_interval = (1 - slack) / self.targets["targetFps"]
+        if self._last_accepted is not None and now - self._last_accepted < min_interval:
+            self.throttled += 1
+            return False
+        self._last_accepted = now
+        self.accepted += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            **self.targets,
+            "level": self.level,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "accepted_frames": self.accepted,
+            "throttled_frames": self.throttled,
+            "target_changes": self.changes,
+        }
+
+def initial_level(levels: List[Dict], load: float) -> int:
+    """Starting level for a new session given the current server load"""
+    if load <= 0.5:
+        return 0
+    # Every extra half worker of queued work starts one level lower
+    return min(len(levels) - 1, int((load - 0.5) / 0.5) + 1)
@@ -0,0 +1,80 @@
+import json
+import time
+from typing import Dict, Iterable, Optional, Set, Union
+from utils.logger import logger
+
+try:
+    import msgpack
+except ImportError:  # Optional, clients fall back to JSON
+    msgpack = None
+
+STREAM_MODES = ("full", "delta")
+ENCODINGS = ("json", "msgpack")
+
+class ResultStream:
+    """Turns per-frame detection events into coalesced state transitions.
+
+    The first change after a quiet period is sent at once; further changes
+    within window_seconds are folded into one message carrying the net
+    difference, so an event that flickers on and off inside the window is
+    never sent.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._active: Set[str] = set()  # As of the latest frame
+        self._sent: Set[str] = set()  # As last told to the client
+        self._last_flush: Optional[float] = None
+        self.frames = 0
+        self.messages = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._active != self._sent
+
+    def update(self, events: Iterable[str], now: Optional[float] = None) -> Optional[Dict]:
+        """Record the events seen on a frame; returns a message when one is due"""
+        self._active = set(events)
+        self.frames += 1
+        return self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> Optional[Dict]:
+        """Message with the changes since the last one, once the window allows it"""
+        now = time.monotonic() if now is None else now
+        if not self.pending:
+            return None
+        if self._last_flush is not None and now - self._last_flush < self.window_seconds:
+            return None
+        message = {
+            "type": "events",
+            "started": sorted(self._active - self._sent),
+            "ended": sorted(self._sent - self._active),
+            "active": sorted(self._active),
+        }
+        self._sent = set(self._active)
+        self._last_flush = now
+        self.messages += 1
+        return message
+
+    def wait_timeout(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until pending changes may be flushed, None when nothing is pending"""
+        if not self.pending:
+            return None
+        if self._last_flush is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.window_seconds - (now - self._last_flush))
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Encoding for outbound messages; unknown or unavailable encodings fall back to JSON"""
+    if requested == "msgpack":
+        if msgpack is not None:
+            return "msgpack"
+        logger.warning("Client requested msgpack but it is not installed, using JSON")
+    return "json"
+
+def encode_message(message: Dict, encoding: str) -> Union[str, bytes]:
+    """Text frame for JSON, binary frame for MessagePack"""
+    if encoding == "msgpack":
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message)
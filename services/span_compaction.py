@@ -0,0 +1,103 @@
+"""Offline compaction of per-frame detection logs into event spans.
+
+Detections used to be stored as one logs row per event per frame. This job
+replays those rows through SpanTracker, writes the resulting spans and
+deletes the rows it converted; lifecycle events stay in logs.
+
+    python -m services.span_compaction
+    python -m services.span_compaction --user-id 42 --dry-run
+"""
+import argparse
+import itertools
+import sys
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from models.event_spans import EventSpan
+from models.logs import Log
+from services.log_service import LIFECYCLE_EVENTS
+from services.span_tracker import SpanTracker
+from config.settings import settings
+from utils.logger import logger
+
+def _detection_rows(user_id: int):
+    return (Log.user_id == user_id) & Log.event_type.notin_(LIFECYCLE_EVENTS)
+
+def spans_for_rows(
+    user_id: int, rows, max_gap_seconds: float, max_span_seconds: float, session_id: Optional[str] = None
+) -> List[Dict]:
+    """Spans for one session's (timestamp, log) rows in time order.
+
+    Rows of one frame share a timestamp. Frames without any event left no
+    rows, so a span only ends there once the gap exceeds max_gap_seconds.
+    """
+    tracker = SpanTracker(user_id, max_gap_seconds, max_span_seconds, session_id)
+    spans = []
+    for timestamp, frame in itertools.groupby(rows, key=lambda row: row[0]):
+        spans.extend(tracker.update([{"event": log} for _, log in frame], timestamp))
+    spans.extend(tracker.close())
+    return spans
+
+def compact_user(
+    db: Session,
+    user_id: int,
+    max_gap_seconds: float,
+    max_span_seconds: float,
+    batch_size: int = 500,
+    dry_run: bool = False
+) -> Dict:
+    """Convert one user's detection rows into spans in a single transaction; spans never cross sessions"""
+    rows = db.execute(
+        select(Log.session_id, Log.timestamp, Log.log).where(_detection_rows(user_id))
+        .order_by(Log.session_id, Log.timestamp, Log.id)
+    ).all()
+    spans = []
+    for session_id, session_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        frames = [(timestamp, log) for _, timestamp, log in session_rows]
+        spans.extend(spans_for_rows(user_id, frames, max_gap_seconds, max_span_seconds, session_id))
+    if not dry_run and rows:
+        try:
+            for start in range(0, len(spans), batch_size):
+                db.execute(insert(EventSpan).values(spans[start:start + batch_size]))
+            db.execute(delete(Log).where(_detection_rows(user_id)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return {"user_id": user_id, "rows": len(rows), "spans": len(spans)}
+
+def compact(db: Session, user_id: Optional[int] = None, dry_run: bool = False) -> List[Dict]:
+    """Compact every user with detection rows, or just user_id"""
+    if user_id is None:
+        user_ids = db.scalars(
+            select(Log.user_id).where(Log.event_type.notin_(LIFECYCLE_EVENTS)).distinct()
+        ).all()
+    else:
+        user_ids = [user_id]
+    reports = []
+    for uid in user_ids:
+        report = compact_user(db, uid, settings.SPAN_MAX_GAP_SECONDS, settings.SPAN_MAX_SECONDS, dry_run=dry_run)
+        logger.info(f"Compacted {report['rows']} log rows into {report['spans']} spans for user {uid}")
+        reports.append(report)
+    return reports
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert per-frame detection logs into event spans")
+    parser.add_argument("--user-id", type=int, help="Only compact this user's logs")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be converted")
+    args = parser.parse_args(argv)
+
+    from config.database import SessionLocal
+    db = SessionLocal()
+    try:
+        reports = compact(db, args.user_id, args.dry_run)
+    finally:
+        db.close()
+    rows = sum(report["rows"] for report in reports)
+    spans = sum(report["spans"] for report in reports)
+    print(f"{'Would convert' if args.dry_run else 'Converted'} {rows} rows into {spans} spans "
+          f"for {len(reports)} users")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
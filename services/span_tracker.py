@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+def event_type_of(event: str) -> str:
+    """Stored event type for an event text, e.g. "Hand detected" -> "hand_detected" """
+    return event.lower().replace(" ", "_")
+
+def _peak(current: Optional[float], confidence: Optional[float]) -> Optional[float]:
+    if confidence is None:
+        return current
+    return confidence if current is None else max(current, confidence)
+
+class SpanTracker:
+    """Merges one session's per-frame detection events into spans.
+
+    An event type present on consecutive analysed frames extends a single
+    open span. The span is closed by the first frame without it, by a gap of
+    more than max_gap_seconds between frames (e.g. a pause), or once it
+    covers max_span_seconds, so long runs are still stored regularly.
+    Closed spans are returned as EventSpan column values.
+    """
+
+    def __init__(
+        self, user_id: int, max_gap_seconds: float, max_span_seconds: float, session_id: Optional[str] = None
+    ):
+        self.user_id = user_id
+        self.session_id = session_id  # Exam session the spans belong to
+        self.max_gap = timedelta(seconds=max_gap_seconds)
+        self.max_span = timedelta(seconds=max_span_seconds)
+        self._open: Dict[str, Dict] = {}
+
+    @property
+    def open_spans(self) -> int:
+        return len(self._open)
+
+    def update(self, events: List[Dict], now: datetime) -> List[Dict]:
+        """Apply one analysed frame's events; returns the spans it closed"""
+        frame: Dict[str, Dict] = {}
+        for event in events:
+            entry = frame.setdefault(event_type_of(event["event"]), {"log": event["event"], "count": 0, "peak": None})
+            entry["count"] += 1
+            entry["peak"] = _peak(entry["peak"], event.get("confidence"))
+
+        closed = []
+        for event_type, span in list(self._open.items()):
+            if (event_type not in frame
+                    or now - span["end_time"] > self.max_gap
+                    or span["end_time"] - span["start_time"] >= self.max_span):
+                closed.append(self._open.pop(event_type))
+
+        for event_type, entry in frame.items():
+            span = self._open.get(event_type)
+            if span is None:
+                self._open[event_type] = {
+                    "user_id": self.user_id,
+                    "session_id": self.session_id,
+                    "event_type": event_type,
+                    "log": entry["log"],
+                    "start_time": now,
+                    "end_time": now,
+                    "count": entry["count"],
+                    "peak_confidence": entry["peak"],
+                }
+            else:
+                span["end_time"] = now
+                span["count"] += entry["count"]
+                span["peak_confidence"] = _peak(span["peak_confidence"], entry["peak"])
+        return closed
+
+    def close(self) -> List[Dict]:
+        """Close every open span, e.g. when the session ends or pauses"""
+        closed = list(self._open.values())
+        self._open.clear()
+        return closed
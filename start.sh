@@ -4,5 +4,11 @@ if [ -z "$JWT_SECRET_KEY" ]; then
     export JWT_SECRET_KEY=$(python -c 'import secrets; print(secrets.token_hex(64))')
 fi
 
+# Several workers need shared session state so any worker can reach any connection
+WORKERS=${WEB_CONCURRENCY:-1}
+if [ "$WORKERS" -gt 1 ] && [ -z "$SESSION_STATE_BACKEND" ]; then
+    export SESSION_STATE_BACKEND=sqlite
+fi
+
 # Start the application using uvicorn
-exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8080} --workers 1
\ No newline at end of file
+exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8080} --workers $WORKERS
@@ -0,0 +1,56 @@
+import pytest
+from services.admission import ADMIT, DEGRADED, REJECT, AdmissionController
+
+def make_controller(session_cost=0.1):
+    return AdmissionController(
+        workers=2,
+        session_cost=session_cost,
+        degrade={"utilisation": 0.7, "cpu": 0.8, "queue": 1.0},
+        reject={"utilisation": 0.95, "cpu": 1.5, "queue": 3.0},
+        retry_after=30
+    )
+
+@pytest.mark.parametrize("sessions,cpu,queue,expected", [
+    (5, 0.1, 0.0, ADMIT),      # 6 * 0.1 / 2 = 0.3
+    (13, 0.1, 0.0, DEGRADED),  # 0.7
+    (19, 0.1, 0.0, REJECT),    # 1.0
+    (0, 0.9, 0.0, DEGRADED),
+    (0, 0.1, 3.5, REJECT),
+])
+def test_decide_thresholds(sessions, cpu, queue, expected):
+    admission = make_controller().decide(sessions, cpu, queue)
+    assert admission.decision == expected
+    assert admission.admitted == (expected != REJECT)
+    assert (admission.retry_after == 30) == (expected == REJECT)
+
+def test_session_cost_is_learned_from_busy_time():
+    controller = make_controller(session_cost=0.1)
+    controller.observe(busy_seconds=0.0, sessions=4, now=0.0)
+    controller.observe(busy_seconds=1.0, sessions=4, now=2.0)  # Too soon to sample
+    assert controller.session_cost == 0.1
+    controller.observe(busy_seconds=10.0, sessions=4, now=10.0)  # 1 worker-second per second / 4 sessions
+    assert controller.session_cost == pytest.approx(0.1 + 0.3 * (0.25 - 0.1))
+
+def test_idle_periods_do_not_change_cost():
+    controller = make_controller(session_cost=0.1)
+    controller.observe(busy_seconds=0.0, sessions=0, now=0.0)
+    controller.observe(busy_seconds=0.0, sessions=0, now=60.0)
+    assert controller.session_cost == 0.1
+
+def test_stats_report_capacity_and_decisions():
+    controller = make_controller(session_cost=0.1)
+    controller.decide(0, 0.0, 0.0)
+    stats = controller.stats(sessions=0)
+    assert stats["capacity"] == 19 and stats["decisions"][ADMIT] == 1
+
+def test_grant_is_claimed_once_and_expires():
+    controller = make_controller()
+    degraded = controller.decide(13, 0.1, 0.0)
+    controller.grant(7, degraded, now=0.0)
+    controller.grant(8, degraded, now=0.0)
+    assert controller.pending(now=1.0) == 2
+    assert controller.claim(7, now=1.0) == degraded
+    assert controller.claim(7, now=1.0) is None  # Decided once
+    assert controller.claim(8, now=61.0) is None  # Never connected
+    assert controller.pending(now=61.0) == 0
+    assert controller.decisions[DEGRADED] == 1
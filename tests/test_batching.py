@@ -0,0 +1,45 @@
+import time
+import pytest
+from detection.batching import MicroBatcher
+
+class RecordingPredict:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, images):
+        self.batches.append(list(images))
+        if self.fail:
+            raise RuntimeError("predict failed")
+        return [image * 10 for image in images]
+
+def test_full_batch_flushes_before_the_deadline():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch=3, max_wait_ms=5000, max_callers=4)
+    started = time.monotonic()
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [f.result(timeout=2) for f in futures] == [0, 10, 20]  # Scattered back in order
+    assert time.monotonic() - started < 2
+    assert predict.batches == [[0, 1, 2]]
+    batcher.stop()
+
+def test_partial_batch_flushes_at_the_deadline():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch=8, max_wait_ms=50, max_callers=8)
+    started = time.monotonic()
+    futures = [batcher.submit(i) for i in range(2)]
+    assert [f.result(timeout=2) for f in futures] == [0, 10]
+    assert time.monotonic() - started >= 0.04
+    assert predict.batches == [[0, 1]]
+    batcher.stop()
+
+def test_batch_size_is_capped_by_callers():
+    assert MicroBatcher(RecordingPredict(), max_batch=8, max_wait_ms=10, max_callers=2).max_batch == 2
+
+def test_predict_error_reaches_every_caller():
+    batcher = MicroBatcher(RecordingPredict(fail=True), max_batch=2, max_wait_ms=1000, max_callers=2)
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2)
+    batcher.stop()
@@ -0,0 +1,34 @@
+from benchmarks.detectors import percentile, compare_to_baseline, synthetic_frames, bench, gate_stats
+
+def test_percentile_interpolates():
+    samples = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(samples, 50) == 3.0
+    assert percentile(samples, 100) == 5.0
+    assert percentile([], 95) == 0.0
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"detect_face": {"p95_ms": 10.0}, "detect_yolo": {"p95_ms": 40.0}}
+    results = {
+        "detect_face": {"p95_ms": 10.5},  # +5%
+        "detect_yolo": {"p95_ms": 50.0},  # +25%
+        "detect_hands": {"p95_ms": 9.0},  # Not in baseline
+    }
+    regressions = compare_to_baseline(results, baseline, max_regression=0.10)
+    assert len(regressions) == 1 and regressions[0].startswith("detect_yolo")
+
+def test_synthetic_frames_are_deterministic():
+    first, second = synthetic_frames(2), synthetic_frames(2)
+    assert first[0].shape == (480, 640, 3)
+    assert (first[1] == second[1]).all()
+
+def test_bench_reports_all_metrics():
+    report = bench(lambda frame: frame.sum(), synthetic_frames(5), warmup=1)
+    assert report["frames"] == 5
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+    assert {"fps", "python_allocs_per_frame", "peak_rss_mb"} <= report.keys()
+
+def test_gate_stats_reports_skip_counters_only():
+    stats = {"analysed_frames": 6, "received_frames": 10, "skipped_frames": 4,
+             "skip_ratio": 0.4, "queue": {"dropped": 0}}
+    assert gate_stats(stats) == {"analysed_frames": 6, "received_frames": 10,
+                                 "skipped_frames": 4, "skip_ratio": 0.4}
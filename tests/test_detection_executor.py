@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from services.detection_executor import DetectionExecutor
+
+def make_executor(**kwargs):
+    options = {"backend": "thread", "max_workers": 4, "max_in_flight": 1, "torch_threads": 1}
+    options.update(kwargs)
+    return DetectionExecutor(**options)
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        make_executor(backend="gpu")
+
+def test_in_flight_limit_serialises_calls():
+    executor = make_executor(max_in_flight=1)
+    executor._executor = ThreadPoolExecutor(4)  # Skip detector pool health checks
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return "done"
+
+    async def scenario():
+        results = await asyncio.gather(*(executor.run(work) for _ in range(4)))
+        return results, executor.in_flight
+
+    results, in_flight = asyncio.run(scenario())
+    assert results == ["done"] * 4
+    assert peak[0] == 1 and in_flight == 0
+    assert executor.busy_seconds > 0
+    executor.shutdown()
+
+class BrokenExecutor:
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+def test_broken_process_pool_is_replaced(monkeypatch):
+    executor = make_executor(backend="process", max_in_flight=4)
+    broken = BrokenExecutor()
+    executor._executor = broken
+    monkeypatch.setattr(executor, "_create_executor", lambda: ThreadPoolExecutor(1))
+
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(sum, [1, 2])
+        return await executor.run(sum, [1, 2])
+
+    assert asyncio.run(scenario()) == 3
+    assert broken.shut_down and executor._executor is not broken
+    executor.shutdown()
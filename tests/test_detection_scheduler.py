@@ -0,0 +1,102 @@
+from services.detection_scheduler import (
+    GATED, DetectorCadence, DetectorScheduler, parse_cadences, cascade_allows
+)
+
+def face_logs(event="Face detected"):
+    return [{"time": "t0", "event": event}]
+
+def test_cadence_parses_frame_counts_and_milliseconds():
+    every_third = DetectorCadence("3")
+    assert every_third.every_frames == 3 and every_third.every_seconds == 0
+
+    half_second = DetectorCadence(" 500MS ")
+    assert half_second.every_seconds == 0.5
+
+    assert DetectorCadence("0").every_frames == 1
+
+def test_invalid_cadence_falls_back_to_every_frame():
+    cadences = parse_cadences({"yolo": "often"})
+    assert cadences["yolo"].every_frames == 1
+    assert cadences["hands"].every_frames == 1  # Missing entries default too
+
+def test_cadence_is_due_first_time_and_after_interval():
+    assert DetectorCadence("2").is_due(None, None)
+    assert not DetectorCadence("2").is_due(1, 0.0)
+    assert DetectorCadence("2").is_due(2, 0.0)
+    assert not DetectorCadence("500ms").is_due(10, 0.4)
+    assert DetectorCadence("500ms").is_due(1, 0.5)
+
+def test_plan_follows_frame_and_time_cadences():
+    scheduler = DetectorScheduler(parse_cadences({"hands": "2", "face_mesh": "1", "yolo": "500ms"}))
+    plans = []
+    for i in range(6):
+        now = i * 0.2
+        due = scheduler.plan(now)
+        plans.append(due)
+        scheduler.merge({name: [] for name in due}, f"t{i}", now)
+
+    assert plans[0] == ("face", "hands", "face_mesh", "yolo")
+    assert plans[1] == ("face", "face_mesh")
+    assert plans[2] == ("face", "hands", "face_mesh")
+    assert plans[3] == ("face", "face_mesh", "yolo")
+
+def test_merge_reemits_cached_results_with_new_time():
+    scheduler = DetectorScheduler(parse_cadences({"yolo": "3"}))
+    scheduler.plan(0.0)
+    phone = [{"time": "t0", "event": "Phone detected"}]
+    scheduler.merge({"face": face_logs(), "hands": [], "face_mesh": [], "yolo": phone}, "t0", 0.0)
+
+    scheduler.plan(0.1)
+    logs = scheduler.merge({"face": face_logs(), "hands": [], "face_mesh": []}, "t1", 0.1)
+
+    assert {"time": "t1", "event": "Phone detected"} in logs
+    assert phone[0]["time"] == "t0"  # Cached entries are not mutated
+
+def test_face_present_tracks_latest_face_run():
+    scheduler = DetectorScheduler(parse_cadences({}))
+    assert not scheduler.face_present
+
+    scheduler.plan(0.0)
+    scheduler.merge({"face": face_logs()}, "t0", 0.0)
+    assert scheduler.face_present
+
+    scheduler.plan(0.1)
+    scheduler.merge({"face": face_logs("Face not detected")}, "t1", 0.1)
+    assert not scheduler.face_present
+
+def test_cascade_gates_face_mesh_without_face():
+    assert not cascade_allows("face_mesh", face_present=False)
+    assert cascade_allows("face_mesh", face_present=True)
+    assert cascade_allows("hands", face_present=False)
+
+def test_gated_detector_stays_due_and_clears_cache():
+    scheduler = DetectorScheduler(parse_cadences({"face_mesh": "5"}))
+    scheduler.plan(0.0)
+    eyes = [{"time": "t0", "event": "Eye movement detected"}]
+    scheduler.merge({"face": face_logs(), "face_mesh": eyes}, "t0", 0.0)
+
+    # Due again after five frames, but the face is gone
+    for i in range(1, 5):
+        scheduler.plan(i * 0.1)
+        scheduler.merge({"face": face_logs()}, f"t{i}", i * 0.1)
+    assert "face_mesh" in scheduler.plan(0.5)
+    logs = scheduler.merge({"face": face_logs("Face not detected"), "face_mesh": GATED}, "t5", 0.5)
+    assert all(log["event"] != "Eye movement detected" for log in logs)
+
+    # Not counted as a run, so it is retried on the very next frame
+    assert "face_mesh" in scheduler.plan(0.6)
+
+def test_reset_makes_every_detector_due_and_drops_cache():
+    scheduler = DetectorScheduler(parse_cadences({"yolo": "500ms", "hands": "5"}))
+    scheduler.plan(now=0.0)
+    scheduler.merge({"face": face_logs(), "hands": [], "face_mesh": [], "yolo": []}, "t0", now=0.0)
+    scheduler.reset()
+    assert scheduler.plan(now=0.1) == ("face", "hands", "face_mesh", "yolo")
+    assert not scheduler.face_present
+
+def test_gated_marker_survives_pickling_and_is_not_none():
+    import pickle
+    from services.detection_scheduler import gated_or_logs
+    assert GATED is not None
+    assert pickle.loads(pickle.dumps(GATED)) is GATED
+    assert gated_or_logs(GATED) == [] and gated_or_logs(face_logs()) == face_logs()
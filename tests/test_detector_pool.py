@@ -0,0 +1,65 @@
+import pytest
+from detection import detector_pool as pool_module
+from detection.detector_pool import DetectorPool, DetectorPoolClosed
+
+class FakeDetector:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+
+    def process(self, image):
+        if self.broken:
+            raise RuntimeError("graph broken")
+        return "ok"
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setitem(pool_module.DETECTOR_FACTORIES, "face", FakeDetector)
+    return DetectorPool(max_size=2, acquire_timeout=0.05, max_failures=2)
+
+def test_instances_are_reused(pool):
+    with pool.checkout("face") as first:
+        pass
+    with pool.checkout("face") as second:
+        assert second is first
+
+def test_pool_is_bounded_and_times_out(pool):
+    with pool.checkout("face") as a, pool.checkout("face") as b:
+        assert a is not b
+        with pytest.raises(TimeoutError):
+            with pool.checkout("face"):
+                pass
+    assert pool._created["face"] == 2
+
+def test_failing_instance_is_discarded_after_max_failures(pool):
+    for _ in range(2):
+        with pool.checkout("face") as detector:
+            pool.mark_failed(detector)  # Error handled by the caller
+    assert detector.closed
+    with pool.checkout("face") as replacement:
+        assert replacement is not detector
+
+def test_exception_in_checkout_counts_as_failure(pool):
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            with pool.checkout("face") as detector:
+                raise ValueError("boom")
+    assert detector.closed and pool._created["face"] == 0
+
+def test_health_check_discards_broken_idle_instances(pool):
+    with pool.checkout("face") as healthy, pool.checkout("face") as broken:
+        broken.broken = True
+    assert pool.check_health() == 1
+    assert broken.closed and not healthy.closed
+
+def test_shutdown_closes_idle_and_rejects_checkouts(pool):
+    with pool.checkout("face") as detector:
+        pass
+    pool.shutdown()
+    assert detector.closed
+    with pytest.raises(DetectorPoolClosed):
+        with pool.checkout("face"):
+            pass
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from config.database import Base
+from models.event_aggregates import EventAggregate
+from models.event_spans import EventSpan
+from models.event_types import EventTypeLookup
+from models.exam_sessions import ExamSession
+from models.logs import Log
+import models.users  # Registers the table the event tables refer to
+from services.event_aggregates import aggregate_rows, check, rebuild, record_events
+from services.exam_session_service import ExamSessionService
+from services.log_service import LogService
+from services.log_writer import BulkLogWriter
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+def span(event_type, start, end, count):
+    return {"user_id": 1, "session_id": "s1", "event_type": event_type, "log": "", "start_time": at(start),
+            "end_time": at(end), "count": count, "peak_confidence": None}
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    tables = [EventTypeLookup.__table__, ExamSession.__table__, Log.__table__, EventSpan.__table__, EventAggregate.__table__]
+    Base.metadata.create_all(engine, tables=tables)  # users has a MySQL-only column type
+    return sessionmaker(bind=engine)
+
+def test_aggregate_rows_merges_spans_and_log_rows():
+    rows = [span("face_detected", 5, 9, 4), span("face_detected", 0, 3, 3),
+            {"user_id": 1, "session_id": "s1", "event_type": "session_paused", "timestamp": at(4)},
+            {"user_id": 1, "session_id": None, "event_type": "session_paused", "timestamp": at(5)}]
+    assert aggregate_rows(rows) == [
+        {"session_id": "s1", "event_type": "face_detected", "user_id": 1, "count": 7,
+         "first_time": at(0), "last_time": at(9)},
+        {"session_id": "s1", "event_type": "session_paused", "user_id": 1, "count": 1,
+         "first_time": at(4), "last_time": at(4)},
+    ]
+
+def test_writes_keep_aggregates_in_step(session_factory):
+    with session_factory() as db:
+        ExamSessionService.create(db, 1, session_id="s1")
+    writer = BulkLogWriter(session_factory, max_batch=2, flush_seconds=10, max_backlog=100,
+                           model=EventSpan, on_write=record_events)
+    writer.add([span("face_detected", 0, 3, 4), span("hand_detected", 1, 2, 2)])
+    asyncio.run(writer.flush())
+    writer.add([span("face_detected", 5, 9, 5)])
+    asyncio.run(writer.flush())
+    with session_factory() as db:
+        LogService.add_session_event(db, 1, "Exam session paused", "session_paused", session_id="s1")
+        totals = LogService.event_totals(db, session_id="s1")
+        assert totals["face_detected"] == (9, at(0), at(9))
+        assert totals["hand_detected"].count == 2 and totals["session_paused"].count == 1
+        assert check(db, "s1") == []
+
+def test_totals_are_kept_per_session(session_factory):
+    with session_factory() as db:
+        ExamSessionService.create(db, 1, session_id="s1")
+        ExamSessionService.create(db, 1, session_id="s2")
+    writer = BulkLogWriter(session_factory, max_batch=10, flush_seconds=10, max_backlog=100,
+                           model=EventSpan, on_write=record_events)
+    writer.add([span("face_detected", 0, 3, 4), dict(span("face_detected", 60, 61, 2), session_id="s2")])
+    asyncio.run(writer.flush())
+    with session_factory() as db:
+        assert LogService.event_totals(db, session_id="s1")["face_detected"].count == 4
+        assert LogService.event_totals(db, session_id="s2")["face_detected"].count == 2
+        assert LogService.event_totals(db, user_id=1)["face_detected"] == (6, at(0), at(61))
+
+def test_rebuild_repairs_drifted_aggregates(session_factory):
+    with session_factory() as db:
+        ExamSessionService.create(db, 1, session_id="s1")
+    writer = BulkLogWriter(session_factory, max_batch=10, flush_seconds=10, max_backlog=100,
+                           model=EventSpan, on_write=record_events)
+    writer.add([span("phone_detected", 0, 2, 3)])
+    asyncio.run(writer.flush())
+    with session_factory() as db:
+        db.execute(update(EventAggregate).values(count=99))
+        db.commit()
+        assert len(check(db, "s1")) == 1
+        rebuild(db, "s1")
+        assert check(db, "s1") == []
+        assert LogService.event_totals(db, session_id="s1")["phone_detected"].count == 3
@@ -0,0 +1,56 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+from models.event_types import EventType, EventTypeLookup
+from models.logs import Log
+from migrations.event_type_codes import migrate
+
+def test_labels_round_trip():
+    assert EventType.from_label("hand_detected") is EventType.HAND_DETECTED
+    assert EventType.HAND_DETECTED.label == "hand_detected"
+    with pytest.raises(ValueError):
+        EventType.from_label("cat_detected")
+
+def test_event_types_are_stored_as_codes():
+    engine = create_engine("sqlite://")
+    EventTypeLookup.__table__.create(engine)
+    Log.__table__.create(engine)
+    with Session(engine) as db:
+        db.add(Log(log="Phone detected", event_type="phone_detected", timestamp=datetime(2026, 1, 1), user_id=1))
+        db.commit()
+        assert db.scalar(select(Log.event_type).where(Log.event_type == "phone_detected")) == "phone_detected"
+        assert db.execute(text("SELECT event_type FROM logs")).scalar() == int(EventType.PHONE_DETECTED)
+        lookup = db.execute(text("SELECT name FROM event_types WHERE id = :id"), {"id": int(EventType.PHONE_DETECTED)})
+        assert lookup.scalar() == "phone_detected"
+
+def legacy_engine(*event_types):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE logs (id INTEGER PRIMARY KEY, log VARCHAR(1000), event_type VARCHAR(100), "
+            "timestamp DATETIME, user_id INTEGER)"
+        ))
+        conn.execute(text("CREATE INDEX ix_logs_id ON logs (id)"))
+        for event_type in event_types:
+            conn.execute(text("INSERT INTO logs (log, event_type, timestamp, user_id) "
+                              "VALUES ('', :event_type, '2026-01-01 09:00:00', 1)"), {"event_type": event_type})
+    return engine
+
+def test_migration_converts_legacy_rows_and_adds_indexes():
+    engine = legacy_engine("face_detected", "session_paused", "face_detected")
+    assert migrate(engine, dry_run=True) == {
+        "logs": ["convert event_type", "create index ix_logs_user_event_type", "create index ix_logs_user_timestamp"]
+    }
+    migrate(engine)
+    with Session(engine) as db:
+        assert sorted(db.scalars(select(Log.event_type)).all()) == ["face_detected", "face_detected", "session_paused"]
+    indexes = {index["name"] for index in inspect(engine).get_indexes("logs")}
+    assert {"ix_logs_user_timestamp", "ix_logs_user_event_type"} <= indexes
+    assert migrate(engine) == {}  # Nothing left to do
+
+def test_migration_refuses_unknown_event_types():
+    engine = legacy_engine("face_detected", "cat_detected")
+    with pytest.raises(ValueError, match="cat_detected"):
+        migrate(engine)
+    assert inspect(engine).get_columns("logs")[2]["type"].length == 100  # Unchanged
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from config.database import Base
+from models.event_aggregates import EventAggregate
+from models.event_spans import EventSpan
+from models.event_types import EventTypeLookup
+from models.exam_sessions import ExamSession
+from models.logs import Log
+import models.users  # Registers the table the event tables refer to
+from migrations.exam_sessions import migrate
+from services.event_aggregates import check, record_events
+from services.exam_session_service import ENDED, RUNNING, ExamSessionService
+from services.log_service import EventTotals, LogService
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    tables = [EventTypeLookup.__table__, ExamSession.__table__, Log.__table__,
+              EventSpan.__table__, EventAggregate.__table__]
+    Base.metadata.create_all(engine, tables=tables)  # users has a MySQL-only column type
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+def add_log(db, session_id, event_type, seconds, user_id=1):
+    row = {"log": event_type, "event_type": event_type, "timestamp": at(seconds),
+           "user_id": user_id, "session_id": session_id}
+    db.add(Log(**row))
+    record_events(db, [row])
+    db.commit()
+
+def test_create_ends_earlier_open_sessions(db):
+    first = ExamSessionService.create(db, 1)
+    second = ExamSessionService.create(db, 1)
+    other_user = ExamSessionService.create(db, 2)
+    assert first.status == ENDED and first.ended_at is not None
+    assert ExamSessionService.current(db, 1) is second
+    assert ExamSessionService.current(db, 2) is other_user
+
+def test_connection_joins_the_named_session_or_falls_back(db):
+    started = ExamSessionService.create(db, 1, session_id="s1")
+    assert ExamSessionService.for_connection(db, 1, "s1") is started
+    assert started.status == RUNNING
+    # Unknown ids and other users' sessions fall back to the user's open session
+    ExamSessionService.create(db, 2, session_id="s2")
+    assert ExamSessionService.for_connection(db, 1, "nope") is started
+    assert ExamSessionService.for_connection(db, 1, "s2") is started
+
+def test_connection_without_start_creates_a_session(db):
+    exam_session = ExamSessionService.for_connection(db, 1)
+    assert exam_session.user_id == 1 and exam_session.status == RUNNING
+    ExamSessionService.set_status(db, exam_session, ENDED)
+    assert ExamSessionService.for_connection(db, 1, exam_session.id) is not exam_session
+
+def test_delete_only_touches_one_session(db):
+    kept = ExamSessionService.create(db, 1, session_id="s1")
+    ExamSessionService.set_status(db, kept, ENDED)
+    removed = ExamSessionService.create(db, 1, session_id="s2")
+    add_log(db, "s1", "session_paused", 0)
+    add_log(db, "s2", "session_paused", 10)
+    add_log(db, "s2", "session_resumed", 20)
+    assert ExamSessionService.delete(db, removed) == 2
+    assert ExamSessionService.get(db, "s2") is None
+    assert db.scalars(select(Log.session_id)).all() == ["s1"]
+    assert LogService.event_totals(db, user_id=1) == {"session_paused": (1, at(0), at(0))}
+
+def test_summary_excludes_paused_time():
+    totals = {
+        "face_detected": EventTotals(8, at(0), at(600)),
+        "phone_detected": EventTotals(2, at(60), at(90)),
+        "session_paused": EventTotals(1, at(120), at(120)),
+        "session_resumed": EventTotals(1, at(300), at(300)),
+    }
+    pauses = [(at(120), "session_paused"), (at(300), "session_resumed")]
+    summary = LogService.summarize(totals, pauses)
+    assert summary.total_duration == 7.0
+    assert summary.face_detection_rate == 80.0
+    assert summary.suspicious_activities == {"phone_detected": 2}
+
+def legacy_engine():
+    """Tables as they were before exam sessions, with a user's past events"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE logs (id INTEGER PRIMARY KEY, log VARCHAR(1000), event_type SMALLINT, "
+                          "timestamp DATETIME, user_id INTEGER)"))
+        conn.execute(text("CREATE TABLE event_spans (id INTEGER PRIMARY KEY, user_id INTEGER, event_type SMALLINT, "
+                          "log VARCHAR(1000), start_time DATETIME, end_time DATETIME, count INTEGER, "
+                          "peak_confidence FLOAT)"))
+        conn.execute(text("CREATE TABLE event_aggregates (user_id INTEGER, event_type SMALLINT, count INTEGER, "
+                          "first_time DATETIME, last_time DATETIME, PRIMARY KEY (user_id, event_type))"))
+        conn.execute(text("INSERT INTO logs (log, event_type, timestamp, user_id) "
+                          "VALUES ('Exam session paused', 20, '2026-01-01 09:00:05', 1)"))
+        conn.execute(text("INSERT INTO event_spans (user_id, event_type, log, start_time, end_time, count) "
+                          "VALUES (1, 1, 'Face detected', '2026-01-01 09:00:00', '2026-01-01 09:00:30', 12)"))
+    for table in (Log.__table__, EventSpan.__table__):
+        for index in table.indexes:
+            if "session" not in index.name:
+                index.create(engine)
+    return engine
+
+def test_migration_files_legacy_rows_under_one_session():
+    engine = legacy_engine()
+    plan = migrate(engine, dry_run=True)
+    assert plan["exam_sessions"] == ["create table", "create legacy sessions for 1 users"]
+    assert plan["logs"] == ["add session_id", "create index ix_logs_session_timestamp"]
+    assert plan["event_aggregates"] == ["recreate keyed by session", "rebuild"]
+    assert "exam_sessions" not in inspect(engine).get_table_names()  # Dry run changed nothing
+
+    migrate(engine)
+    with Session(engine) as db:
+        legacy = db.scalars(select(ExamSession)).one()
+        assert (legacy.user_id, legacy.status) == (1, ENDED)
+        assert (legacy.started_at, legacy.ended_at) == (at(0), at(30))
+        assert db.scalar(select(func.count()).select_from(Log).where(Log.session_id == legacy.id)) == 1
+        assert db.scalar(select(EventSpan.session_id)) == legacy.id
+        assert LogService.event_totals(db, session_id=legacy.id)["face_detected"].count == 12
+        assert check(db, legacy.id) == []
+    assert migrate(engine) == {}  # Nothing left to do
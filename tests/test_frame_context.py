@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from detection.frame_context import FrameContext
+
+def make_frame(height, width):
+    return np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+def test_ensure_wraps_arrays_and_passes_contexts_through():
+    frame = make_frame(48, 64)
+    ctx = FrameContext.ensure(frame)
+    assert isinstance(ctx, FrameContext) and ctx.frame is frame
+    assert FrameContext.ensure(ctx) is ctx
+
+def test_rgb_and_gray_are_memoized():
+    ctx = FrameContext(make_frame(48, 64))
+    assert ctx.rgb is ctx.rgb
+    assert not ctx.rgb.flags.writeable
+    np.testing.assert_array_equal(ctx.rgb, ctx.frame[:, :, ::-1])
+    assert ctx.gray is ctx.gray
+    assert ctx.gray.shape == (48, 64)
+
+def test_pyramid_levels_halve_each_step():
+    ctx = FrameContext(make_frame(480, 640))
+    assert ctx.level(0) is ctx.frame
+    assert ctx.level(1).shape == (240, 320, 3)
+    assert ctx.level(3).shape == (60, 80, 3)
+
+@pytest.mark.parametrize("height, width, max_side, expected", [
+    (480, 640, 320, (240, 320, 3)),  # Exactly one pyramid level
+    (480, 640, 416, (312, 416, 3)),
+    (720, 1280, 300, (169, 300, 3)),
+    (640, 480, 100, (100, 75, 3)),  # Portrait
+])
+def test_resized_keeps_aspect_ratio(height, width, max_side, expected):
+    ctx = FrameContext(make_frame(height, width))
+    resized = ctx.resized(max_side)
+    assert resized.shape == expected
+    assert ctx.resized(max_side) is resized
+
+def test_resized_reuses_matching_pyramid_level():
+    ctx = FrameContext(make_frame(480, 640))
+    assert ctx.resized(320) is ctx.level(1)
+
+def test_resized_starts_from_smallest_level_above_target():
+    ctx = FrameContext(make_frame(480, 640))
+    ctx.resized(150)
+    assert 2 in ctx._pyramid and 3 not in ctx._pyramid
+
+def test_resized_never_upscales():
+    ctx = FrameContext(make_frame(48, 64))
+    assert ctx.resized(640) is ctx.frame
+
+def test_rgb_at_downscales_and_is_read_only():
+    ctx = FrameContext(make_frame(480, 640))
+    small = ctx.rgb_at(320)
+    assert small.shape == (240, 320, 3)
+    assert not small.flags.writeable
+    assert ctx.rgb_at(320) is small
+    assert ctx.rgb_at(1280) is ctx.rgb
+
+def test_letterbox_pads_to_square_and_centres_image():
+    ctx = FrameContext(make_frame(480, 640))
+    boxed = ctx.letterbox(416)
+    assert boxed.shape == (416, 416, 3)
+    # 416x312 image with 52 rows of padding above and below
+    assert (boxed[:52] == 114).all() and (boxed[-52:] == 114).all()
+    np.testing.assert_array_equal(boxed[52:364], ctx.resized(416))
+    assert ctx.letterbox(416) is boxed
+
+def test_letterbox_never_upscales():
+    ctx = FrameContext(make_frame(48, 64))
+    boxed = ctx.letterbox(128)
+    np.testing.assert_array_equal(boxed[40:88, 32:96], ctx.frame)
@@ -0,0 +1,38 @@
+import numpy as np
+from services.frame_gate import FrameChangeGate
+
+def make_frame(value=100, height=480, width=640):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+def test_first_frame_is_always_analysed():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=2.0)
+    assert not gate.should_skip(make_frame(), now=0.0)
+
+def test_near_identical_frame_is_skipped():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=2.0)
+    gate.should_skip(make_frame(100), now=0.0)
+    assert gate.should_skip(make_frame(101), now=0.1)
+    assert gate.skipped == 1 and gate.skip_ratio == 0.5
+
+def test_changed_frame_is_analysed():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=2.0)
+    gate.should_skip(make_frame(100), now=0.0)
+    assert not gate.should_skip(make_frame(140), now=0.1)
+
+def test_slow_drift_is_measured_against_last_analysed_frame():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=10.0)
+    gate.should_skip(make_frame(100), now=0.0)
+    assert gate.should_skip(make_frame(102), now=0.1)
+    assert not gate.should_skip(make_frame(104), now=0.2)
+
+def test_static_scene_is_reanalysed_after_max_skip():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=2.0)
+    gate.should_skip(make_frame(), now=0.0)
+    assert gate.should_skip(make_frame(), now=1.9)
+    assert not gate.should_skip(make_frame(), now=2.0)
+
+def test_reset_forces_next_frame_to_be_analysed():
+    gate = FrameChangeGate(threshold=3.0, max_skip_seconds=10.0)
+    gate.should_skip(make_frame(), now=0.0)
+    gate.reset()
+    assert not gate.should_skip(make_frame(), now=0.1)
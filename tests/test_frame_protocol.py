@@ -0,0 +1,50 @@
+import base64
+import cv2
+import numpy as np
+import pytest
+from utils.frame_protocol import (
+    CODEC_WEBP, HEADER_SIZE, FrameProtocolError, encode_frame, parse_frame, split_message
+)
+from utils.image_utils import decode_base64, decode_frame_message
+
+def jpeg_bytes(height=48, width=64):
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+def test_round_trip_header_and_zero_copy_payload():
+    image = jpeg_bytes()
+    message = encode_frame(image, seq=7, capture_ts=1234.5, width=64, height=48, codec=CODEC_WEBP)
+    header, payload = parse_frame(message)
+    assert (header.seq, header.capture_ts, header.width, header.height, header.codec) == (7, 1234.5, 64, 48, CODEC_WEBP)
+    assert isinstance(payload, memoryview) and payload.obj is message
+    assert payload.tobytes() == image and len(message) == HEADER_SIZE + len(image)
+
+def test_rejects_unknown_version():
+    message = bytearray(encode_frame(b"x" * 200, seq=1, capture_ts=0))
+    message[2] = 99
+    with pytest.raises(FrameProtocolError):
+        parse_frame(message)
+    assert decode_frame_message(bytes(message)) == (None, None)
+
+def test_legacy_messages_pass_through():
+    image = jpeg_bytes()
+    assert split_message(image) == (None, image)
+    assert split_message("abc") == (None, "abc")
+
+def test_decode_frame_message_handles_all_formats():
+    image = jpeg_bytes()
+    encoded = base64.b64encode(image).decode()
+    for message in (encode_frame(image, seq=1, capture_ts=0), image, encoded, "data:image/jpeg;base64," + encoded):
+        _, frame = decode_frame_message(message)
+        assert frame is not None and frame.shape == (48, 64, 3)
+
+def test_decode_base64_falls_back_to_cleaning():
+    image = jpeg_bytes()
+    messy = base64.b64encode(image).decode().rstrip("=")
+    messy = messy[:10] + "\n " + messy[10:]
+    assert decode_base64(messy) == image
+
+def test_jpeg_dimensions_reads_start_of_frame():
+    from utils.image_utils import jpeg_dimensions
+    assert jpeg_dimensions(jpeg_bytes(48, 64)) == (64, 48)
+    assert jpeg_dimensions(b"not a jpeg") is None
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from services.frame_queue import FrameQueue
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_latest_policy_drops_oldest_frames():
+    async def scenario():
+        queue = FrameQueue(max_size=2, policy="latest")
+        for frame in range(5):
+            assert await queue.put(frame)
+        return queue, [await queue.get(), await queue.get()]
+
+    queue, frames = run(scenario())
+    assert frames == [3, 4]
+    assert queue.stats() == {"depth": 0, "max_depth": 2, "received": 5, "dropped": 3, "drop_ratio": 0.6}
+
+def test_block_policy_waits_for_the_consumer():
+    async def scenario():
+        queue = FrameQueue(max_size=1, policy="block")
+        await queue.put("a")
+        blocked = asyncio.create_task(queue.put("b"))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        first = await queue.get()
+        assert await blocked
+        return queue, [first, await queue.get()]
+
+    queue, frames = run(scenario())
+    assert frames == ["a", "b"] and queue.dropped == 0
+
+def test_close_drains_then_ends_consumer():
+    async def scenario():
+        queue = FrameQueue(max_size=2)
+        await queue.put("a")
+        queue.close()
+        assert not await queue.put("b")
+        return [await queue.get(), await queue.get()]
+
+    assert run(scenario()) == ["a", None]
+
+def test_close_wakes_waiting_consumer():
+    async def scenario():
+        queue = FrameQueue(max_size=1)
+        waiter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        queue.close()
+        return await waiter
+
+    assert run(scenario()) is None
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        FrameQueue(1, policy="oldest")
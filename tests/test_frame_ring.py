@@ -0,0 +1,46 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from services.frame_ring import FrameRing, StaleFrameError, read_frame, run_with_frame
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=2, slot_bytes=48 * 64 * 3, lease_seconds=5.0)
+    yield ring
+    ring.close()
+
+def make_frame(value=7):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+def test_frame_round_trips_through_a_slot(ring):
+    ref = ring.put(make_frame())
+    frame = read_frame(ref)
+    assert frame.shape == (48, 64, 3) and (frame == 7).all()
+    assert not frame.flags.writeable
+    assert ring.in_use == 1
+    ring.release(ref)
+    assert ring.in_use == 0
+
+def test_full_ring_and_oversized_frames_fall_back(ring):
+    assert ring.put(make_frame()) and ring.put(make_frame())
+    assert ring.put(make_frame()) is None
+    assert ring.put(np.zeros((100, 100, 3), np.uint8)) is None
+    stats = ring.stats()
+    assert stats["fallbacks"] == 2 and stats["copies"]["pickled"] == 4
+
+def test_expired_lease_is_reclaimed_and_old_reader_sees_stale(ring):
+    old = ring.put(make_frame(1), now=0.0)
+    ring.put(make_frame(2), now=0.0)
+    new = ring.put(make_frame(3), now=10.0)  # Full, so the expired leases are reclaimed
+    assert new is not None and ring.reclaimed == 2
+    with pytest.raises(StaleFrameError):
+        read_frame(old)
+    ring.release(old)  # Late release of a reclaimed slot must not free it twice
+    assert ring.in_use == 1
+
+def test_worker_process_reads_without_pickling_the_frame(ring):
+    ref = ring.put(make_frame(3))
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        assert pool.submit(run_with_frame, np.sum, ref).result(timeout=60) == 3 * 48 * 64 * 3
+    ring.release(ref)
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models.logs import Log
+import models.users  # Registers the table logs.user_id refers to
+from services.log_writer import BulkLogWriter
+
+@pytest.fixture
+def session_factory():
+    # One shared connection so the flush thread sees the same in-memory database
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Log.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+def count(session_factory):
+    with session_factory() as db:
+        return db.scalar(select(func.count()).select_from(Log))
+
+def rows(n, user_id=1):
+    row = {"log": "Face detected", "event_type": "face_detected", "timestamp": datetime(2026, 1, 1), "user_id": user_id}
+    return [dict(row) for _ in range(n)]
+
+def test_flush_writes_all_rows_in_batches(session_factory):
+    writer = BulkLogWriter(session_factory, max_batch=4, flush_seconds=10, max_backlog=100)
+    writer.add(rows(10))
+    assert asyncio.run(writer.flush()) == 10
+    assert count(session_factory) == 10
+    assert writer.backlog == 0 and writer.stats()["rows_written"] == 10
+
+def test_full_batch_triggers_background_flush(session_factory):
+    async def scenario():
+        writer = BulkLogWriter(session_factory, max_batch=5, flush_seconds=60, max_backlog=100)
+        writer.start()
+        writer.add(rows(5))
+        for _ in range(100):
+            if writer.flushes:
+                break
+            await asyncio.sleep(0.01)
+        writer.add(rows(2))
+        await writer.stop()  # Final flush
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.flushes == 2 and count(session_factory) == 7
+
+def test_failed_flush_keeps_rows_and_caps_backlog():
+    def broken():
+        raise RuntimeError("database down")
+
+    writer = BulkLogWriter(broken, max_batch=2, flush_seconds=1, max_backlog=5)
+    writer.add(rows(4))
+    assert asyncio.run(writer.flush()) == 0
+    assert writer.backlog == 4 and writer.failures == 1
+    writer.add(rows(3))
+    assert writer.backlog == 5 and writer.rows_dropped == 2
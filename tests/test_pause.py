@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+from utils.connection import ConnectionManager
+from utils.session_state import InMemorySessionState
+from services.log_service import paused_seconds
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+def test_paused_seconds_sums_closed_and_open_intervals():
+    events = [
+        (at(5), "session_paused"), (at(7), "session_resumed"),
+        (at(10), "session_paused"), (at(10.5), "session_paused"),  # Repeated pause
+        (at(12), "session_resumed"),
+        (at(20), "session_paused"),
+    ]
+    assert paused_seconds(events, until=at(25)) == (2 + 2 + 5) * 60
+
+def test_paused_seconds_ignores_resume_without_pause():
+    assert paused_seconds([(at(1), "session_resumed")], until=at(5)) == 0
+
+def test_local_pause_runs_hooks_and_stop_clears_it():
+    manager = ConnectionManager(InMemorySessionState())
+    calls = []
+    manager.add_pause_hook(lambda user_id, paused: calls.append((user_id, paused)))
+    manager.active_connections[1] = object()
+
+    assert manager.set_paused(1, True) and manager.is_paused(1)
+    assert manager.set_paused(1, False) and not manager.is_paused(1)
+    assert calls == [(1, True), (1, False)]
+
+def test_pause_for_remote_session_is_forwarded():
+    state = InMemorySessionState(worker_id="b")
+    manager = ConnectionManager(state)
+    state._owners[1] = "a"  # Held by another worker
+    assert manager.set_paused(1, True)
+    assert not manager.is_paused(1)
+    assert state._commands["a"] == [(1, "pause", {"paused": True})]
+
+def test_pause_without_session_fails():
+    manager = ConnectionManager(InMemorySessionState())
+    assert not manager.set_paused(1, True)
+
+def test_pause_command_applies_on_owning_worker():
+    state = InMemorySessionState()
+    manager = ConnectionManager(state)
+    manager.active_connections[1] = object()
+    state.register(1)
+    state.send_command(1, "pause", {"paused": True})
+    asyncio.run(manager.process_commands())
+    assert manager.is_paused(1)
+
+class FakeWebSocket:
+    application_state = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+def test_pause_is_stored_and_restored_on_reconnect():
+    state = InMemorySessionState()
+    manager = ConnectionManager(state)
+    calls = []
+    manager.add_pause_hook(lambda user_id, paused: calls.append((user_id, paused)))
+
+    asyncio.run(manager.connect(FakeWebSocket(), 1))
+    assert manager.set_paused(1, True) and state.is_paused(1)
+    asyncio.run(manager.disconnect(1))
+    assert not manager.is_paused(1) and state.is_paused(1)
+
+    asyncio.run(manager.connect(FakeWebSocket(), 1))
+    assert manager.is_paused(1)
+    assert calls == [(1, True), (1, True)]
+
+def test_forwarded_pause_is_stored_and_stop_clears_it():
+    state = InMemorySessionState(worker_id="b")
+    manager = ConnectionManager(state)
+    state._owners[1] = "a"
+    assert manager.set_paused(1, True) and state.is_paused(1)
+    assert asyncio.run(manager.force_disconnect(1))
+    assert not state.is_paused(1)
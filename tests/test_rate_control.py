@@ -0,0 +1,46 @@
+import pytest
+from services.rate_control import RateController, initial_level
+
+LEVELS = [
+    {"targetFps": 10, "resolution": 640, "jpegQuality": 80},
+    {"targetFps": 4, "resolution": 480, "jpegQuality": 70},
+    {"targetFps": 1, "resolution": 320, "jpegQuality": 60},
+]
+
+def make_controller(**kwargs):
+    return RateController(LEVELS, latency_budget_ms=80.0, update_seconds=2.0, **kwargs)
+
+def test_high_load_steps_down_one_level_per_interval():
+    rate = make_controller()
+    assert rate.update(load=2.0, now=0.0) == LEVELS[1]
+    assert rate.update(load=2.0, now=1.0) is None  # Too soon
+    assert rate.update(load=2.0, now=2.0) == LEVELS[2]
+    assert rate.update(load=2.0, now=4.0) is None  # Already cheapest
+
+def test_slow_session_steps_down_even_when_server_is_idle():
+    rate = make_controller()
+    for _ in range(5):
+        rate.observe(200.0)
+    assert rate.update(load=0.0, now=0.0) == LEVELS[1]
+
+def test_low_pressure_recovers_and_mid_pressure_holds():
+    rate = make_controller(level=2)
+    rate.observe(10.0)
+    assert rate.update(load=0.1, now=0.0) == LEVELS[1]
+    assert rate.update(load=0.8, now=2.0) is None
+    assert rate.level == 1 and rate.changes == 1
+
+def test_allow_throttles_frames_above_target_fps():
+    rate = make_controller(level=1)  # 4 fps, 0.2 s minimum interval with slack
+    accepted = [rate.allow(now=t / 10) for t in range(10)]  # 10 fps for one second
+    assert sum(accepted) == 5
+    assert rate.throttled == 5
+
+def test_initial_level_follows_load():
+    assert initial_level(LEVELS, 0.2) == 0
+    assert initial_level(LEVELS, 0.9) == 1
+    assert initial_level(LEVELS, 5.0) == 2
+
+def test_levels_required():
+    with pytest.raises(ValueError):
+        RateController([], latency_budget_ms=80.0, update_seconds=1.0)
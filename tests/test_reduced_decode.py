@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+import pytest
+from config.settings import settings
+from utils.frame_protocol import encode_frame
+from utils.image_utils import choose_decode_scale, decode_frame_message, decode_image_data
+
+def jpeg_bytes(height, width):
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+@pytest.mark.parametrize("width,height,target,expected", [
+    (640, 480, 480, 1),    # Half would drop below the target
+    (1280, 720, 480, 2),
+    (1920, 1080, 480, 4),
+    (3840, 2160, 416, 8),
+    (1280, 720, None, 1),  # No target: only the pixel cap reduces
+])
+def test_choose_decode_scale_keeps_target_resolution(width, height, target, expected):
+    assert choose_decode_scale(width, height, target, max_pixels=10_000_000) == expected
+
+def test_choose_decode_scale_enforces_pixel_cap():
+    assert choose_decode_scale(3840, 2160, None, max_pixels=1920 * 1080) == 2
+    assert choose_decode_scale(3840, 2160, 2000, max_pixels=1920 * 1080) == 2
+    assert choose_decode_scale(100_000, 100_000, None, max_pixels=1920 * 1080) is None
+
+def test_large_jpeg_is_decoded_reduced(monkeypatch):
+    monkeypatch.setattr(settings, "REDUCED_DECODE", True)
+    frame = decode_image_data(jpeg_bytes(1080, 1920))
+    # Largest inference resolution is 480, so 1/4 scale still covers it
+    assert frame.shape == (270, 480, 3)
+
+def test_reduced_decode_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "REDUCED_DECODE", False)
+    assert decode_image_data(jpeg_bytes(720, 1280)).shape == (720, 1280, 3)
+
+def test_header_understating_size_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_DECODE_PIXELS", 64 * 48)
+    message = encode_frame(jpeg_bytes(480, 640), seq=1, capture_ts=0, width=64, height=48)
+    header, frame = decode_frame_message(message)
+    assert header.width == 64 and frame is None
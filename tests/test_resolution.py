@@ -0,0 +1,18 @@
+from detection.resolution import fit_budget
+
+COSTS = {
+    "face": {640: 6.0, 320: 3.0},
+    "yolo": {640: 60.0, 416: 28.0, 320: 18.0},
+}
+
+def test_keeps_largest_resolutions_within_budget():
+    assert fit_budget(COSTS, 100.0) == {"face": 640, "yolo": 640}
+
+def test_shrinks_most_expensive_detector_first():
+    assert fit_budget(COSTS, 40.0) == {"face": 640, "yolo": 416}
+
+def test_shrinks_further_until_budget_fits():
+    assert fit_budget(COSTS, 22.0) == {"face": 320, "yolo": 320}
+
+def test_returns_smallest_when_budget_unreachable():
+    assert fit_budget(COSTS, 1.0) == {"face": 320, "yolo": 320}
@@ -0,0 +1,45 @@
+import json
+import pytest
+from services import result_stream
+from services.result_stream import ResultStream, encode_message, negotiate_encoding
+
+def test_first_change_is_sent_immediately():
+    stream = ResultStream(window_seconds=0.5)
+    message = stream.update(["Face detected"], now=0.0)
+    assert message == {"type": "events", "started": ["Face detected"], "ended": [], "active": ["Face detected"]}
+
+def test_unchanged_state_sends_nothing():
+    stream = ResultStream(window_seconds=0.5)
+    stream.update(["Face detected"], now=0.0)
+    assert all(stream.update(["Face detected"], now=t) is None for t in (1.0, 2.0, 3.0))
+    assert stream.messages == 1 and stream.frames == 4
+
+def test_changes_inside_window_are_coalesced():
+    stream = ResultStream(window_seconds=0.5)
+    stream.update(["Face detected"], now=0.0)
+    assert stream.update(["Face detected", "Hand detected"], now=0.1) is None
+    assert stream.update(["Hand detected"], now=0.2) is None
+    assert stream.wait_timeout(now=0.2) == pytest.approx(0.3)
+    message = stream.flush(now=0.5)
+    assert message["started"] == ["Hand detected"] and message["ended"] == ["Face detected"]
+    assert stream.wait_timeout() is None
+
+def test_flicker_inside_window_is_suppressed():
+    stream = ResultStream(window_seconds=0.5)
+    stream.update(["Face detected"], now=0.0)
+    stream.update([], now=0.1)
+    stream.update(["Face detected"], now=0.2)
+    assert not stream.pending and stream.flush(now=1.0) is None
+
+def test_json_and_msgpack_encoding():
+    message = {"type": "events", "started": ["Face detected"], "ended": [], "active": []}
+    assert json.loads(encode_message(message, "json")) == message
+    if result_stream.msgpack is not None:
+        assert negotiate_encoding("msgpack") == "msgpack"
+        assert result_stream.msgpack.unpackb(encode_message(message, "msgpack")) == message
+    assert negotiate_encoding(None) == "json"
+    assert negotiate_encoding("cbor") == "json"
+
+def test_msgpack_falls_back_when_missing(monkeypatch):
+    monkeypatch.setattr(result_stream, "msgpack", None)
+    assert negotiate_encoding("msgpack") == "json"
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import pytest
+from utils.connection import ConnectionManager
+from utils.session_state import InMemorySessionState, SQLiteSessionState, create_session_state
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    return SQLiteSessionState(path, worker_id="a"), SQLiteSessionState(path, worker_id="b")
+
+def test_sessions_are_visible_across_workers(workers):
+    a, b = workers
+    a.register(1)
+    assert b.is_connected(1) and b.owner(1) == "a"
+    b.unregister(1)  # Not b's session
+    assert a.is_connected(1)
+    a.unregister(1)
+    assert not b.is_connected(1)
+
+def test_commands_reach_the_owning_worker_once(workers):
+    a, b = workers
+    a.register(1)
+    assert b.send_command(1, "disconnect", {"reason": "stopped"})
+    assert b.poll_commands() == []
+    assert a.poll_commands() == [(1, "disconnect", {"reason": "stopped"})]
+    assert a.poll_commands() == []
+    assert not b.send_command(2, "disconnect")  # Nobody owns user 2
+
+def test_sessions_of_silent_workers_expire(tmp_path):
+    path = str(tmp_path / "state.db")
+    a = SQLiteSessionState(path, worker_id="a", stale_seconds=0.05)
+    b = SQLiteSessionState(path, worker_id="b", stale_seconds=0.05)
+    a.register(1)
+    time.sleep(0.1)
+    assert not b.is_connected(1)
+    a.poll_commands()  # Heartbeat
+    assert b.is_connected(1)
+
+def test_close_drops_the_workers_sessions(workers):
+    a, b = workers
+    a.register(1)
+    a.close()
+    assert not b.is_connected(1)
+
+def test_in_memory_backend_routes_commands_locally():
+    state = create_session_state("memory", "")
+    assert isinstance(state, InMemorySessionState)
+    state.register(3)
+    assert state.send_command(3, "disconnect")
+    assert state.poll_commands() == [(3, "disconnect", {})]
+    with pytest.raises(ValueError):
+        create_session_state("redis", "")
+
+def test_force_disconnect_is_forwarded_to_the_owning_worker(workers):
+    a, b = workers
+    manager = ConnectionManager(b)
+    a.register(1)
+    assert manager.is_connected(1)
+    assert asyncio.run(manager.force_disconnect(1))
+    assert a.poll_commands() == [(1, "disconnect", {})]
+
+def test_paused_flag_is_shared_across_workers(workers):
+    a, b = workers
+    a.set_paused(1, True)
+    assert b.is_paused(1)
+    a.close()  # Outlives the worker that recorded it
+    assert b.is_paused(1)
+    b.set_paused(1, False)
+    assert not b.is_paused(1)
+
+class FakeWebSocket:
+    application_state = None
+
+    def __init__(self):
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        self.closed = True
+
+def test_old_handler_does_not_close_a_same_worker_reconnect(workers):
+    a, _ = workers
+    manager = ConnectionManager(a)
+    old, new = FakeWebSocket(), FakeWebSocket()
+
+    async def scenario():
+        await manager.connect(old, 1)
+        await manager.connect(new, 1)  # Reconnect closes the old socket
+        await manager.disconnect(1, old)  # Old handler's cleanup
+        return manager.active_connections.get(1)
+
+    assert asyncio.run(scenario()) is new
+    assert old.closed and not new.closed
+    assert a.owner(1) == "a"
+    asyncio.run(manager.disconnect(1, new))
+    assert 1 not in manager.active_connections and a.owner(1) is None
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from models.event_spans import EventSpan
+from models.logs import Log
+import models.users  # Registers the table logs.user_id refers to
+from services.event_aggregates import raw_totals
+from services.span_compaction import compact, spans_for_rows
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Log.__table__.create(engine)
+    EventSpan.__table__.create(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+def add_frame(db, seconds, *events, user_id=1, session_id="s1"):
+    for event in events:
+        db.add(Log(log=event, event_type=event.lower().replace(" ", "_"), timestamp=at(seconds),
+                   user_id=user_id, session_id=session_id))
+
+def test_frames_group_by_timestamp():
+    rows = [(at(0), "Face detected"), (at(0), "Hand detected"), (at(1), "Face detected")]
+    spans = spans_for_rows(1, rows, max_gap_seconds=3, max_span_seconds=60)
+    assert sorted((span["event_type"], span["count"]) for span in spans) == [("face_detected", 2), ("hand_detected", 1)]
+
+def test_compaction_replaces_detection_rows_and_keeps_totals(db):
+    for second in range(5):
+        add_frame(db, second, "Face detected")
+    add_frame(db, 2, "Phone detected")
+    db.add(Log(log="Exam session paused", event_type="session_paused", timestamp=at(3), user_id=1, session_id="s1"))
+    add_frame(db, 0, "Face detected", user_id=2, session_id="s2")
+    db.commit()
+    before = raw_totals(db, "s1")
+
+    reports = compact(db)
+    assert {report["user_id"]: report["spans"] for report in reports} == {1: 2, 2: 1}
+    assert raw_totals(db, "s1") == before
+    # Only lifecycle events stay in logs
+    assert db.scalars(select(Log.event_type)).all() == ["session_paused"]
+    assert db.scalar(select(func.count()).select_from(EventSpan)) == 3
+
+def test_dry_run_changes_nothing(db):
+    add_frame(db, 0, "Face detected")
+    db.commit()
+    assert compact(db, user_id=1, dry_run=True) == [{"user_id": 1, "rows": 1, "spans": 1}]
+    assert db.scalar(select(func.count()).select_from(EventSpan)) == 0
+
+def test_spans_never_cross_sessions(db):
+    add_frame(db, 0, "Face detected", session_id="s1")
+    add_frame(db, 1, "Face detected", session_id="s2")
+    db.commit()
+    compact(db)
+    spans = db.execute(select(EventSpan.session_id, EventSpan.count).order_by(EventSpan.session_id)).all()
+    assert spans == [("s1", 1), ("s2", 1)]
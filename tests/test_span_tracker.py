@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+from services.span_tracker import SpanTracker, event_type_of
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+def face(confidence=None):
+    return {"event": "Face detected", "confidence": confidence}
+
+def test_event_type_of():
+    assert event_type_of("Background person detected") == "background_person_detected"
+
+def test_consecutive_events_merge_until_they_change():
+    tracker = SpanTracker(7, max_gap_seconds=3, max_span_seconds=60)
+    assert tracker.update([face(0.8)], at(0)) == []
+    assert tracker.update([face(0.9), face(0.6)], at(1)) == []  # Two faces count twice
+    closed = tracker.update([{"event": "Hand detected"}], at(2))
+    assert closed == [{
+        "user_id": 7, "session_id": None, "event_type": "face_detected", "log": "Face detected",
+        "start_time": at(0), "end_time": at(1), "count": 3, "peak_confidence": 0.9,
+    }]
+    assert tracker.open_spans == 1
+    [hand] = tracker.close()
+    assert hand["count"] == 1 and hand["peak_confidence"] is None
+    assert tracker.open_spans == 0
+
+def test_gap_and_max_length_close_spans():
+    tracker = SpanTracker(7, max_gap_seconds=3, max_span_seconds=10)
+    tracker.update([face()], at(0))
+    [gapped] = tracker.update([face()], at(5))
+    assert gapped["end_time"] == at(0)
+    for second in range(6, 16):
+        assert tracker.update([face()], at(second)) == []
+    [long_run] = tracker.update([face()], at(16))
+    assert (long_run["start_time"], long_run["end_time"], long_run["count"]) == (at(5), at(15), 11)
+
+def test_store_logs_drops_events_without_a_code():
+    from services.log_service import LogService
+    tracker = SpanTracker(7, max_gap_seconds=3, max_span_seconds=60)
+    LogService.store_logs(tracker, [face(), {"event": "Cat detected"}], now=at(0))
+    assert [span["event_type"] for span in tracker.close()] == ["face_detected"]
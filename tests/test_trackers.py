@@ -0,0 +1,65 @@
+import pytest
+from detection import trackers
+from detection.trackers import TrackerRegistry
+
+class FakeTracker:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture(autouse=True)
+def fake_factories(monkeypatch):
+    monkeypatch.setattr(trackers, "TRACKER_FACTORIES", {"hands": FakeTracker, "face_mesh": FakeTracker})
+
+def test_session_reuses_its_tracker():
+    registry = TrackerRegistry(max_sessions=4, idle_seconds=60)
+    with registry.checkout(1, "hands") as first:
+        pass
+    with registry.checkout(1, "hands") as second:
+        pass
+    assert first is second and not first.closed
+
+def test_sessions_get_separate_trackers():
+    registry = TrackerRegistry(max_sessions=4, idle_seconds=60)
+    with registry.checkout(1, "hands") as first, registry.checkout(2, "hands") as second:
+        assert first is not second
+
+def test_least_recently_used_session_is_evicted():
+    registry = TrackerRegistry(max_sessions=2, idle_seconds=60)
+    with registry.checkout(1, "hands") as oldest:
+        pass
+    with registry.checkout(2, "hands"):
+        pass
+    with registry.checkout(1, "hands"):
+        pass  # Session 1 is now the most recent
+    with registry.checkout(3, "hands"):
+        pass
+    assert not oldest.closed
+    assert set(registry._sessions) == {1, 3}
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    registry = TrackerRegistry(max_sessions=4, idle_seconds=10)
+    clock = [100.0]
+    monkeypatch.setattr(trackers.time, "monotonic", lambda: clock[0])
+    with registry.checkout(1, "face_mesh") as idle:
+        pass
+    clock[0] += 11
+    with registry.checkout(2, "face_mesh"):
+        pass
+    assert idle.closed and 1 not in registry._sessions
+
+def test_release_closes_trackers():
+    registry = TrackerRegistry(max_sessions=4, idle_seconds=60)
+    with registry.checkout(1, "hands") as tracker:
+        pass
+    registry.release(1)
+    assert tracker.closed
+
+def test_release_during_use_defers_close():
+    registry = TrackerRegistry(max_sessions=4, idle_seconds=60)
+    with registry.checkout(1, "hands") as tracker:
+        registry.release(1)
+        assert not tracker.closed
+    assert tracker.closed
@@ -0,0 +1,60 @@
+from config.settings import settings
+from detection import resolution
+from services.detection_executor import warm_up_sizes
+
+def test_warm_up_covers_client_sizes_and_inference_resolution(monkeypatch):
+    monkeypatch.setattr(settings, "ADAPTIVE_RATE", True)
+    monkeypatch.setattr(settings, "RATE_LEVELS", [
+        {"targetFps": 10, "resolution": 640, "jpegQuality": 80},
+        {"targetFps": 2, "resolution": 320, "jpegQuality": 60},
+    ])
+    monkeypatch.setitem(resolution.inference_resolutions, "hands", 800)
+    assert warm_up_sizes() == {320, 640, 800}
+
+def test_warm_up_without_adaptive_rate_uses_inference_resolution(monkeypatch):
+    monkeypatch.setattr(settings, "ADAPTIVE_RATE", False)
+    assert warm_up_sizes() == {max(resolution.inference_resolutions.values())}
+
+def test_only_pools_in_use_are_warmed(monkeypatch):
+    from detection import warmup
+    monkeypatch.setattr(settings, "MEDIAPIPE_TRACKING", True)
+    assert warmup.pooled_kinds() == ("face",)
+    monkeypatch.setattr(settings, "MEDIAPIPE_TRACKING", False)
+    assert warmup.pooled_kinds() == ("face", "hands", "face_mesh")
+
+def test_trackers_are_created_run_and_closed(monkeypatch):
+    from detection import warmup
+    created, calls = [], []
+
+    class FakeTracker:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def factory():
+        created.append(FakeTracker())
+        return created[-1]
+
+    monkeypatch.setattr(warmup, "TRACKER_FACTORIES", {"hands": factory, "face_mesh": factory})
+    monkeypatch.setitem(warmup.DETECTORS, "hands", lambda ctx, tracker: calls.append(("hands", tracker)))
+    monkeypatch.setitem(warmup.DETECTORS, "face_mesh", lambda ctx, tracker: calls.append(("face_mesh", tracker)))
+    timings = warmup.warm_up_trackers(["ctx-320", "ctx-640"], rounds=2)
+    assert set(timings) == {"hands_tracker", "face_mesh_tracker"}
+    assert len(created) == 2 and all(tracker.closed for tracker in created)
+    assert len(calls) == 8
+
+def test_ready_turns_200_after_warm_up(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers import health
+    monkeypatch.setattr(health, "warmup_state", {"ready": False, "timings_ms": None, "error": None})
+    app = FastAPI()
+    app.include_router(health.router)
+    client = TestClient(app)
+    assert client.get("/live").status_code == 200
+    assert client.get("/ready").status_code == 503
+    health.mark_ready({"face": 12.0})
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["timings_ms"] == {"face": 12.0}
@@ -0,0 +1,57 @@
+import os
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+from config.settings import settings
+from detection import yolo_backends, yolo_detection
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "YOLO_EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(yolo_backends, "load_torch_model", lambda: "torch-model")
+    return tmp_path
+
+def test_export_runs_once_and_is_cached(export_dir, monkeypatch):
+    exports = []
+
+    def fake_export(torch_model, target):
+        exports.append(torch_model)
+        open(target, "w").close()
+
+    monkeypatch.setattr(yolo_backends, "_export_onnx", fake_export)
+    first = yolo_backends.ensure_exported("onnx")
+    assert yolo_backends.ensure_exported("onnx") == first
+    assert os.path.dirname(first) == str(export_dir)
+    assert exports == ["torch-model"]
+
+def test_int8_quantizes_the_cached_onnx_export(export_dir, monkeypatch):
+    quantized = []
+    monkeypatch.setattr(yolo_backends, "_export_onnx", lambda model, target: open(target, "w").close())
+    monkeypatch.setattr(yolo_backends, "_quantize_onnx",
+                        lambda source, target: quantized.append(source) or open(target, "w").close())
+    yolo_backends.ensure_exported("onnx-int8")
+    yolo_backends.ensure_exported("onnx-int8")
+    assert quantized == [yolo_backends.cache_path("onnx")]
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        yolo_backends.ensure_exported("tensorrt")
+
+def test_load_model_falls_back_to_torch(monkeypatch):
+    def unavailable(backend):
+        raise RuntimeError("onnxruntime not installed")
+
+    monkeypatch.setattr(settings, "YOLO_BACKEND", "onnx")
+    monkeypatch.setattr(yolo_backends, "load_backend_model", unavailable)
+    monkeypatch.setattr(yolo_detection, "load_torch_model", lambda: "torch-model")
+    monkeypatch.setattr(yolo_detection, "model", None)
+    assert yolo_detection._load_model() == "torch-model"
+    assert yolo_detection.model == "torch-model"
+
+def test_parity_requires_real_frames(tmp_path):
+    with pytest.raises(SystemExit):
+        yolo_backends.main([])
+    with pytest.raises(SystemExit):
+        yolo_backends.main(["--frames", str(tmp_path)])  # No images
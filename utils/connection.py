@@ -1,28 +1,66 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict
+from typing import Dict, Callable, List, Optional, Set
 from utils.logger import logger
 import asyncio
 from starlette.websockets import WebSocketState
 import json
+from utils.session_state import SessionStateBackend, create_session_state
+from config.settings import settings
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, state: SessionStateBackend):
         self.active_connections: Dict[int, WebSocket] = {}
         self.connection_states: Dict[int, bool] = {}
+        self.connect_hooks: List[Callable[[int], None]] = []
+        self.disconnect_hooks: List[Callable[[int], None]] = []
+        self.pause_hooks: List[Callable[[int, bool], None]] = []
+        self.paused_users: Set[int] = set()
+        # Shared across workers; local dicts only hold this worker's sockets
+        self.state = state
+        self._command_handlers = {"disconnect": self._handle_disconnect, "pause": self._handle_pause}
+
+    def add_lifecycle_hooks(self, on_connect: Callable[[int], None], on_disconnect: Callable[[int], None]):
+        """Register callbacks run when a user's connection opens and closes"""
+        self.connect_hooks.append(on_connect)
+        self.disconnect_hooks.append(on_disconnect)
+
+    def add_pause_hook(self, hook: Callable[[int, bool], None]):
+        """Register a callback run when a local session is paused or resumed"""
+        self.pause_hooks.append(hook)
+
+    def _run_hooks(self, hooks: List[Callable[[int], None]], user_id: int):
+        for hook in hooks:
+            try:
+                hook(user_id)
+            except Exception as e:
+                logger.error(f"Connection hook error for user {user_id}: {str(e)}")
         
     async def connect(self, websocket: WebSocket, user_id: int):
         try:
             await self.disconnect(user_id)  # Close existing connection
+            # State backends may do file I/O, keep them off the event loop
+            owner = await asyncio.to_thread(self.state.owner, user_id)
+            if owner is not None and owner != self.state.worker_id:
+                # Previous connection lives in another worker
+                await asyncio.to_thread(self.state.send_command, user_id, "disconnect")
             await websocket.accept()
             self.active_connections[user_id] = websocket
             self.connection_states[user_id] = True
+            await asyncio.to_thread(self.state.register, user_id)
+            self._run_hooks(self.connect_hooks, user_id)
+            if await asyncio.to_thread(self.state.is_paused, user_id):
+                # Paused before a reconnect or on another worker, stay paused
+                self._apply_pause(user_id, True)
             logger.info(f"WebSocket connection accepted for user {user_id}")
             return True
         except Exception as e:
             logger.error(f"Connection error for user {user_id}: {str(e)}")
             return False
 
-    async def disconnect(self, user_id: int):
+    async def disconnect(self, user_id: int, websocket: Optional[WebSocket] = None):
+        """Close the user's connection; with websocket, only if it is still the current one"""
+        if websocket is not None and self.active_connections.get(user_id) is not websocket:
+            return  # Replaced by a reconnect, which now owns the session
         if user_id in self.active_connections:
             try:
                 ws = self.active_connections[user_id]
@@ -36,15 +74,22 @@ class ConnectionManager:
             finally:
                 self.active_connections.pop(user_id, None)
                 self.connection_states.pop(user_id, None)
+                self.paused_users.discard(user_id)  # Restored from the state on reconnect
+                await asyncio.to_thread(self.state.unregister, user_id)
+                self._run_hooks(self.disconnect_hooks, user_id)
 
     async def force_disconnect(self, user_id: int) -> bool:
-        """Force immediate disconnect"""
+        """Force immediate disconnect, forwarded to the owning worker if it isn't this one"""
         try:
             if user_id in self.active_connections:
                 ws = self.active_connections[user_id]
                 # Clean up first
                 self.active_connections.pop(user_id, None)
                 self.connection_states.pop(user_id, None)
+                self.paused_users.discard(user_id)  # Stopped sessions start unpaused
+                await asyncio.to_thread(self.state.set_paused, user_id, False)
+                await asyncio.to_thread(self.state.unregister, user_id)
+                self._run_hooks(self.disconnect_hooks, user_id)
                 
                 # Then close connection
                 try:
@@ -52,12 +97,69 @@ class ConnectionManager:
                 except:
                     pass
                 return True
-            return False
+            await asyncio.to_thread(self.state.set_paused, user_id, False)
+            return await asyncio.to_thread(self.state.send_command, user_id, "disconnect")
         except:
             return False
 
     def is_connected(self, user_id: int) -> bool:
-        return self.connection_states.get(user_id, False)
+        return self.connection_states.get(user_id, False) or self.state.is_connected(user_id)
+
+    def is_paused(self, user_id: int) -> bool:
+        return user_id in self.paused_users
+
+    def set_paused(self, user_id: int, paused: bool) -> bool:
+        """Pause or resume a session, forwarded to the owning worker if it isn't this one"""
+        if user_id not in self.active_connections:
+            if not self.state.send_command(user_id, "pause", {"paused": paused}):
+                return False
+            self.state.set_paused(user_id, paused)
+            return True
+        self.state.set_paused(user_id, paused)
+        self._apply_pause(user_id, paused)
+        return True
+
+    def _apply_pause(self, user_id: int, paused: bool):
+        """Pause or resume this worker's connection and run the pause hooks"""
+        if paused:
+            self.paused_users.add(user_id)
+        else:
+            self.paused_users.discard(user_id)
+        for hook in self.pause_hooks:
+            try:
+                hook(user_id, paused)
+            except Exception as e:
+                logger.error(f"Pause hook error for user {user_id}: {str(e)}")
+        logger.info(f"Session for user {user_id} {'paused' if paused else 'resumed'}")
+
+    async def _handle_pause(self, user_id: int, payload: Dict):
+        if user_id in self.active_connections:
+            self._apply_pause(user_id, bool(payload.get("paused")))  # Already stored by the sender
+
+    async def _handle_disconnect(self, user_id: int, payload: Dict):
+        if user_id in self.active_connections:
+            await self.force_disconnect(user_id)
+
+    async def process_commands(self):
+        """Run commands other workers queued for this worker's sessions"""
+        for user_id, command, payload in await asyncio.to_thread(self.state.poll_commands):
+            handler = self._command_handlers.get(command)
+            if handler is None:
+                logger.warning(f"Unknown session command '{command}' for user {user_id}")
+                continue
+            try:
+                await handler(user_id, payload)
+            except Exception as e:
+                logger.error(f"Session command '{command}' failed for user {user_id}: {str(e)}")
+
+    async def listen_for_commands(self, interval: float):
+        """Poll for cross-worker commands until cancelled"""
+        while True:
+            try:
+                await self.process_commands()
+            except Exception as e:
+                logger.error(f"Session command polling failed: {str(e)}")
+            await asyncio.sleep(interval)
 
     async def send_message(self, message: str, user_id: int):
         if user_id in self.active_connections:
@@ -67,7 +169,9 @@ class ConnectionManager:
                     await ws.send_text(message)
             except Exception as e:
                 logger.error(f"Error sending message: {str(e)}")
-                await self.disconnect(user_id)
+                await self.disconnect(user_id, ws)
 
 # Singleton instance
-manager = ConnectionManager()
+manager = ConnectionManager(
+    create_session_state(settings.SESSION_STATE_BACKEND, settings.SESSION_STATE_PATH)
+)
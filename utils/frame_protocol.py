@@ -0,0 +1,56 @@
+import struct
+from typing import NamedTuple, Optional, Tuple, Union
+
+# Binary frame message: fixed header followed by the encoded image bytes
+#   magic "PF" | version u8 | codec u8 | seq u32 | capture_ts f64 (ms since epoch) | width u16 | height u16
+MAGIC = b"PF"
+VERSION = 1
+HEADER = struct.Struct("!2sBBIdHH")
+HEADER_SIZE = HEADER.size
+
+CODEC_UNKNOWN = 0
+CODEC_JPEG = 1
+CODEC_WEBP = 2
+CODECS = {CODEC_UNKNOWN: "unknown", CODEC_JPEG: "jpeg", CODEC_WEBP: "webp"}
+
+class FrameHeader(NamedTuple):
+    version: int
+    codec: int
+    seq: int
+    capture_ts: float
+    width: int
+    height: int
+
+class FrameProtocolError(ValueError):
+    pass
+
+def is_framed(data: Union[bytes, bytearray, memoryview]) -> bool:
+    return len(data) >= HEADER_SIZE and bytes(data[:2]) == MAGIC
+
+def parse_frame(data: Union[bytes, bytearray, memoryview]) -> Tuple[FrameHeader, memoryview]:
+    """Split a binary frame message into its header and a zero-copy view of the image bytes"""
+    if not is_framed(data):
+        raise FrameProtocolError("Not a framed message")
+    _, version, codec, seq, capture_ts, width, height = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise FrameProtocolError(f"Unsupported frame protocol version {version}")
+    if codec not in CODECS:
+        raise FrameProtocolError(f"Unknown codec {codec}")
+    return FrameHeader(version, codec, seq, capture_ts, width, height), memoryview(data)[HEADER_SIZE:]
+
+def encode_frame(
+    image: bytes,
+    seq: int,
+    capture_ts: float,
+    width: int = 0,
+    height: int = 0,
+    codec: int = CODEC_JPEG
+) -> bytes:
+    """Build a binary frame message, as sent by clients"""
+    return HEADER.pack(MAGIC, VERSION, codec, seq & 0xFFFFFFFF, capture_ts, width, height) + image
+
+def split_message(data) -> Tuple[Optional[FrameHeader], Union[str, bytes, memoryview]]:
+    """Header and payload of a WebSocket message; legacy messages have no header"""
+    if isinstance(data, str) or not is_framed(data):
+        return None, data
+    return parse_frame(data)
@@ -1,10 +1,26 @@
 import base64
+import binascii
 import cv2
 import numpy as np
 from utils.logger import logger
 import re
 import io
 from PIL import Image
+from typing import Optional, Tuple
+from utils.frame_protocol import FrameHeader, FrameProtocolError, split_message
+from config.settings import settings
+from detection.resolution import inference_resolutions
+
+# imread flag per decode scale, JPEG is scaled in the DCT domain
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# JPEG start-of-frame markers (excluding DHT, JPG and DAC which share the range)
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
 
 def clean_base64_string(data: str) -> str:
     """Clean and validate base64 string"""
@@ -29,17 +45,67 @@ def clean_base64_string(data: str) -> str:
         logger.error(f"Error cleaning base64 string: {str(e)}")
         return None
 
-def decode_image_data(data) -> np.ndarray:
-    """Decode image data from bytes or base64 string"""
+def decode_base64(data: str) -> Optional[bytes]:
+    """Decode a base64 string or data URL, cleaning it only when strict decoding fails"""
+    marker = data.find('base64,')
+    payload = data[marker + 7:] if marker != -1 else data
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        pass
+
+    # Legacy path for whitespace, stray characters or missing padding
+    cleaned_data = clean_base64_string(data)
+    if not cleaned_data:
+        return None
+    return base64.b64decode(cleaned_data)
+
+def jpeg_dimensions(data) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG's start-of-frame segment, without decoding"""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        if marker == 0xD9 or marker == 0xDA:  # End of image or start of scan
+            return None
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+def choose_decode_scale(width: int, height: int, target: Optional[int], max_pixels: int) -> Optional[int]:
+    """Largest decode scale keeping the longest side >= target and the pixel count <= max_pixels.
+
+    target None disables reduction beyond what the pixel cap needs. Returns
+    None when the image is over the cap even at 1/8 scale.
+    """
+    longest = max(width, height)
+    chosen = None
+    for scale in (1, 2, 4, 8):
+        if (width // scale) * (height // scale) > max_pixels:
+            continue
+        if chosen is not None and (target is None or longest // scale < target):
+            break
+        chosen = scale
+    return chosen
+
+def decode_image_data(data, header: Optional[FrameHeader] = None) -> np.ndarray:
+    """Decode image data from bytes, a memoryview or a base64 string"""
     try:
         # Handle base64 string
         if isinstance(data, str):
             try:
-                cleaned_data = clean_base64_string(data)
-                if not cleaned_data:
+                image_data = decode_base64(data)
+                if not image_data:
                     return None
-                    
-                image_data = base64.b64decode(cleaned_data)
                 logger.debug(f"Decoded base64 data length: {len(image_data)}")
             except Exception as e:
                 logger.error(f"Base64 decode error: {str(e)}")
@@ -48,17 +114,26 @@ def decode_image_data(data) -> np.ndarray:
             image_data = data
 
         # Validate image data
-        if not image_data or len(image_data) < 100:
+        if image_data is None or len(image_data) < 100:
             logger.error("Invalid image data length")
             return None
 
         # Decode image
         try:
+            # frombuffer wraps bytes and memoryviews without copying
             nparr = np.frombuffer(image_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            scale = decode_scale(nparr, header)
+            if scale is None:
+                logger.error("Image exceeds the decode pixel limit")
+                return None
+            frame = cv2.imdecode(nparr, DECODE_FLAGS[scale])
             
             if frame is None or frame.size == 0:
                 raise ValueError("Failed to decode image")
+            if frame.shape[0] * frame.shape[1] > settings.MAX_DECODE_PIXELS:
+                # Dimensions were unknown or the header understated them
+                logger.error("Image exceeds the decode pixel limit")
+                return None
                 
             return frame
         except Exception as e:
@@ -68,3 +143,27 @@ def decode_image_data(data) -> np.ndarray:
     except Exception as e:
         logger.error(f"Image processing error: {str(e)}")
         return None
+
+def decode_scale(image_data: np.ndarray, header: Optional[FrameHeader] = None) -> Optional[int]:
+    """Decode scale for an encoded image, from the frame header or the JPEG header"""
+    is_jpeg = image_data[0] == 0xFF and image_data[1] == 0xD8
+    if header is not None and header.width and header.height:
+        dims = (header.width, header.height)
+    else:
+        dims = jpeg_dimensions(image_data) if is_jpeg else None
+    if dims is None:
+        return 1  # Checked against the pixel cap after decoding
+
+    # Detectors never look at more than the largest inference resolution;
+    # other formats decode at full size and resize, so only reduce JPEG for speed
+    target = max(inference_resolutions.values()) if settings.REDUCED_DECODE and is_jpeg else None
+    return choose_decode_scale(dims[0], dims[1], target, settings.MAX_DECODE_PIXELS)
+
+def decode_frame_message(data) -> Tuple[Optional[FrameHeader], Optional[np.ndarray]]:
+    """Decode a WebSocket frame message, binary-framed or legacy raw/base64"""
+    try:
+        header, payload = split_message(data)
+    except FrameProtocolError as e:
+        logger.error(f"Frame protocol error: {str(e)}")
+        return None, None
+    return header, decode_image_data(payload, header)
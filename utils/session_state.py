@@ -0,0 +1,232 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# (user_id, command, payload) delivered to the worker owning the session
+Command = Tuple[int, str, Dict]
+
+def local_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class SessionStateBackend:
+    """Which worker owns each live WebSocket session, plus commands addressed to sessions.
+
+    Commands for a session are queued for its owning worker, which picks
+    them up with poll_commands; this is how an HTTP request served by one
+    worker reaches a connection held by another.
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+
+    def register(self, user_id: int):
+        raise NotImplementedError
+
+    def unregister(self, user_id: int):
+        """Forget the session if this worker still owns it"""
+        raise NotImplementedError
+
+    def owner(self, user_id: int) -> Optional[str]:
+        """Worker holding the session's connection, None if not connected anywhere"""
+        raise NotImplementedError
+
+    def is_connected(self, user_id: int) -> bool:
+        return self.owner(user_id) is not None
+
+    def send_command(self, user_id: int, command: str, payload: Optional[Dict] = None) -> bool:
+        """Queue a command for the session's owner; False if nobody owns it"""
+        raise NotImplementedError
+
+    def set_paused(self, user_id: int, paused: bool):
+        """Record whether the user's session is paused; kept across reconnects"""
+        raise NotImplementedError
+
+    def is_paused(self, user_id: int) -> bool:
+        raise NotImplementedError
+
+    def poll_commands(self) -> List[Command]:
+        """Take the commands queued for this worker, also marking it alive"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class InMemorySessionState(SessionStateBackend):
+    """Single-process backend, the default with one worker"""
+
+    def __init__(self, worker_id: Optional[str] = None):
+        super().__init__(worker_id or local_worker_id())
+        self._owners: Dict[int, str] = {}
+        self._commands: Dict[str, List[Command]] = {}
+        self._paused: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def register(self, user_id: int):
+        with self._lock:
+            self._owners[user_id] = self.worker_id
+
+    def unregister(self, user_id: int):
+        with self._lock:
+            if self._owners.get(user_id) == self.worker_id:
+                del self._owners[user_id]
+
+    def owner(self, user_id: int) -> Optional[str]:
+        return self._owners.get(user_id)
+
+    def send_command(self, user_id: int, command: str, payload: Optional[Dict] = None) -> bool:
+        with self._lock:
+            owner = self._owners.get(user_id)
+            if owner is None:
+                return False
+            self._commands.setdefault(owner, []).append((user_id, command, payload or {}))
+            return True
+
+    def poll_commands(self) -> List[Command]:
+        with self._lock:
+            return self._commands.pop(self.worker_id, [])
+
+    def set_paused(self, user_id: int, paused: bool):
+        with self._lock:
+            if paused:
+                self._paused.add(user_id)
+            else:
+                self._paused.discard(user_id)
+
+    def is_paused(self, user_id: int) -> bool:
+        return user_id in self._paused
+
+class SQLiteSessionState(SessionStateBackend):
+    """Backend shared by the workers of one host through a SQLite file.
+
+    Workers refresh a heartbeat whenever they poll; sessions owned by a worker
+    silent for longer than stale_seconds (e.g. after a crash) count as gone.
+    """
+
+    def __init__(self, path: str, worker_id: Optional[str] = None, stale_seconds: float = 10.0):
+        super().__init__(worker_id or local_worker_id())
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    last_seen REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS sessions (
+                    user_id INTEGER PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    connected_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS commands (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    worker_id TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    command TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_commands_worker ON commands (worker_id);
+                CREATE TABLE IF NOT EXISTS paused_sessions (
+                    user_id INTEGER PRIMARY KEY,
+                    paused_at REAL NOT NULL
+                );
+            """)
+        self._heartbeat()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; requests run in FastAPI's threadpool
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _heartbeat(self):
+        self._connect().execute(
+            "INSERT INTO workers (worker_id, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (self.worker_id, time.time())
+        )
+
+    def register(self, user_id: int):
+        self._heartbeat()
+        self._connect().execute(
+            "INSERT INTO sessions (user_id, worker_id, connected_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET worker_id = excluded.worker_id, "
+            "connected_at = excluded.connected_at",
+            (user_id, self.worker_id, time.time())
+        )
+
+    def unregister(self, user_id: int):
+        self._connect().execute(
+            "DELETE FROM sessions WHERE user_id = ? AND worker_id = ?", (user_id, self.worker_id)
+        )
+
+    def owner(self, user_id: int) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT s.worker_id FROM sessions s JOIN workers w ON w.worker_id = s.worker_id "
+            "WHERE s.user_id = ? AND w.last_seen >= ?",
+            (user_id, time.time() - self.stale_seconds)
+        ).fetchone()
+        return row[0] if row else None
+
+    def send_command(self, user_id: int, command: str, payload: Optional[Dict] = None) -> bool:
+        owner = self.owner(user_id)
+        if owner is None:
+            return False
+        self._connect().execute(
+            "INSERT INTO commands (worker_id, user_id, command, payload) VALUES (?, ?, ?, ?)",
+            (owner, user_id, command, json.dumps(payload or {}))
+        )
+        return True
+
+    def set_paused(self, user_id: int, paused: bool):
+        if paused:
+            self._connect().execute(
+                "INSERT OR IGNORE INTO paused_sessions (user_id, paused_at) VALUES (?, ?)",
+                (user_id, time.time())
+            )
+        else:
+            self._connect().execute("DELETE FROM paused_sessions WHERE user_id = ?", (user_id,))
+
+    def is_paused(self, user_id: int) -> bool:
+        return self._connect().execute(
+            "SELECT 1 FROM paused_sessions WHERE user_id = ?", (user_id,)
+        ).fetchone() is not None
+
+    def poll_commands(self) -> List[Command]:
+        self._heartbeat()
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT id, user_id, command, payload FROM commands WHERE worker_id = ? ORDER BY id",
+                (self.worker_id,)
+            ).fetchall()
+            if rows:
+                db.execute("DELETE FROM commands WHERE worker_id = ? AND id <= ?", (self.worker_id, rows[-1][0]))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return [(user_id, command, json.loads(payload)) for _, user_id, command, payload in rows]
+
+    def close(self):
+        db = self._connect()
+        db.execute("DELETE FROM sessions WHERE worker_id = ?", (self.worker_id,))
+        db.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+        db.close()
+        self._local.db = None
+
+def create_session_state(backend: str, path: str) -> SessionStateBackend:
+    if backend == "memory":
+        return InMemorySessionState()
+    if backend == "sqlite":
+        return SQLiteSessionState(path)
+    raise ValueError(f"Unknown session state backend: {backend}")